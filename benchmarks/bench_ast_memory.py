@@ -0,0 +1,72 @@
+"""
+AST Memory Benchmark
+Parses a large generated PArL program and reports the memory held by the
+resulting AST: total, bytes per node and the per-instance size of each node
+class (its __dict__ included when the class has one)
+
+Usage: python -m benchmarks.bench_ast_memory [--sprites N]
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexer import FSALexer
+from parser.ast_walker import walk
+from parser.parser import PArLParser
+from benchmarks.programs import generate_control_flow_program, generate_expression_program, generate_program
+
+
+def measure_memory(build):
+    """Return (result, bytes still allocated by build() once it returns)"""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def instance_size(node):
+    """Bytes of the node object itself plus its attribute dict (if any)"""
+    size = sys.getsizeof(node)
+    if hasattr(node, "__dict__"):
+        size += sys.getsizeof(node.__dict__)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory held by parsed ASTs")
+    parser.add_argument("--sprites", type=int, default=2000, help="number of generated sprite functions")
+    args = parser.parse_args()
+
+    lexer = FSALexer(engine="dense")
+    programs = [
+        ("sprites", generate_program(args.sprites)),
+        ("control flow", generate_control_flow_program(args.sprites * 10)),
+        ("expressions", generate_expression_program(args.sprites * 5, 4)),
+    ]
+    print(f"{'Program':<14}{'Tokens':>12}{'Nodes':>12}{'AST (KiB)':>14}{'Bytes/node':>12}")
+    print("-" * 64)
+    classes = Counter()
+    sizes = {}
+    for name, text in programs:
+        tokens = lexer.tokenize_buffer(text)
+        ast, size = measure_memory(lambda: PArLParser(tokens).parse())
+        nodes = list(walk(ast))
+        print(f"{name:<14}{len(tokens):>12,}{len(nodes):>12,}{size / 1024:>14,.0f}{size / len(nodes):>12.1f}")
+        for node in nodes:
+            classes[type(node).__name__] += 1
+            sizes.setdefault(type(node).__name__, instance_size(node))
+
+    print(f"\n{'Node class':<22}{'Count':>12}{'Bytes/instance':>16}")
+    print("-" * 50)
+    for name, count in classes.most_common():
+        print(f"{name:<22}{count:>12,}{sizes[name]:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Code Generator Scaling Benchmark
+Times PArIRGenerator.generate on main programs with growing numbers of
+if/while/for statements; a flat time-per-statement column means linear scaling
+
+Usage: python -m benchmarks.bench_codegen [--sizes N ...] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexer import FSALexer
+from parser.parser import PArLParser
+from code_generator.code_generator import PArIRGenerator
+from benchmarks.programs import generate_control_flow_program
+
+
+def time_generate(ast, repeat):
+    """Return (best seconds, instruction count) for generating code from ast"""
+    best = None
+    instructions = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        instructions = PArIRGenerator().generate(ast)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(instructions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PArIRGenerator scaling")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2500, 5000, 10000, 20000, 40000],
+                        help="control-flow statement counts to generate")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size (best is reported)")
+    args = parser.parse_args()
+
+    lexer = FSALexer(engine="regex")
+    print(f"{'Statements':>12}{'Instructions':>16}{'Best (s)':>12}{'us/statement':>16}")
+    print("-" * 56)
+
+    for size in args.sizes:
+        ast = PArLParser(lexer.tokenize(generate_control_flow_program(size))).parse()
+        elapsed, count = time_generate(ast, args.repeat)
+        print(f"{size:>12,}{count:>16,}{elapsed:>12.3f}{elapsed / size * 1e6:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Lexer Engine Benchmark
+Compares the FSALexer engines on a large generated PArL program
+
+Usage: python -m benchmarks.bench_lexer [--sprites N] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexer import FSALexer
+from benchmarks.programs import generate_program
+
+
+def time_engine(engine, text, repeat):
+    """Return (best seconds, tokens) for tokenizing text with the given engine"""
+    lexer = FSALexer(engine=engine)
+    best = None
+    tokens = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = lexer.tokenize(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FSALexer engines")
+    parser.add_argument("--sprites", type=int, default=2000, help="number of generated sprite functions")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine (best is reported)")
+    args = parser.parse_args()
+
+    text = generate_program(args.sprites)
+    size_mb = len(text) / (1024 * 1024)
+    print(f"Input: {len(text):,} characters ({size_mb:.2f} MiB), {text.count(chr(10)):,} lines")
+    print("-" * 72)
+    print(f"{'Engine':<10}{'Best (s)':>12}{'MiB/s':>12}{'Tokens/s':>16}{'Speedup':>12}")
+
+    reference_time = None
+    reference_tokens = None
+    for engine in FSALexer.ENGINES:
+        elapsed, tokens = time_engine(engine, text, args.repeat)
+        if reference_time is None:
+            reference_time = elapsed
+            reference_tokens = [(t.type, t.lexeme, t.line, t.col) for t in tokens]
+            identical = True
+        else:
+            identical = reference_tokens == [(t.type, t.lexeme, t.line, t.col) for t in tokens]
+        print(f"{engine:<10}{elapsed:>12.3f}{size_mb / elapsed:>12.2f}{len(tokens) / elapsed:>16,.0f}"
+              f"{reference_time / elapsed:>11.2f}x"
+              f"{'' if identical else '  (TOKEN MISMATCH)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Code Optimization Benchmark
+Compiles the simulator test programs with each optimization setting and runs
+them headless for the same number of frames, reporting generated instruction
+counts, executed instructions and VM time. Frame digests are checked against
+the unoptimized build, so a setting that changes what is drawn is reported.
+
+Usage: python -m benchmarks.bench_optimizer [--frames N] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parlc.driver import CompileOptions, compile_source
+from vm.headless import run_headless
+from test.test_simulator import SIMULATOR_PROGRAMS
+
+# (column name, compile options) - the first entry is the baseline
+SETTINGS = [
+    ("-O0", CompileOptions()),
+    ("-O1", CompileOptions(opt_level=1)),
+    ("elide", CompileOptions(elide_empty_frames=True)),
+    ("-O1+elide", CompileOptions(opt_level=1, elide_empty_frames=True)),
+    ("hoist", CompileOptions(hoist_loop_frames=True)),
+    ("fold", CompileOptions(fold_constants=True)),
+    ("all", CompileOptions(opt_level=1, elide_empty_frames=True, hoist_loop_frames=True, fold_constants=True)),
+]
+
+
+def measure(source, options, frames, repeat):
+    """Return (generated instructions, executed instructions, best seconds, frame digests)"""
+    instructions = compile_source(source, options).instructions
+    best = None
+    recording = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        recording = run_headless(instructions, frames=frames, seed=2000)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(instructions), recording.steps, best, recording.digests()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generated-code optimizations on the VM")
+    parser.add_argument("--frames", type=int, default=32, help="frames to run each program for")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per setting (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'Program':<38}{'Setting':<10}{'Generated':>11}{'Executed':>14}{'Time (ms)':>12}{'vs -O0':>9}")
+    print("-" * 94)
+    totals = {name: [0, 0, 0.0] for name, _ in SETTINGS}
+    for program, source in SIMULATOR_PROGRAMS.items():
+        baseline = None
+        for name, options in SETTINGS:
+            generated, executed, elapsed, digests = measure(source, options, args.frames, args.repeat)
+            if baseline is None:
+                baseline = (executed, digests)
+            change = f"{(executed / baseline[0] - 1) * 100:+.1f}%"
+            if digests != baseline[1]:
+                change += "  FRAMES DIFFER"
+            print(f"{program:<38}{name:<10}{generated:>11,}{executed:>14,}{elapsed * 1000:>12.1f}{change:>9}")
+            totals[name][0] += generated
+            totals[name][1] += executed
+            totals[name][2] += elapsed
+        print()
+
+    base_executed = totals[SETTINGS[0][0]][1]
+    for name, (generated, executed, elapsed) in totals.items():
+        print(f"{'Total':<38}{name:<10}{generated:>11,}{executed:>14,}{elapsed * 1000:>12.1f}"
+              f"{(executed / base_executed - 1) * 100:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
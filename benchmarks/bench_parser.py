@@ -0,0 +1,86 @@
+"""
+Parser Benchmark
+Times PArLParser on generated expression-heavy programs (binary operators at
+every precedence level, unary minus/not and casts) and statement-heavy ones
+(sprite functions and if/while/for chains), and finds the deepest
+parenthesized expression that parses under the default recursion limit
+
+Usage: python -m benchmarks.bench_parser [--sizes N ...] [--depth D] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexer import FSALexer
+from parser.parser import PArLParser
+from benchmarks.programs import (generate_control_flow_program, generate_expression_program,
+                                 generate_nested_expression, generate_program)
+
+
+def time_parse(tokens, repeat):
+    """Return best seconds for parsing tokens"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        PArLParser(tokens).parse()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def parses(lexer, depth):
+    """True if an expression nested depth parentheses deep parses without RecursionError"""
+    try:
+        PArLParser(lexer.tokenize(generate_nested_expression(depth))).parse()
+    except RecursionError:
+        return False
+    return True
+
+
+def max_nesting(lexer, limit=1 << 16):
+    """Deepest nesting that still parses (bisection; capped at limit)"""
+    low, high = 0, 1
+    while high < limit and parses(lexer, high):
+        low, high = high, high * 2
+    if high >= limit:
+        return limit
+    while high - low > 1:
+        middle = (low + high) // 2
+        if parses(lexer, middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PArLParser on expression-heavy code")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000],
+                        help="generated statement counts")
+    parser.add_argument("--depth", type=int, default=4, help="operator nesting depth of each expression")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size (best is reported)")
+    args = parser.parse_args()
+
+    lexer = FSALexer(engine="regex")
+    workloads = [
+        ("expressions", lambda size: generate_expression_program(size, args.depth)),
+        ("statements", lambda size: generate_program(size // 20) + generate_control_flow_program(size)),
+    ]
+    print(f"{'Program':<14}{'Statements':>12}{'Tokens':>12}{'Best (s)':>12}{'us/token':>12}")
+    print("-" * 62)
+    for name, generate in workloads:
+        for size in args.sizes:
+            tokens = lexer.tokenize(generate(size))
+            elapsed = time_parse(tokens, args.repeat)
+            print(f"{name:<14}{size:>12,}{len(tokens):>12,}{elapsed:>12.3f}{elapsed / len(tokens) * 1e6:>12.2f}")
+
+    print(f"\nDeepest parenthesized expression (recursion limit {sys.getrecursionlimit()}): "
+          f"{max_nesting(lexer)} levels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Token Representation Benchmark
+Compares a list of Token objects against the columnar TokenBuffer on a large
+generated PArL program: memory held by the tokens, parse time over them, and
+lex + parse time (a Token list is built while lexing, while the parser
+materializes a Token from a TokenBuffer only for names and literals)
+
+Usage: python -m benchmarks.bench_tokens [--sprites N] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexer import FSALexer
+from parser.parser import PArLParser
+from benchmarks.programs import generate_program
+
+
+def measure_memory(build):
+    """Return (result, bytes still allocated by build() once it returns)"""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def time_best(run, repeat):
+    """Return best seconds for run() over repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Token list vs TokenBuffer")
+    parser.add_argument("--sprites", type=int, default=2000, help="number of generated sprite functions")
+    parser.add_argument("--repeat", type=int, default=3, help="parses per representation (best is reported)")
+    args = parser.parse_args()
+
+    text = generate_program(args.sprites)
+    lexer = FSALexer(engine="dense")
+    print(f"Input: {len(text):,} characters, {text.count(chr(10)):,} lines")
+    print("-" * 86)
+    print(f"{'Representation':<18}{'Tokens':>10}{'Memory (KiB)':>16}{'Bytes/token':>14}{'Parse (s)':>12}"
+          f"{'Lex+parse (s)':>16}")
+
+    rows = [("list[Token]", lambda: lexer.tokenize(text)),
+            ("TokenBuffer", lambda: lexer.tokenize_buffer(text))]
+    for name, build in rows:
+        tokens, size = measure_memory(build)
+        parse = time_best(lambda: PArLParser(tokens).parse(), args.repeat)
+        pipeline = time_best(lambda: PArLParser(build()).parse(), args.repeat)
+        print(f"{name:<18}{len(tokens):>10,}{size / 1024:>16,.0f}{size / len(tokens):>14.1f}{parse:>12.3f}"
+              f"{pipeline:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+PArIR VM Benchmark
+Runs the simulator test programs on both VM engines and reports instructions
+per second. Endless animations are cut off after --max-steps instructions.
+
+Usage: python -m benchmarks.bench_vm [--max-steps N] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parlc.driver import compile_source
+from vm import PArIRMachine, VMError
+from test.test_simulator import SIMULATOR_PROGRAMS
+
+
+def time_engine(instructions, engine, max_steps, repeat):
+    """Return (best seconds, instructions executed) for one engine"""
+    best = None
+    steps = 0
+    for _ in range(repeat):
+        machine = PArIRMachine(instructions, seed=2000, max_steps=max_steps, engine=engine)
+        start = time.perf_counter()
+        try:
+            machine.run()
+        except VMError:
+            if machine.steps < max_steps:
+                raise
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        steps = machine.steps
+    return best, steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PArIR VM engines")
+    parser.add_argument("--max-steps", type=int, default=2_000_000,
+                        help="instruction budget per program (endless animations stop here)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'Program':<38}{'Instructions':>14}" +
+          "".join(f"{engine + ' (M/s)':>18}" for engine in PArIRMachine.ENGINES) + f"{'Speedup':>10}")
+    print("-" * (62 + 18 * len(PArIRMachine.ENGINES)))
+
+    for name, source in SIMULATOR_PROGRAMS.items():
+        instructions = compile_source(source).instructions
+        rates = []
+        steps = 0
+        for engine in PArIRMachine.ENGINES:
+            elapsed, steps = time_engine(instructions, engine, args.max_steps, args.repeat)
+            rates.append(steps / elapsed / 1e6)
+        print(f"{name:<38}{steps:>14,}" + "".join(f"{rate:>18.2f}" for rate in rates) +
+              f"{rates[0] / rates[-1]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Synthetic PArL Program Generator for Benchmarks
+Produces large, well-formed (lexically, syntactically and semantically valid) programs
+"""
+
+import random
+
+SPRITE_TEMPLATE = """
+/* Sprite routine {index}: draws an 8-step tile strip
+   starting at (x, y) and returns a checksum */
+fun sprite_{index}(x:int, y:int, c:colour) -> int {{
+    let total:int = 0;
+    for (let j:int = 0; j < 8; j = j + 1) {{
+        let shade:colour = (c as int + j * {step}) as colour;
+        if (j % 2 == 0) {{
+            __write_box x + j, y, 2, 2, shade;
+        }} else {{
+            __write x, y + j, #00ff7f;
+        }}
+        total = total + (j * 3 - 1) / 2;
+    }}
+    // checksum keeps the loop observable
+    return total;
+}}
+"""
+
+MAIN_TEMPLATE = """
+let r{index}:int = sprite_{index}({x}, {y}, #{colour:06x});
+__delay {delay};
+"""
+
+
+def generate_program(num_sprites: int = 100) -> str:
+    """Generate a sprite program with num_sprites functions and their calls"""
+    parts = []
+    for i in range(num_sprites):
+        parts.append(SPRITE_TEMPLATE.format(index=i, step=(i % 7) + 1))
+    for i in range(num_sprites):
+        parts.append(MAIN_TEMPLATE.format(index=i, x=i % 32, y=(i * 5) % 32,
+                                          colour=(i * 2654435761) & 0xFFFFFF,
+                                          delay=16 + i % 4))
+    return "".join(parts)
+
+
+CONTROL_FLOW_TEMPLATES = [
+    """
+if (x < {k}) {{
+    x = x + 1;
+}} else {{
+    x = x - 1;
+}}
+""",
+    """
+while (x > {k}) {{
+    x = x - 2;
+}}
+""",
+    """
+for (let i{index}:int = 0; i{index} < 2; i{index} = i{index} + 1) {{
+    x = x + i{index};
+}}
+""",
+]
+
+
+def generate_control_flow_program(num_statements: int = 1000) -> str:
+    """Generate a main program made of num_statements if/while/for statements"""
+    parts = ["let x:int = 0;\n"]
+    for i in range(num_statements):
+        template = CONTROL_FLOW_TEMPLATES[i % len(CONTROL_FLOW_TEMPLATES)]
+        parts.append(template.format(index=i, k=i % 50))
+    parts.append("__print x;\n")
+    return "".join(parts)
+
+
+EXPRESSION_VARIABLES = ["a", "b", "c", "d"]
+ARITHMETIC_OPERATORS = ["+", "-", "*", "/", "%"]
+RELATIONAL_OPERATORS = ["<", ">", "<=", ">=", "==", "!="]
+
+
+def _int_expression(rng: random.Random, depth: int) -> str:
+    """Random int expression over a..d and f (a float), depth levels of binary operators"""
+    if depth == 0:
+        return rng.choice([rng.choice(EXPRESSION_VARIABLES), str(rng.randrange(1, 100)),
+                           "-" + rng.choice(EXPRESSION_VARIABLES), "f as int"])
+    left = _int_expression(rng, depth - 1)
+    right = _int_expression(rng, rng.randrange(depth))
+    expression = f"{left} {rng.choice(ARITHMETIC_OPERATORS)} {right}"
+    return f"({expression})" if rng.random() < 0.4 else expression
+
+
+def _bool_expression(rng: random.Random, depth: int) -> str:
+    """Random bool expression: comparisons of int expressions joined by and/or/not"""
+    comparison = (f"{_int_expression(rng, depth)} {rng.choice(RELATIONAL_OPERATORS)} "
+                  f"{_int_expression(rng, depth)}")
+    if depth == 0:
+        return comparison
+    joined = f"{comparison} {rng.choice(['and', 'or'])} {_bool_expression(rng, depth - 1)}"
+    return f"not ({joined})" if rng.random() < 0.2 else joined
+
+
+def generate_expression_program(num_statements: int = 1000, depth: int = 4, seed: int = 2000) -> str:
+    """Generate a main program of num_statements expression-heavy assignments and ifs"""
+    rng = random.Random(seed)
+    parts = ["let a:int = 3;\nlet b:int = 5;\nlet c:int = 7;\nlet d:int = 11;\n"
+             "let f:float = 2.5;\nlet ok:bool = false;\n"]
+    for i in range(num_statements):
+        if i % 4 == 3:
+            parts.append(f"if ({_bool_expression(rng, depth // 2)}) {{\n    ok = not ok;\n}}\n")
+        else:
+            parts.append(f"{rng.choice(EXPRESSION_VARIABLES)} = {_int_expression(rng, depth)};\n")
+    parts.append("__print a;\n")
+    return "".join(parts)
+
+
+def generate_nested_expression(depth: int) -> str:
+    """A statement whose initializer nests depth parenthesized additions: (((1 + 1) + 1) ...)"""
+    return "let x:int = " + "(" * depth + "1" + " + 1)" * depth + ";\n"
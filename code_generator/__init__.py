@@ -3,9 +3,18 @@ PArL Code Generator Module
 Generates PArIR (stack-based virtual machine) instructions from PArL AST
 """
 
-from .code_generator import PArIRGenerator, MemoryLocation
+from .code_generator import PArIRGenerator, MemoryLocation, SourceLocation
+from .instructions import (Instruction, Opcode, render_program, parse_program,
+                           encode_program, decode_program)
 
 __all__ = [
     'PArIRGenerator',
-    'MemoryLocation'
+    'MemoryLocation',
+    'SourceLocation',
+    'Instruction',
+    'Opcode',
+    'render_program',
+    'parse_program',
+    'encode_program',
+    'decode_program'
 ]
\ No newline at end of file
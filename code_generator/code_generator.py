@@ -3,9 +3,12 @@ PArL to PArIR Code Generator - SYSTEMATIC FIXES
 Fixed WriteBox argument order and verified modulo implementation
 """
 
-from typing import List, Dict, Optional, Tuple, Set
+from typing import List, Dict, Optional, Tuple, Set, Union
 from dataclasses import dataclass
 from parser.ast_nodes import *
+from parser.ast_walker import evaluate, walk
+from .instructions import Instruction, Opcode, render_program
+from .peephole import peephole
 
 
 @dataclass
@@ -16,20 +19,80 @@ class MemoryLocation:
     size: int = 1  # Default size is 1 for single variables
 
 
+@dataclass(frozen=True)
+class SourceLocation:
+    """PArL source position an instruction was generated from"""
+    line: int
+    col: int
+    function: str  # enclosing function, "main" for top-level code
+
+
 class PArIRGenerator:
     """
     Generates PArIR instructions from PArL AST
     SYSTEMATIC FIX: Proper frame level semantics throughout
     """
     
-    def __init__(self, debug: bool = False):
-        # Instruction generation
-        self.instructions: List[str] = []
+    OPT_LEVELS = (0, 1)
+    
+    # Generate method per node class (resolved once per generator class)
+    STATEMENT_GENERATORS = Dispatcher({
+        VariableDeclaration: "_generate_var_decl",
+        Assignment: "_generate_assignment",
+        IfStatement: "_generate_if_stmt",
+        WhileStatement: "_generate_while_stmt",
+        ForStatement: "_generate_for_stmt",
+        ReturnStatement: "_generate_return_stmt",
+        PrintStatement: "_generate_print_stmt",
+        DelayStatement: "_generate_delay_stmt",
+        WriteStatement: "_generate_write_stmt",
+        WriteBoxStatement: "_generate_write_box_stmt",
+        ClearStatement: "_generate_clear_stmt",
+        Block: "_generate_block",
+        FunctionCall: "_generate_call_stmt",
+    })
+    # Leaves emit directly; the others are generators yielding their sub-expressions
+    EXPRESSION_GENERATORS = Dispatcher({
+        Literal: "_generate_literal",
+        Identifier: "_generate_identifier",
+        BinaryOperation: "_generate_binary_op",
+        UnaryOperation: "_generate_unary_op",
+        CastExpression: "_generate_cast",
+        FunctionCall: "_generate_function_call",
+        ArrayLiteral: "_generate_array_literal",
+        IndexAccess: "_generate_index_access",
+        PadWidth: "_generate_pad_width",
+        PadHeight: "_generate_pad_height",
+        PadRandI: "_generate_pad_randi",
+        PadRead: "_generate_pad_read",
+    })
+    
+    def __init__(self, debug: bool = False, opt_level: int = 0, elide_empty_frames: bool = False,
+                 hoist_loop_frames: bool = False):
+        if opt_level not in self.OPT_LEVELS:
+            raise ValueError(f"Unknown optimization level {opt_level} (expected one of {self.OPT_LEVELS})")
+        # Instruction generation (structured; rendered to text by generate())
+        self.instructions: List[Instruction] = []
         self.debug = debug
+        self.opt_level = opt_level  # 1: peephole pass over the generated stream
+        # Blocks without declarations (if arms, loop bodies) open no frame
+        self.elide_empty_frames = elide_empty_frames
+        # Loop-body locals live in a frame opened once around the loop instead of one per iteration
+        self.hoist_loop_frames = hoist_loop_frames
+        
+        # Comments never occupy an address: they are kept aside, keyed by the
+        # address of the instruction they precede
+        self.comments: Dict[int, List[str]] = {}
+        
+        # Source map: source_map[address] is the location of the statement or
+        # expression that emitted the instruction (None for the program skeleton)
+        self.source_map: List[Optional[SourceLocation]] = []
+        self._location: Optional[SourceLocation] = None
         
         # Memory management
         self.memory_stack: List[Dict[str, MemoryLocation]] = []
         self.current_frame_level = -1
+        self.scope_frame_levels: List[int] = []  # frame each scope's variables live in
         self.frame_var_counts: List[int] = []
         self.next_var_indices: List[int] = []
         
@@ -37,26 +100,35 @@ class PArIRGenerator:
         self.function_addresses: Dict[str, int] = {}
         self.current_function: Optional[str] = None
         
-        # Function size calculation
+        # Function skip distances (recorded as functions are laid out)
         self.function_sizes: Dict[str, int] = {}
-        self.dry_run_mode = False
     
     def generate(self, ast: Program) -> List[str]:
         """Generate PArIR code from AST"""
+        return render_program(self.generate_ir(ast))
+    
+    def generate_ir(self, ast: Program) -> List[Instruction]:
+        """Generate the structured instruction stream from AST"""
         self.instructions = []
+        self.comments = {}
+        self.source_map = []
+        self._location = None
         self._reset_state()
         
         # SYSTEMATIC FIX: Calculate main header jump distance
-        self._emit(".main")
+        self._emit(Opcode.LABEL, "main")
         main_header_jump = self._calculate_main_header_jump_distance()
-        self._emit(f"push {main_header_jump}")
-        self._emit("jmp")
-        self._emit("halt")
+        self._emit(Opcode.PUSH, main_header_jump)
+        self._emit(Opcode.JMP)
+        self._emit(Opcode.HALT)
         
-        # Calculate function sizes and generate code
-        self._calculate_function_jump_distances(ast)
+        # Single pass: function bodies are generated into their own buffers and laid out with their skips
         self._generate_program(ast)
         
+        if self.opt_level >= 1:
+            self.instructions, self.source_map, self.comments = peephole(
+                self.instructions, self.source_map, self.comments)
+        
         return self.instructions
     
     def _calculate_main_header_jump_distance(self) -> int:
@@ -70,124 +142,67 @@ class PArIRGenerator:
         """Reset generator state"""
         self.memory_stack = []
         self.current_frame_level = -1
+        self.scope_frame_levels = []
         self.frame_var_counts = []
         self.next_var_indices = []
         self.function_addresses = {}
         self.function_sizes = {}
-        self.dry_run_mode = False
-    
-    # ===== FUNCTION SIZE CALCULATION =====
-    
-    def _calculate_function_jump_distances(self, ast: Program):
-        """Calculate exact jump distances needed to skip over functions"""
-        for stmt in ast.statements:
-            if isinstance(stmt, FunctionDeclaration):
-                function_body_size = self._dry_run_function_body(stmt)
-                # SYSTEMATIC: Function skip overhead = push #PC+X, jmp, .functionName (3 instructions)
-                function_skip_overhead = 3
-                jump_distance = function_skip_overhead + function_body_size
-                self.function_sizes[stmt.name] = jump_distance
-                
-                if self.debug:
-                    print(f"Function '{stmt.name}': body={function_body_size}, overhead={function_skip_overhead}, jump=#PC+{jump_distance}")
-    
-    def _dry_run_function_body(self, func_node: FunctionDeclaration) -> int:
-        """Calculate the exact number of instructions in the function body"""
-        # Save current state
-        saved_instructions = self.instructions.copy()
-        saved_memory_stack = [scope.copy() for scope in self.memory_stack]
-        saved_frame_level = self.current_frame_level
-        saved_frame_var_counts = self.frame_var_counts.copy()
-        saved_next_var_indices = self.next_var_indices.copy()
-        saved_current_function = self.current_function
-        saved_dry_run_mode = self.dry_run_mode
-        
-        # Enter dry-run mode
-        self.dry_run_mode = True
-        self.instructions = []
-        self.memory_stack = []
-        self.current_frame_level = -1
-        self.frame_var_counts = []
-        self.next_var_indices = []
-        
-        try:
-            self.current_function = func_node.name
-            
-            # SYSTEMATIC FIX: Calculate parameter space including arrays using helper method
-            param_space = 0
-            for param in func_node.params:
-                param_space += self._get_param_size(param.param_type)
-            
-            # SYSTEMATIC: Use standard counting with proper scope boundary respect
-            local_count = self._count_variable_declarations(func_node.body.statements)
-            
-            # SYSTEMATIC FIX: Allocate space for both parameters and locals together
-            allocation = param_space + local_count
-            
-            # Generate alloc instruction
-            self._emit(f"push {allocation}")
-            self._emit("alloc")
-            
-            # Enter function scope
-            total_vars = allocation
-            self._enter_scope(total_vars)
-            
-            # Register parameters with correct indexing for arrays using helper method
-            current_index = 0
-            for param in func_node.params:
-                param_size = self._get_param_size(param.param_type)
-                self._allocate_variable(param.name, current_index, param_size)
-                current_index += param_size
-            
-            if self.next_var_indices:
-                self.next_var_indices[-1] = param_space
-            
-            # Generate body statements
-            for stmt in func_node.body.statements:
-                self._generate_statement(stmt)
-            
-            self._exit_scope()
-            
-            body_size = len(self.instructions)
-            
-            if self.debug:
-                print(f"  Dry-run for '{func_node.name}' generated {body_size} instructions:")
-                for i, instr in enumerate(self.instructions):
-                    print(f"    {i}: {instr}")
-            
-        except Exception as e:
-            if self.debug:
-                print(f"  Error in dry-run for '{func_node.name}': {e}")
-            body_size = 10  # Fallback
-        finally:
-            # Restore state
-            self.dry_run_mode = saved_dry_run_mode
-            self.instructions = saved_instructions
-            self.memory_stack = saved_memory_stack
-            self.current_frame_level = saved_frame_level
-            self.frame_var_counts = saved_frame_var_counts
-            self.next_var_indices = saved_next_var_indices
-            self.current_function = saved_current_function
-        
-        return body_size
     
     # ===== INSTRUCTION GENERATION =====
     
-    def _emit(self, instruction: str):
-        """Emit a single instruction"""
+    def _emit(self, opcode: Union[Opcode, str], operand=None, level: Optional[int] = None):
+        """Emit a single instruction (PArIR text is parsed; '//' text becomes a comment)"""
+        if isinstance(opcode, str):
+            if opcode.startswith("//"):
+                self._emit_comment(opcode)
+                return
+            instruction = Instruction.parse(opcode)
+        else:
+            instruction = Instruction(opcode, operand, level)
         self.instructions.append(instruction)
-        if self.debug and not self.dry_run_mode:
-            print(f"[{len(self.instructions)-1}] {instruction}")
+        self.source_map.append(self._location)
+        if self.debug:
+            print(f"[{len(self.instructions)-1}] {instruction.render()}")
+    
+    def _patch_jump(self, address: int, offset: int):
+        """Back-patch the relative target of the 'push #PC' placeholder at address"""
+        self.instructions[address].operand = offset
+    
+    def _emit_comment(self, comment: str):
+        """Attach a comment to the next instruction address (side table, no address used)"""
+        if not comment.startswith("//"):
+            comment = f"// {comment}"
+        self.comments.setdefault(len(self.instructions), []).append(comment)
     
     def _get_current_address(self) -> int:
-        """Get current instruction address"""
-        return len([i for i in self.instructions if not i.startswith("//")])
+        """Get current instruction address (O(1): the instruction list holds no comments)"""
+        return len(self.instructions)
+    
+    def get_annotated_instructions(self) -> List[str]:
+        """Generated instructions with comments interleaved, for listings"""
+        if not self.comments:
+            return render_program(self.instructions)
+        annotated = []
+        for address, instruction in enumerate(self.instructions):
+            annotated.extend(self.comments.get(address, ()))
+            annotated.append(instruction.render())
+        annotated.extend(self.comments.get(len(self.instructions), ()))
+        return annotated
+    
+    def _set_location(self, node: ASTNode) -> Optional[SourceLocation]:
+        """Attribute following instructions to node; returns the location to restore afterwards"""
+        previous = self._location
+        if node is not None and getattr(node, "line", 0):
+            self._location = SourceLocation(node.line, node.col, self.current_function or "main")
+        return previous
     
     # ===== MEMORY MANAGEMENT =====
     
-    def _enter_scope(self, var_count: int = 0):
-        """Enter a new scope"""
-        self.current_frame_level += 1
+    def _enter_scope(self, var_count: int = 0, opens_frame: bool = True):
+        """Enter a new scope (opens_frame=False: the scope shares the enclosing frame)"""
+        if opens_frame:
+            self.current_frame_level += 1
+        self.scope_frame_levels.append(self.current_frame_level)
         self.memory_stack.append({})
         self.frame_var_counts.append(var_count)
         self.next_var_indices.append(0)
@@ -198,7 +213,8 @@ class PArIRGenerator:
             self.memory_stack.pop()
             self.frame_var_counts.pop()
             self.next_var_indices.pop()
-            self.current_frame_level -= 1
+            self.scope_frame_levels.pop()
+            self.current_frame_level = self.scope_frame_levels[-1] if self.scope_frame_levels else -1
     
     def _allocate_variable(self, name: str, index: Optional[int] = None, size: int = 1) -> MemoryLocation:
         """Allocate a variable in current scope"""
@@ -230,9 +246,10 @@ class PArIRGenerator:
                 
                 # SYSTEMATIC FRAME LEVEL CALCULATION:
                 # Frame level = distance from current execution to variable storage
-                # This represents "how many frames back" to find the variable
-                current_execution_depth = len(self.memory_stack) - 1
-                variable_storage_depth = scope_index
+                # This represents "how many frames back" to find the variable;
+                # scopes that open no frame do not count
+                current_execution_depth = self.current_frame_level
+                variable_storage_depth = self.scope_frame_levels[scope_index]
                 frame_level = current_execution_depth - variable_storage_depth
                 
                 return MemoryLocation(stored_location.frame_index, frame_level, stored_location.size)
@@ -307,18 +324,29 @@ class PArIRGenerator:
         main_var_count = self._count_main_variables(main_statements)
         
         # Generate main frame allocation
-        self._emit(f"push {main_var_count}")
-        self._emit("oframe")
+        self._emit(Opcode.PUSH, main_var_count)
+        self._emit(Opcode.OFRAME)
         
         # Generate function skip jumps and definitions
         for func in functions:
-            jump_distance = self.function_sizes[func.name]
-            self._emit(f"push #PC+{jump_distance}")
-            self._emit("jmp")
+            body, body_comments, body_map = self._generate_function_body_buffer(func)
+            
+            # Function skip overhead = push #PC+X, jmp, .functionName (3 instructions)
+            jump_distance = 3 + len(body)
+            self.function_sizes[func.name] = jump_distance
+            if self.debug:
+                print(f"Function '{func.name}': body={len(body)}, jump=#PC+{jump_distance}")
             
-            # Generate function
-            self._emit(f".{func.name}")
-            self._generate_function_declaration(func)
+            self._emit(Opcode.PUSH_PC, jump_distance)
+            self._emit(Opcode.JMP)
+            self._location = SourceLocation(func.line, func.col, func.name)
+            self._emit(Opcode.LABEL, func.name)
+            self._location = None
+            body_start = self._get_current_address()
+            for address, comments in body_comments.items():
+                self.comments.setdefault(body_start + address, []).extend(comments)
+            self.instructions.extend(body)
+            self.source_map.extend(body_map)
         
         # Generate main program execution
         self._enter_scope(main_var_count)
@@ -341,8 +369,8 @@ class PArIRGenerator:
         for stmt in main_statements:
             self._generate_statement(stmt)
         
-        self._emit("cframe")
-        self._emit("halt")
+        self._emit(Opcode.CFRAME)
+        self._emit(Opcode.HALT)
         self._exit_scope()
     
     def _count_main_variables(self, statements: List[ASTNode]) -> int:
@@ -366,28 +394,36 @@ class PArIRGenerator:
         # this method is simplified to avoid complex variable lookup during compilation
         max_params = 0
         
-        def find_max_in_node(node):
-            nonlocal max_params
-            if isinstance(node, FunctionCall):
-                # Simple count - don't try to resolve array types during compilation
-                max_params = max(max_params, len(node.arguments))
-            elif hasattr(node, '__dict__'):
-                for child in node.__dict__.values():
-                    if isinstance(child, ASTNode):
-                        find_max_in_node(child)
-                    elif isinstance(child, list):
-                        for item in child:
-                            if isinstance(item, ASTNode):
-                                find_max_in_node(item)
-        
         for stmt in statements:
-            find_max_in_node(stmt)
+            # Arguments of a call are not searched for nested calls
+            for node in walk(stmt, descend=lambda node: not isinstance(node, FunctionCall)):
+                if isinstance(node, FunctionCall):
+                    # Simple count - don't try to resolve array types during compilation
+                    max_params = max(max_params, len(node.arguments))
         
         return max_params
     
+    def _generate_function_body_buffer(self, node: FunctionDeclaration) -> Tuple[
+            List[Instruction], Dict[int, List[str]], List[Optional[SourceLocation]]]:
+        """
+        Generate a function into a separate instruction buffer so its size is known
+        before the skip jump in front of it is emitted. Jump offsets inside the body
+        are relative, so the buffer can be appended anywhere unchanged.
+        Returns the body instructions, their comments (keyed by body address) and
+        their source map.
+        """
+        outer = self.instructions, self.comments, self.source_map
+        self.instructions, self.comments, self.source_map = [], {}, []
+        try:
+            self._generate_function_declaration(node)
+            return self.instructions, self.comments, self.source_map
+        finally:
+            self.instructions, self.comments, self.source_map = outer
+    
     def _generate_function_declaration(self, node: FunctionDeclaration):
         """Generate function declaration"""
         self.current_function = node.name
+        outer_location = self._set_location(node)
         
         # Calculate parameter space including arrays
         param_space = 0
@@ -407,8 +443,8 @@ class PArIRGenerator:
         if self.debug:
             print(f"Function {node.name}: param_space={param_space}, local_count={local_count}, allocation={allocation}")
         
-        self._emit(f"push {allocation}")
-        self._emit("alloc")
+        self._emit(Opcode.PUSH, allocation)
+        self._emit(Opcode.ALLOC)
         
         # Enter function scope
         self._enter_scope(allocation)
@@ -430,38 +466,32 @@ class PArIRGenerator:
         
         self._exit_scope()
         self.current_function = None
+        self._location = outer_location
         
     # ===== STATEMENT GENERATION =====
     
     def _generate_statement(self, node: ASTNode):
-        """Generate code for any statement"""
-        if isinstance(node, VariableDeclaration):
-            self._generate_var_decl(node)
-        elif isinstance(node, Assignment):
-            self._generate_assignment(node)
-        elif isinstance(node, IfStatement):
-            self._generate_if_stmt(node)
-        elif isinstance(node, WhileStatement):
-            self._generate_while_stmt(node)
-        elif isinstance(node, ForStatement):
-            self._generate_for_stmt(node)
-        elif isinstance(node, ReturnStatement):
-            self._generate_return_stmt(node)
-        elif isinstance(node, PrintStatement):
-            self._generate_print_stmt(node)
-        elif isinstance(node, DelayStatement):
-            self._generate_delay_stmt(node)
-        elif isinstance(node, WriteStatement):
-            self._generate_write_stmt(node)
-        elif isinstance(node, WriteBoxStatement):
-            self._generate_write_box_stmt(node)
-        elif isinstance(node, ClearStatement):
-            self._generate_clear_stmt(node)
-        elif isinstance(node, Block):
-            self._generate_block(node)
-        elif isinstance(node, FunctionCall):
-            self._generate_expression(node)
-            self._emit("drop")
+        """
+        Generate code for any statement. The _generate_* methods of statements
+        holding blocks are generators that yield each nested statement, so block
+        nesting is not limited by the Python call stack either
+        """
+        evaluate(self._statement_steps, node)
+    
+    def _statement_steps(self, node: ASTNode):
+        """Generate a simple statement right away, or return the steps of a compound one"""
+        outer_location = self._set_location(node)
+        generate = self.STATEMENT_GENERATORS.lookup(self, node.__class__)
+        steps = generate(self, node) if generate is not None else None
+        if steps is None:
+            self._location = outer_location
+            return None
+        return self._located_steps(steps, outer_location)
+    
+    def _generate_call_stmt(self, node: FunctionCall):
+        """Generate a call used as a statement (its result is dropped)"""
+        self._generate_expression(node)
+        self._emit(Opcode.DROP)
     
     def _generate_var_decl(self, node: VariableDeclaration):
         """Generate variable declaration with REVERSE array storage"""
@@ -478,10 +508,10 @@ class PArIRGenerator:
                 
                 lookup_location = self._lookup_variable(node.name)
                 if lookup_location:
-                    self._emit(f"push {len(node.initializer.elements)}")
-                    self._emit(f"push {lookup_location.frame_index}")
-                    self._emit(f"push {lookup_location.frame_level}")
-                    self._emit("sta")
+                    self._emit(Opcode.PUSH, len(node.initializer.elements))
+                    self._emit(Opcode.PUSH, lookup_location.frame_index)
+                    self._emit(Opcode.PUSH, lookup_location.frame_level)
+                    self._emit(Opcode.STA)
         else:
             # Regular variable unchanged
             location = self._allocate_variable(node.name)
@@ -489,9 +519,9 @@ class PArIRGenerator:
                 self._generate_expression(node.initializer)
                 lookup_location = self._lookup_variable(node.name)
                 if lookup_location:
-                    self._emit(f"push {lookup_location.frame_index}")
-                    self._emit(f"push {lookup_location.frame_level}")
-                    self._emit("st")
+                    self._emit(Opcode.PUSH, lookup_location.frame_index)
+                    self._emit(Opcode.PUSH, lookup_location.frame_level)
+                    self._emit(Opcode.ST)
 
 
     def _generate_assignment(self, node: Assignment):
@@ -503,46 +533,49 @@ class PArIRGenerator:
                 if location:
                     self._generate_expression(node.value)
                     self._generate_expression(node.target.index)
-                    self._emit(f"push {location.frame_index}")
-                    self._emit("add")
+                    self._emit(Opcode.PUSH, location.frame_index)
+                    self._emit(Opcode.ADD)
                     # Use systematic frame level from lookup
-                    self._emit(f"push {location.frame_level}")
-                    self._emit("st")
+                    self._emit(Opcode.PUSH, location.frame_level)
+                    self._emit(Opcode.ST)
         else:
             # Regular assignment
             if isinstance(node.target, Identifier):
                 location = self._lookup_variable(node.target.name)
                 if location:
                     self._generate_expression(node.value)
-                    self._emit(f"push {location.frame_index}")
+                    self._emit(Opcode.PUSH, location.frame_index)
                     
                     # SYSTEMATIC FIX: Always use the frame level from lookup
                     # This removes the hardcoded distinction between main and function contexts
-                    self._emit(f"push {location.frame_level}")
-                    self._emit("st")
+                    self._emit(Opcode.PUSH, location.frame_level)
+                    self._emit(Opcode.ST)
 
     def _generate_for_stmt(self, node: ForStatement):
         """Generate for loop with systematic jump calculations"""
-        # Create scope for loop variable
+        # Create scope for loop variable (and the body's locals when they are hoisted)
         var_count = 1 if node.init else 0
+        hoisted = self._can_hoist_loop_body(node.body)
+        if hoisted:
+            var_count += self._count_variable_declarations(node.body.statements)
         if var_count > 0:
-            self._emit(f"push {var_count}")
-            self._emit("oframe")
-        self._enter_scope(var_count)
+            self._emit(Opcode.PUSH, var_count)
+            self._emit(Opcode.OFRAME)
+        self._enter_scope(var_count, opens_frame=var_count > 0)
         
         # Generate initialization
         if node.init:
             location = self._allocate_variable(node.init.name)
             if node.init.initializer:
                 self._generate_expression(node.init.initializer)
-                self._emit(f"push {location.frame_index}")
+                self._emit(Opcode.PUSH, location.frame_index)
                 # SYSTEMATIC FIX: Use lookup for correct relative frame level
                 lookup_location = self._lookup_variable(node.init.name)
                 if lookup_location:
-                    self._emit(f"push {lookup_location.frame_level}")
+                    self._emit(Opcode.PUSH, lookup_location.frame_level)
                 else:
-                    self._emit("push 0")  # Fallback for current scope
-                self._emit("st")
+                    self._emit(Opcode.PUSH, 0)  # Fallback for current scope
+                self._emit(Opcode.ST)
         
         # Loop condition start
         condition_start = self._get_current_address()
@@ -555,10 +588,10 @@ class PArIRGenerator:
                 
                 op_map = {'<': 'lt', '>': 'gt', '<=': 'le', '>=': 'ge', '==': 'eq'}
                 if node.condition.operator == '!=':
-                    self._emit("eq")
-                    self._emit("not")
+                    self._emit(Opcode.EQ)
+                    self._emit(Opcode.NOT)
                 else:
-                    self._emit(op_map[node.condition.operator])
+                    self._emit(Opcode(op_map[node.condition.operator]))
             else:
                 self._generate_expression(node.condition)
         else:
@@ -566,17 +599,20 @@ class PArIRGenerator:
         
         # Conditional jump - SYSTEMATIC FIX: Corrected jump distance calculation
         true_branch_skip = 4  # skip: push #PC+4, cjmp, push #PC+X, jmp
-        self._emit(f"push #PC+{true_branch_skip}")
-        self._emit("cjmp")
+        self._emit(Opcode.PUSH_PC, true_branch_skip)
+        self._emit(Opcode.CJMP)
         
         # Jump to exit - will be patched
         exit_jump_addr = self._get_current_address()
-        self._emit("push #PC+999")  # Placeholder
-        self._emit("jmp")
+        self._emit(Opcode.PUSH_PC, 999)  # Placeholder
+        self._emit(Opcode.JMP)
         
         # Generate body
         body_start = self._get_current_address()
-        self._generate_block_with_frame(node.body)
+        if hoisted:
+            yield from self._generate_block_in_loop_frame(node.body)
+        else:
+            yield from self._generate_block_with_frame(node.body)
         
         # Generate update using systematic frame level semantics
         if node.update:
@@ -584,25 +620,25 @@ class PArIRGenerator:
                 location = self._lookup_variable(node.update.target.name)
                 if location:
                     self._generate_expression(node.update.value)
-                    self._emit(f"push {location.frame_index}")
+                    self._emit(Opcode.PUSH, location.frame_index)
                     # Use systematic frame level from lookup
-                    self._emit(f"push {location.frame_level}")
-                    self._emit("st")
+                    self._emit(Opcode.PUSH, location.frame_level)
+                    self._emit(Opcode.ST)
         
-        # Jump back to condition - SYSTEMATIC FIX: Corrected back jump calculation
+        # Jump back to condition (offset is relative to this push, like the while loop's)
         current_addr = self._get_current_address()
-        back_offset = condition_start - current_addr - 1
-        self._emit(f"push #PC{back_offset}")
-        self._emit("jmp")
+        back_offset = condition_start - current_addr
+        self._emit(Opcode.PUSH_PC, back_offset)
+        self._emit(Opcode.JMP)
         
         # Patch exit jump - SYSTEMATIC FIX: Corrected exit jump calculation
         end_addr = self._get_current_address()
         exit_offset = end_addr - exit_jump_addr
-        self.instructions[exit_jump_addr] = f"push #PC+{exit_offset}"
+        self._patch_jump(exit_jump_addr, exit_offset)
         
         # Close loop scope
         if var_count > 0:
-            self._emit("cframe")
+            self._emit(Opcode.CFRAME)
         self._exit_scope()
     
     def _generate_if_stmt(self, node: IfStatement):
@@ -611,36 +647,44 @@ class PArIRGenerator:
         
         # SYSTEMATIC: If true, skip over else jump setup (push + jmp = 2 instructions)
         true_branch_skip = 4  # skip: push #PC+4, cjmp, push #PC+X, jmp
-        self._emit(f"push #PC+{true_branch_skip}")
-        self._emit("cjmp")
+        self._emit(Opcode.PUSH_PC, true_branch_skip)
+        self._emit(Opcode.CJMP)
         
         else_jump_addr = self._get_current_address()
-        self._emit("push #PC+999")  # Placeholder for else jump
-        self._emit("jmp")
+        self._emit(Opcode.PUSH_PC, 999)  # Placeholder for else jump
+        self._emit(Opcode.JMP)
         
-        self._generate_block_with_frame(node.then_block)
+        yield from self._generate_block_with_frame(node.then_block)
         
         if node.else_block:
             end_jump_addr = self._get_current_address()
-            self._emit("push #PC+999")  # Placeholder for end jump
-            self._emit("jmp")
+            self._emit(Opcode.PUSH_PC, 999)  # Placeholder for end jump
+            self._emit(Opcode.JMP)
             
             else_start = self._get_current_address()
             else_offset = else_start - else_jump_addr
-            self.instructions[else_jump_addr] = f"push #PC+{else_offset}"
+            self._patch_jump(else_jump_addr, else_offset)
             
-            self._generate_block_with_frame(node.else_block)
+            yield from self._generate_block_with_frame(node.else_block)
             
             end_addr = self._get_current_address()
             end_offset = end_addr - end_jump_addr
-            self.instructions[end_jump_addr] = f"push #PC+{end_offset}"
+            self._patch_jump(end_jump_addr, end_offset)
         else:
             end_addr = self._get_current_address()
             else_offset = end_addr - else_jump_addr
-            self.instructions[else_jump_addr] = f"push #PC+{else_offset}"
+            self._patch_jump(else_jump_addr, else_offset)
     
     def _generate_while_stmt(self, node: WhileStatement):
         """Generate while statement with corrected jump calculations"""
+        # Hoisted body locals get one frame around the whole loop
+        hoisted = self._can_hoist_loop_body(node.body)
+        local_vars = self._count_variable_declarations(node.body.statements) if hoisted else 0
+        if local_vars > 0:
+            self._emit(Opcode.PUSH, local_vars)
+            self._emit(Opcode.OFRAME)
+        self._enter_scope(local_vars, opens_frame=local_vars > 0)
+        
         loop_start = self._get_current_address()
         
         # Generate condition - handle binary operations properly
@@ -651,74 +695,84 @@ class PArIRGenerator:
                 
                 op_map = {'>': 'gt', '<': 'lt', '>=': 'ge', '<=': 'le', '==': 'eq'}
                 if node.condition.operator == '!=':
-                    self._emit("eq")
-                    self._emit("not")
+                    self._emit(Opcode.EQ)
+                    self._emit(Opcode.NOT)
                 else:
-                    self._emit(op_map[node.condition.operator])
+                    self._emit(Opcode(op_map[node.condition.operator]))
             else:
                 self._generate_expression(node.condition)
         else:
             self._generate_expression(node.condition)
         
-        self._emit("push #PC+4")
-        self._emit("cjmp")
+        self._emit(Opcode.PUSH_PC, 4)
+        self._emit(Opcode.CJMP)
         
         exit_jump_addr = self._get_current_address()
-        self._emit("push #PC+999")  # Placeholder
-        self._emit("jmp")
+        self._emit(Opcode.PUSH_PC, 999)  # Placeholder
+        self._emit(Opcode.JMP)
         
         # Generate body
         body_start_addr = self._get_current_address()
-        self._generate_block_with_frame(node.body)
+        if hoisted:
+            yield from self._generate_block_in_loop_frame(node.body)
+        else:
+            yield from self._generate_block_with_frame(node.body)
         
         # Jump back to condition - CORRECTED CALCULATION
         current_addr = self._get_current_address()
         back_offset = loop_start - current_addr
-        self._emit(f"push #PC{back_offset}")
-        self._emit("jmp")
+        self._emit(Opcode.PUSH_PC, back_offset)
+        self._emit(Opcode.JMP)
         
         # Patch the exit jump - CORRECTED CALCULATION  
         end_addr = self._get_current_address()
         exit_offset = end_addr - exit_jump_addr
-        self.instructions[exit_jump_addr] = f"push #PC+{exit_offset}"
+        self._patch_jump(exit_jump_addr, exit_offset)
+        
+        if local_vars > 0:
+            self._emit(Opcode.CFRAME)
+        self._exit_scope()
     
     def _generate_block(self, node: Block):
         """Generate block statements"""
         for stmt in node.statements:
-            self._generate_statement(stmt)
+            yield stmt
     
     def _generate_block_with_frame(self, node: Block):
-        """Generate block with frame"""
+        """Generate block with frame (no frame for a declaration-free block when eliding empty frames)"""
         local_vars = self._count_variable_declarations(node.statements)
+        opens_frame = local_vars > 0 or not self.elide_empty_frames
         
-        self._emit(f"push {local_vars}")
-        self._emit("oframe")
+        if opens_frame:
+            self._emit(Opcode.PUSH, local_vars)
+            self._emit(Opcode.OFRAME)
         
-        self._enter_scope(local_vars)
+        self._enter_scope(local_vars, opens_frame)
         
         # Generate statements
         for stmt in node.statements:
-            self._generate_statement(stmt)
+            yield stmt
         
         self._exit_scope()
-        self._emit("cframe")
+        if opens_frame:
+            self._emit(Opcode.CFRAME)
     
     def _generate_return_stmt(self, node: ReturnStatement):
         """Generate return statement"""
         self._generate_expression(node.value)
-        self._emit("ret")
+        self._emit(Opcode.RET)
     
     # ===== BUILT-IN STATEMENTS =====
     
     def _generate_print_stmt(self, node: PrintStatement):
         """Generate print statement"""
         self._generate_expression(node.expression)
-        self._emit("print")
+        self._emit(Opcode.PRINT)
     
     def _generate_delay_stmt(self, node: DelayStatement):
         """Generate delay statement"""
         self._generate_expression(node.expression)
-        self._emit("delay")
+        self._emit(Opcode.DELAY)
     
     def _generate_write_stmt(self, node: WriteStatement):
         """Generate write statement with correct argument order"""
@@ -728,7 +782,7 @@ class PArIRGenerator:
         self._generate_expression(node.color)
         self._generate_expression(node.y)
         self._generate_expression(node.x)
-        self._emit("write")
+        self._emit(Opcode.WRITE)
     
     def _generate_write_box_stmt(self, node: WriteBoxStatement):
         """Generate write box statement - SYSTEMATIC FIX to match working pattern"""
@@ -740,58 +794,100 @@ class PArIRGenerator:
         self._generate_expression(node.height)  # Height
         self._generate_expression(node.y)       # Y coordinate
         self._generate_expression(node.x)       # X Coordinate  
-        self._emit("writebox")
+        self._emit(Opcode.WRITEBOX)
     
     def _generate_clear_stmt(self, node: ClearStatement):
         """Generate clear statement"""
         self._generate_expression(node.color)
-        self._emit("clear")
+        self._emit(Opcode.CLEAR)
     
     # ===== EXPRESSION GENERATION =====
     
     def _generate_expression(self, node: ASTNode):
-        """Generate code for expressions"""
-        if isinstance(node, Literal):
-            self._generate_literal(node)
-        elif isinstance(node, Identifier):
-            self._generate_identifier(node)
-        elif isinstance(node, BinaryOperation):
-            self._generate_binary_op(node)
-        elif isinstance(node, UnaryOperation):
-            self._generate_unary_op(node)
-        elif isinstance(node, CastExpression):
-            self._generate_cast(node)
-        elif isinstance(node, FunctionCall):
-            self._generate_function_call(node)
-        elif isinstance(node, ArrayLiteral):
-            self._generate_array_literal(node)
-        elif isinstance(node, IndexAccess):
-            self._generate_index_access(node)
-        elif isinstance(node, PadWidth):
-            self._emit("width")
-        elif isinstance(node, PadHeight):
-            self._emit("height")
-        elif isinstance(node, PadRandI):
-            self._generate_pad_randi(node)
-        elif isinstance(node, PadRead):
-            self._generate_pad_read(node)
-        
+        """
+        Generate code for expressions. The _generate_* methods of composite
+        expressions are generators that yield each sub-expression to generate,
+        so nesting depth is not limited by the Python call stack
+        """
+        evaluate(self._expression_steps, node)
+    
+    def _expression_steps(self, node: ASTNode):
+        """
+        Generate node: leaves are emitted right away (returns None), composite
+        expressions return a generator yielding their sub-expressions to evaluate()
+        """
+        outer_location = self._set_location(node)
+        generate = self.EXPRESSION_GENERATORS.lookup(self, node.__class__)
+        steps = generate(self, node) if generate is not None else None
+        if steps is None:
+            self._location = outer_location
+            return None
+        return self._located_steps(steps, outer_location)
+    
+    def _located_steps(self, steps, outer_location: Optional[SourceLocation]):
+        """Run a composite expression's steps, then restore the enclosing location"""
+        yield from steps
+        self._location = outer_location
+    
     def _generate_literal(self, node: Literal):
         """Generate literal values"""
         if node.literal_type == "colour":
-            self._emit(f"push {node.value}")
+            self._emit(Opcode.PUSH, node.value)
         elif node.literal_type == "bool":
-            self._emit(f"push {1 if node.value else 0}")
+            self._emit(Opcode.PUSH, 1 if node.value else 0)
         else:
-            self._emit(f"push {node.value}")
+            self._emit(Opcode.PUSH, node.value)
+    
+    def _can_hoist_loop_body(self, node: Block) -> bool:
+        """
+        A loop body's locals can share one frame across iterations when every
+        declaration initializes its variable (a fresh frame would otherwise
+        reset uninitialized ones to 0 on each iteration)
+        """
+        if not self.hoist_loop_frames:
+            return False
+        
+        def initialized(statements) -> bool:
+            for stmt in statements:
+                if isinstance(stmt, VariableDeclaration):
+                    if stmt.initializer is None:
+                        return False
+                    if isinstance(stmt.var_type, ArrayType) and (
+                            not isinstance(stmt.initializer, ArrayLiteral) or
+                            len(stmt.initializer.elements) != stmt.var_type.size):
+                        return False
+                elif isinstance(stmt, Block) and not initialized(stmt.statements):
+                    return False
+            return True
+        
+        return initialized(node.statements)
+    
+    def _generate_block_in_loop_frame(self, node: Block):
+        """Generate a hoisted loop body: its locals take the next free slots of the enclosing loop frame"""
+        base_index = self.next_var_indices[-1]
+        self._enter_scope(self._count_variable_declarations(node.statements), opens_frame=False)
+        self.next_var_indices[-1] = base_index
+        
+        for stmt in node.statements:
+            yield stmt
+        
+        self._exit_scope()
+    
+    def _generate_pad_width(self, node: PadWidth):
+        """Generate __width"""
+        self._emit(Opcode.WIDTH)
+    
+    def _generate_pad_height(self, node: PadHeight):
+        """Generate __height"""
+        self._emit(Opcode.HEIGHT)
     
     def _generate_identifier(self, node: Identifier):
         """Generate variable reference"""
         location = self._lookup_variable(node.name)
         if location:
-            self._emit(f"push [{location.frame_index}:{location.frame_level}]")
+            self._emit(Opcode.PUSH_VAR, location.frame_index, location.frame_level)
         else:
-            self._emit("push 0")
+            self._emit(Opcode.PUSH, 0)
     
     def _generate_binary_op(self, node: BinaryOperation):
         """Generate binary operations with systematic operand order"""
@@ -799,12 +895,12 @@ class PArIRGenerator:
         # For non-commutative operations, maintain semantic correctness
         if node.operator in ['-', '/', '%', '<', '>', '<=', '>=']:
             # Non-commutative operations - semantic order matters
-            self._generate_expression(node.right)  # B first (bottom of stack)
-            self._generate_expression(node.left)   # A second (top of stack)
+            yield node.right  # B first (bottom of stack)
+            yield node.left   # A second (top of stack)
         else:
             # Commutative operations - use left-to-right order systematically
-            self._generate_expression(node.right)
-            self._generate_expression(node.left)
+            yield node.right
+            yield node.left
         
         # Generate operation - SYSTEMATIC FIX: Added modulo support
         op_map = {
@@ -814,26 +910,26 @@ class PArIRGenerator:
         }
         
         if node.operator == '!=':
-            self._emit("eq")
-            self._emit("not")
+            self._emit(Opcode.EQ)
+            self._emit(Opcode.NOT)
         else:
-            self._emit(op_map.get(node.operator, 'nop'))
+            self._emit(Opcode(op_map.get(node.operator, 'nop')))
     
     def _generate_unary_op(self, node: UnaryOperation):
         """Generate unary operations"""
-        self._generate_expression(node.operand)
+        yield node.operand
         
         if node.operator == '-':
-            self._emit("push 0")
-            self._emit("sub")
+            self._emit(Opcode.PUSH, 0)
+            self._emit(Opcode.SUB)
         elif node.operator == 'not':
-            self._emit("not")
+            self._emit(Opcode.NOT)
     
     def _generate_cast(self, node: CastExpression):
         """Generate type cast"""
-        self._generate_expression(node.expression)
+        yield node.expression
     
-    def _generate_function_call(self, node: FunctionCall) -> Optional[str]:
+    def _generate_function_call(self, node: FunctionCall):
         """Generate function call - SYSTEMATIC FIX for array parameter order"""
         
         total_param_count = 0
@@ -848,34 +944,33 @@ class PArIRGenerator:
                     # This compensates for the fact that pusha + call reverses the array order
                     # Push elements from last to first so call stores them correctly
                     for i in range(array_size - 1, -1, -1):
-                        self._emit(f"push {i}")
-                        self._emit(f"push +[{location.frame_index}:{location.frame_level}]")
+                        self._emit(Opcode.PUSH, i)
+                        self._emit(Opcode.PUSH_INDEXED, location.frame_index, location.frame_level)
                     
                     total_param_count += array_size
                 else:
-                    self._generate_expression(arg)
+                    yield arg
                     total_param_count += 1
             else:
-                self._generate_expression(arg)
+                yield arg
                 total_param_count += 1
         
-        self._emit(f"push {total_param_count}")
-        self._emit(f"push .{node.name}")
-        self._emit("call")
-        return None
+        self._emit(Opcode.PUSH, total_param_count)
+        self._emit(Opcode.PUSH_LABEL, node.name)
+        self._emit(Opcode.CALL)
         
     def _generate_pad_randi(self, node: PadRandI):
         """Generate random integer"""
-        self._generate_expression(node.max_val)
-        self._emit("irnd")
+        yield node.max_val
+        self._emit(Opcode.IRND)
 
     def _generate_array_literal(self, node: ArrayLiteral):
         """Generate array literal in reverse order"""
         # Push elements in REVERSE order 
         for elem in reversed(node.elements):  # ← ADD reversed()
-            self._generate_expression(elem)
+            yield elem
         
-        self._emit(f"push {len(node.elements)}")
+        self._emit(Opcode.PUSH, len(node.elements))
 
     def _generate_index_access(self, node: IndexAccess):
         """Generate array element access"""
@@ -883,16 +978,16 @@ class PArIRGenerator:
             location = self._lookup_variable(node.base.name)
             if location:
                 # Generate index expression
-                self._generate_expression(node.index)
+                yield node.index
                 
                 # Use push +[i:l] instruction for array element access
-                self._emit(f"push +[{location.frame_index}:{location.frame_level}]")
+                self._emit(Opcode.PUSH_INDEXED, location.frame_index, location.frame_level)
     
     def _generate_pad_read(self, node: PadRead):
         """Generate read pixel operation"""
-        self._generate_expression(node.y)
-        self._generate_expression(node.x)
-        self._emit("read")
+        yield node.y
+        yield node.x
+        self._emit(Opcode.READ)
             
     # ===== UTILITY METHODS =====
     
@@ -900,39 +995,16 @@ class PArIRGenerator:
         """Count variable declarations including array space - SYSTEMATIC SCOPE BOUNDARY RESPECT"""
         count = 0
         
-        def count_in_node(node):
-            nonlocal count
-            if isinstance(node, VariableDeclaration):
-                if isinstance(node.var_type, ArrayType):
-                    count += node.var_type.size if node.var_type.size else 1
-                else:
-                    count += 1
-            elif isinstance(node, Block):
-                # SYSTEMATIC: Blocks at this level are part of current scope
-                for stmt in node.statements:
-                    count_in_node(stmt)
-            elif isinstance(node, (ForStatement, IfStatement, WhileStatement)):
-                # SYSTEMATIC: These create their own scopes - don't traverse into them
-                # They will handle their own variable allocations with oframe/cframe
-                pass
-            elif hasattr(node, '__dict__'):
-                # SYSTEMATIC: Only traverse non-scope-creating nodes
-                for attr_name, child in node.__dict__.items():
-                    # Skip attributes that represent scope-creating sub-structures
-                    if attr_name in ['body', 'then_block', 'else_block']:
-                        # These represent nested scopes - don't count their variables
-                        continue
-                    
-                    if isinstance(child, ASTNode):
-                        count_in_node(child)
-                    elif isinstance(child, list):
-                        for item in child:
-                            if isinstance(item, ASTNode):
-                                count_in_node(item)
-        
-        # Count only direct statements, respecting scope boundaries
+        # Count only direct statements, respecting scope boundaries: plain blocks
+        # are part of the current scope, while for/if/while bodies and functions
+        # handle their own variable allocations with oframe/cframe
         for stmt in statements:
-            count_in_node(stmt)
+            for node in walk(stmt, descend=lambda node: isinstance(node, Block)):
+                if isinstance(node, VariableDeclaration):
+                    if isinstance(node.var_type, ArrayType):
+                        count += node.var_type.size if node.var_type.size else 1
+                    else:
+                        count += 1
         
         if self.debug:
             print(f"  Variable count (respecting scope boundaries): {count}")
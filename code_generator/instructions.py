@@ -0,0 +1,284 @@
+"""
+PArIR Instruction Model
+Structured instruction objects used internally by the code generator:
+an opcode plus operand fields, rendered to PArIR text only at the end.
+Also provides a text parser and a compact binary encoding.
+"""
+
+import re
+import struct
+from enum import Enum
+from typing import Iterable, List, Optional, Union
+
+
+class Opcode(Enum):
+    """PArIR opcodes; the value is the mnemonic used when rendering"""
+    # Push forms (operands distinguish them in the text syntax)
+    PUSH = "push"                  # push <literal>
+    PUSH_PC = "push #PC"           # push #PC+n / #PC-n   (relative address)
+    PUSH_LABEL = "push ."          # push .name           (function address)
+    PUSH_VAR = "push []"           # push [index:level]
+    PUSH_INDEXED = "push +[]"      # push +[index:level]  (index popped from stack)
+    PUSH_ARRAY = "pusha"           # pusha [index:level]  (whole array)
+    LABEL = "."                    # .name                (occupies an address, executes as a no-op)
+
+    # Arithmetic and logic
+    ADD = "add"
+    SUB = "sub"
+    MUL = "mul"
+    DIV = "div"
+    MOD = "mod"
+    INC = "inc"
+    DEC = "dec"
+    MAX = "max"
+    MIN = "min"
+    IRND = "irnd"
+    LT = "lt"
+    LE = "le"
+    GT = "gt"
+    GE = "ge"
+    EQ = "eq"
+    AND = "and"
+    OR = "or"
+    NOT = "not"
+
+    # Control flow and frames
+    JMP = "jmp"
+    CJMP = "cjmp"
+    CALL = "call"
+    RET = "ret"
+    HALT = "halt"
+    ALLOC = "alloc"
+    OFRAME = "oframe"
+    CFRAME = "cframe"
+
+    # Memory and stack
+    ST = "st"
+    STA = "sta"
+    DUP = "dup"
+    DROP = "drop"
+    SWAP = "swap"
+    NOP = "nop"
+
+    # Built-ins
+    PRINT = "print"
+    PRINTA = "printa"
+    DELAY = "delay"
+    WRITE = "write"
+    WRITEBOX = "writebox"
+    CLEAR = "clear"
+    READ = "read"
+    WIDTH = "width"
+    HEIGHT = "height"
+
+
+# Opcodes that take operands (everything else is a bare mnemonic)
+OPERAND_OPCODES = {Opcode.PUSH, Opcode.PUSH_PC, Opcode.PUSH_LABEL, Opcode.PUSH_VAR,
+                   Opcode.PUSH_INDEXED, Opcode.PUSH_ARRAY, Opcode.LABEL}
+
+MNEMONICS = {opcode.value: opcode for opcode in Opcode if opcode not in OPERAND_OPCODES}
+
+
+class Instruction:
+    """
+    One PArIR instruction.
+    operand: literal value (PUSH), relative offset (PUSH_PC), label name (PUSH_LABEL, LABEL)
+             or frame index (PUSH_VAR, PUSH_INDEXED, PUSH_ARRAY)
+    level:   frame level for PUSH_VAR / PUSH_INDEXED / PUSH_ARRAY
+    """
+    __slots__ = ("opcode", "operand", "level")
+
+    def __init__(self, opcode: Opcode, operand=None, level: Optional[int] = None):
+        self.opcode = opcode
+        self.operand = operand
+        self.level = level
+
+    def render(self) -> str:
+        """PArIR text for this instruction"""
+        opcode = self.opcode
+        if opcode is Opcode.PUSH:
+            return f"push {self.operand}"
+        if opcode is Opcode.PUSH_PC:
+            return f"push #PC+{self.operand}" if self.operand >= 0 else f"push #PC{self.operand}"
+        if opcode is Opcode.PUSH_VAR:
+            return f"push [{self.operand}:{self.level}]"
+        if opcode is Opcode.PUSH_INDEXED:
+            return f"push +[{self.operand}:{self.level}]"
+        if opcode is Opcode.PUSH_ARRAY:
+            return f"pusha [{self.operand}:{self.level}]"
+        if opcode is Opcode.PUSH_LABEL:
+            return f"push .{self.operand}"
+        if opcode is Opcode.LABEL:
+            return f".{self.operand}"
+        return opcode.value
+
+    def __eq__(self, other):
+        return (isinstance(other, Instruction) and self.opcode is other.opcode and
+                self.operand == other.operand and self.level == other.level)
+
+    def __repr__(self):
+        return f"Instruction({self.render()!r})"
+
+    @classmethod
+    def parse(cls, text: str) -> "Instruction":
+        """Parse one line of PArIR text (inverse of render)"""
+        text = text.strip()
+        if text.startswith("."):
+            return cls(Opcode.LABEL, text[1:])
+        if text in MNEMONICS:
+            return cls(MNEMONICS[text])
+
+        match = _OPERAND_FORM.match(text)
+        if match is None:
+            raise ValueError(f"Invalid PArIR instruction: '{text}'")
+        mnemonic, pc, label, indexed, index, level, literal = match.groups()
+        if pc is not None:
+            return cls(Opcode.PUSH_PC, int(pc))
+        if label is not None:
+            return cls(Opcode.PUSH_LABEL, label)
+        if index is not None:
+            if mnemonic == "pusha":
+                opcode = Opcode.PUSH_ARRAY
+            else:
+                opcode = Opcode.PUSH_INDEXED if indexed else Opcode.PUSH_VAR
+            return cls(opcode, int(index), int(level))
+        if mnemonic == "push" and literal is not None:
+            return cls(Opcode.PUSH, _parse_literal(literal))
+        raise ValueError(f"Invalid PArIR instruction: '{text}'")
+
+
+_OPERAND_FORM = re.compile(
+    r"(push|pusha)\s+(?:"
+    r"#PC([+-]\d+)"                           # relative address
+    r"|\.(\w+)"                                # label
+    r"|(\+)?\[(-?\d+):(-?\d+)\]"               # [index:level] / +[index:level]
+    r"|(\S+))$"                                # literal
+)
+
+
+def _parse_literal(text: str) -> Union[int, float, str]:
+    """Literal operand as the generator would have held it (colours stay text)"""
+    if re.fullmatch(r"-?\d+", text):
+        return int(text)
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def render_program(instructions: Iterable[Instruction]) -> List[str]:
+    """Render an instruction stream to PArIR text lines"""
+    return [instruction.render() for instruction in instructions]
+
+
+def parse_program(lines: Iterable[str]) -> List[Instruction]:
+    """Parse PArIR text lines, skipping blank lines and // comments"""
+    program = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("//"):
+            program.append(Instruction.parse(line))
+    return program
+
+
+# ===== BINARY FORMAT =====
+# Header: b"PIR1" + uint32 instruction count; per instruction one opcode byte, then
+#   PUSH:          tag byte (0 int32, 1 float64, 2 text, 3 int64) + value
+#   PUSH_PC:       int32 offset
+#   PUSH_VAR/...:  int32 index, int32 level
+#   LABEL/PUSH_LABEL: text
+# Text is a uint16 byte length followed by UTF-8 bytes.
+
+BINARY_MAGIC = b"PIR1"
+OPCODE_CODES = {opcode: code for code, opcode in enumerate(Opcode)}
+OPCODES_BY_CODE = list(Opcode)
+
+_LITERAL_INT, _LITERAL_FLOAT, _LITERAL_TEXT, _LITERAL_INT64 = 0, 1, 2, 3
+
+
+def _encode_text(out: bytearray, text: str):
+    data = text.encode("utf-8")
+    out += struct.pack("<H", len(data))
+    out += data
+
+
+def encode_program(instructions: Iterable[Instruction]) -> bytes:
+    """Serialize instructions to the compact binary format"""
+    instructions = list(instructions)
+    out = bytearray(BINARY_MAGIC)
+    out += struct.pack("<I", len(instructions))
+    for instruction in instructions:
+        opcode = instruction.opcode
+        out.append(OPCODE_CODES[opcode])
+        if opcode is Opcode.PUSH:
+            value = instruction.operand
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, int) and -2**31 <= value < 2**31:
+                out.append(_LITERAL_INT)
+                out += struct.pack("<i", value)
+            elif isinstance(value, int) and -2**63 <= value < 2**63:
+                out.append(_LITERAL_INT64)
+                out += struct.pack("<q", value)
+            elif isinstance(value, float):
+                out.append(_LITERAL_FLOAT)
+                out += struct.pack("<d", value)
+            else:
+                out.append(_LITERAL_TEXT)
+                _encode_text(out, str(value))
+        elif opcode is Opcode.PUSH_PC:
+            out += struct.pack("<i", instruction.operand)
+        elif opcode in (Opcode.PUSH_VAR, Opcode.PUSH_INDEXED, Opcode.PUSH_ARRAY):
+            out += struct.pack("<ii", instruction.operand, instruction.level)
+        elif opcode in (Opcode.LABEL, Opcode.PUSH_LABEL):
+            _encode_text(out, instruction.operand)
+    return bytes(out)
+
+
+def decode_program(data: bytes) -> List[Instruction]:
+    """Deserialize the binary format produced by encode_program"""
+    if data[:4] != BINARY_MAGIC:
+        raise ValueError("Not a binary PArIR program (bad magic)")
+    (count,) = struct.unpack_from("<I", data, 4)
+    pos = 8
+    program = []
+
+    def read_text():
+        nonlocal pos
+        (length,) = struct.unpack_from("<H", data, pos)
+        pos += 2
+        text = data[pos:pos + length].decode("utf-8")
+        pos += length
+        return text
+
+    for _ in range(count):
+        opcode = OPCODES_BY_CODE[data[pos]]
+        pos += 1
+        if opcode is Opcode.PUSH:
+            tag = data[pos]
+            pos += 1
+            if tag == _LITERAL_INT:
+                (value,) = struct.unpack_from("<i", data, pos)
+                pos += 4
+            elif tag == _LITERAL_INT64:
+                (value,) = struct.unpack_from("<q", data, pos)
+                pos += 8
+            elif tag == _LITERAL_FLOAT:
+                (value,) = struct.unpack_from("<d", data, pos)
+                pos += 8
+            else:
+                value = read_text()
+            program.append(Instruction(opcode, value))
+        elif opcode is Opcode.PUSH_PC:
+            (offset,) = struct.unpack_from("<i", data, pos)
+            pos += 4
+            program.append(Instruction(opcode, offset))
+        elif opcode in (Opcode.PUSH_VAR, Opcode.PUSH_INDEXED, Opcode.PUSH_ARRAY):
+            index, level = struct.unpack_from("<ii", data, pos)
+            pos += 8
+            program.append(Instruction(opcode, index, level))
+        elif opcode in (Opcode.LABEL, Opcode.PUSH_LABEL):
+            program.append(Instruction(opcode, read_text()))
+        else:
+            program.append(Instruction(opcode))
+    return program
@@ -0,0 +1,261 @@
+"""
+PArIR Peephole Optimizer (-O1)
+Rewrites short windows of generated instructions into cheaper equivalents.
+
+Jumps are handled on absolute targets: every 'push #PC+n' (and the literal
+address pushed for the entry jump) is resolved to the instruction it points at
+before rewriting, and turned back into offsets afterwards, so removing or
+inserting instructions re-targets every jump. A window is only rewritten when
+no jump lands inside it; labels (call targets) are never removed.
+
+Rewrites (repeated until nothing changes):
+- push c; push T; cjmp           -> push T; jmp  (c true)  /  nothing (c false)
+- <cmp>; push T; cjmp; push U; jmp, T just past the jmp
+                                 -> <inverted cmp>; push U; cjmp  (not is dropped)
+- push T; jmp, T the next instruction          -> nothing
+- push T; jmp|cjmp, T a 'push U; jmp'          -> push U; jmp|cjmp
+- instructions after jmp/ret/halt that nothing jumps to -> removed
+- push 1; x; add  /  x; push 1; add            -> x; inc
+- push 1; x; sub                               -> x; dec    (x a single push)
+- push c; push 0; sub                          -> push -c   (unary minus of a literal)
+- push 0; oframe; cframe                       -> nothing   (empty block)
+- push 0; alloc                                -> nothing   (function without locals)
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .instructions import Instruction, Opcode
+
+MAX_PASSES = 16
+
+# not(a < b) == (a >= b) etc.; the operands are always ordered numbers
+INVERTED_COMPARISONS = {Opcode.LT: Opcode.GE, Opcode.GE: Opcode.LT,
+                        Opcode.GT: Opcode.LE, Opcode.LE: Opcode.GT}
+
+# Single instructions that only push a value (no side effects, no stack inputs)
+PURE_PUSHES = {Opcode.PUSH, Opcode.PUSH_VAR, Opcode.WIDTH, Opcode.HEIGHT}
+
+UNCONDITIONAL = {Opcode.JMP, Opcode.RET, Opcode.HALT}
+
+
+class _Node:
+    """Instruction with its jump target resolved to an index (target is None for non-addresses)"""
+    __slots__ = ("opcode", "operand", "level", "target", "location", "comments")
+
+    def __init__(self, opcode: Opcode, operand=None, level=None, target: Optional[int] = None,
+                 location=None, comments: Optional[List[str]] = None):
+        self.opcode = opcode
+        self.operand = operand
+        self.level = level
+        self.target = target
+        self.location = location
+        self.comments = comments
+
+    def copy(self, **changes) -> "_Node":
+        node = _Node(self.opcode, self.operand, self.level, self.target, self.location)
+        for name, value in changes.items():
+            setattr(node, name, value)
+        return node
+
+
+def _is_jump_push(node: _Node) -> bool:
+    return node.target is not None
+
+
+def _literal(node: _Node):
+    """Operand of a plain numeric 'push <literal>' (None otherwise)"""
+    if node.opcode is Opcode.PUSH and node.target is None and type(node.operand) in (int, float):
+        return node.operand
+    return None
+
+
+class PeepholeOptimizer:
+    """Runs the peephole rewrites over a generated instruction stream"""
+
+    def __init__(self, instructions: Sequence[Instruction], source_map: Sequence = None,
+                 comments: Dict[int, List[str]] = None):
+        self.nodes = self._resolve(instructions, source_map or (), comments or {})
+        self.trailing_comments = (comments or {}).get(len(instructions))
+
+    @staticmethod
+    def _resolve(instructions, source_map, comments) -> List[_Node]:
+        nodes = []
+        for address, instruction in enumerate(instructions):
+            target = None
+            if instruction.opcode is Opcode.PUSH_PC:
+                target = address + instruction.operand
+            elif (instruction.opcode is Opcode.PUSH and isinstance(instruction.operand, int) and
+                  address + 1 < len(instructions) and
+                  instructions[address + 1].opcode in (Opcode.JMP, Opcode.CJMP)):
+                target = instruction.operand  # absolute address (the entry jump over 'halt')
+            location = source_map[address] if address < len(source_map) else None
+            nodes.append(_Node(instruction.opcode, instruction.operand, instruction.level, target,
+                               location, list(comments[address]) if address in comments else None))
+        return nodes
+
+    def run(self) -> Tuple[List[Instruction], List, Dict[int, List[str]]]:
+        """Optimized instructions, their source map and their comments"""
+        for _ in range(MAX_PASSES):
+            if not self._pass():
+                break
+        return self._render()
+
+    # ===== REWRITING =====
+
+    def _pass(self) -> bool:
+        nodes = self.nodes
+        self.targets = {node.target for node in nodes if node.target is not None}
+        output: List[_Node] = []
+        remap = [0] * (len(nodes) + 1)
+        pending_comments: List[str] = []
+        changed = False
+
+        i = 0
+        while i < len(nodes):
+            consumed, replacement = 1, None
+            for rule in self.RULES:
+                result = rule(self, i)
+                if result is not None and not any(i + k in self.targets for k in range(1, result[0])):
+                    consumed, replacement = result
+                    break
+            if replacement is None:
+                replacement = [nodes[i]]
+            else:
+                # Rules return fresh nodes; comments of the window move to the first one that is kept
+                changed = True
+                for k in range(consumed):
+                    pending_comments.extend(nodes[i + k].comments or ())
+            for k in range(consumed):
+                remap[i + k] = len(output)
+            if replacement and pending_comments:
+                replacement[0].comments = pending_comments + (replacement[0].comments or [])
+                pending_comments = []
+            output.extend(replacement)
+            i += consumed
+
+        remap[len(nodes)] = len(output)
+        for node in output:
+            if node.target is not None:
+                node.target = remap[node.target] if 0 <= node.target <= len(nodes) else node.target
+        if pending_comments:
+            self.trailing_comments = pending_comments + (self.trailing_comments or [])
+        self.nodes = output
+        return changed
+
+    def _window(self, i: int, *opcodes: Opcode) -> Optional[List[_Node]]:
+        """Nodes i.. if their opcodes match (None when the window does not fit)"""
+        window = self.nodes[i:i + len(opcodes)]
+        if len(window) < len(opcodes) or any(node.opcode is not opcode for node, opcode in zip(window, opcodes)):
+            return None
+        return window
+
+    def _constant_branch(self, i: int):
+        window = self._window(i, Opcode.PUSH, Opcode.PUSH, Opcode.CJMP)
+        if window is None or _literal(window[0]) is None or not _is_jump_push(window[1]):
+            window = self._window(i, Opcode.PUSH, Opcode.PUSH_PC, Opcode.CJMP)
+            if window is None or _literal(window[0]) is None:
+                return None
+        if window[0].operand:
+            return 3, [window[1].copy(), window[2].copy(opcode=Opcode.JMP)]
+        return 3, []
+
+    def _inverted_branch(self, i: int):
+        condition = self.nodes[i]
+        if condition.opcode is not Opcode.NOT and condition.opcode not in INVERTED_COMPARISONS:
+            return None
+        window = self.nodes[i:i + 5]
+        if (len(window) < 5 or not _is_jump_push(window[1]) or window[2].opcode is not Opcode.CJMP or
+                not _is_jump_push(window[3]) or window[4].opcode is not Opcode.JMP or window[1].target != i + 5):
+            return None
+        replacement = [window[3].copy(), window[2].copy()]
+        if condition.opcode is not Opcode.NOT:
+            replacement.insert(0, condition.copy(opcode=INVERTED_COMPARISONS[condition.opcode]))
+        return 5, replacement
+
+    def _jump_to_next(self, i: int):
+        window = self.nodes[i:i + 2]
+        if len(window) == 2 and _is_jump_push(window[0]) and window[1].opcode is Opcode.JMP and \
+                window[0].target == i + 2:
+            return 2, []
+        return None
+
+    def _thread_jump(self, i: int):
+        window = self.nodes[i:i + 2]
+        if len(window) < 2 or not _is_jump_push(window[0]) or window[1].opcode not in (Opcode.JMP, Opcode.CJMP):
+            return None
+        target = window[0].target
+        hop = self.nodes[target:target + 2]
+        if (len(hop) == 2 and _is_jump_push(hop[0]) and hop[1].opcode is Opcode.JMP and
+                hop[0].target not in (target, window[0].target)):
+            return 2, [window[0].copy(target=hop[0].target), window[1].copy()]
+        return None
+
+    def _unreachable(self, i: int):
+        nodes = self.nodes
+        if i == 0 or nodes[i - 1].opcode not in UNCONDITIONAL:
+            return None
+        end = i
+        while end < len(nodes) and end not in self.targets and nodes[end].opcode is not Opcode.LABEL:
+            end += 1
+        if end == i:
+            return None
+        return end - i, []
+
+    def _increment(self, i: int):
+        window = self.nodes[i:i + 3]
+        if len(window) < 3 or window[2].opcode not in (Opcode.ADD, Opcode.SUB):
+            return None
+        first, second, operation = window
+        one_first = _literal(first) == 1 and type(first.operand) is int
+        if one_first and second.opcode in PURE_PUSHES and not _is_jump_push(second):
+            step = Opcode.INC if operation.opcode is Opcode.ADD else Opcode.DEC
+            return 3, [second.copy(), operation.copy(opcode=step)]
+        one_second = _literal(second) == 1 and type(second.operand) is int
+        if (one_second and operation.opcode is Opcode.ADD and first.opcode in PURE_PUSHES and
+                not _is_jump_push(first)):
+            return 3, [first.copy(), operation.copy(opcode=Opcode.INC)]
+        return None
+
+    def _negated_literal(self, i: int):
+        window = self._window(i, Opcode.PUSH, Opcode.PUSH, Opcode.SUB)
+        if window is None or _literal(window[0]) is None or window[1].operand != 0 or \
+                _literal(window[1]) is None:
+            return None
+        return 3, [window[0].copy(operand=-window[0].operand)]
+
+    def _empty_frame(self, i: int):
+        window = self._window(i, Opcode.PUSH, Opcode.OFRAME, Opcode.CFRAME)
+        if window is None or window[0].operand != 0 or _literal(window[0]) is None:
+            return None
+        return 3, []
+
+    def _empty_alloc(self, i: int):
+        window = self._window(i, Opcode.PUSH, Opcode.ALLOC)
+        if window is None or window[0].operand != 0 or _literal(window[0]) is None:
+            return None
+        return 2, []
+
+    RULES = (_constant_branch, _inverted_branch, _jump_to_next, _thread_jump, _unreachable,
+             _increment, _negated_literal, _empty_frame, _empty_alloc)
+
+    # ===== OUTPUT =====
+
+    def _render(self) -> Tuple[List[Instruction], List, Dict[int, List[str]]]:
+        instructions, source_map, comments = [], [], {}
+        for address, node in enumerate(self.nodes):
+            operand = node.operand
+            if node.target is not None:
+                operand = node.target - address if node.opcode is Opcode.PUSH_PC else node.target
+            instructions.append(Instruction(node.opcode, operand, node.level))
+            source_map.append(node.location)
+            if node.comments:
+                comments[address] = node.comments
+        if self.trailing_comments:
+            comments[len(instructions)] = self.trailing_comments
+        return instructions, source_map, comments
+
+
+def peephole(instructions: Sequence[Instruction], source_map: Sequence = None,
+             comments: Dict[int, List[str]] = None) -> Tuple[List[Instruction], List, Dict[int, List[str]]]:
+    """Run the -O1 peephole rewrites; returns new instructions, source map and comments"""
+    return PeepholeOptimizer(instructions, source_map, comments).run()
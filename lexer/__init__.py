@@ -1 +1 @@
-from .lexer import FSALexer, Token, TokenType
\ No newline at end of file
+from .lexer import FSALexer, LineIndex, Token, TokenBuffer, TokenType
\ No newline at end of file
@@ -1,5 +1,9 @@
 from enum import Enum, auto
 from collections import defaultdict
+from array import array
+from bisect import bisect_right
+import codecs
+import re
 import sys
 
 class TokenType(Enum):
@@ -81,26 +85,162 @@ class TokenType(Enum):
     ERROR_NESTED_COMMENT = auto()
     ERROR_STRAY_COMMENT_CLOSE = auto()
 
+class LineIndex:
+    """
+    Line-start offsets of a source text, built once per tokenize() call.
+    Resolves a character offset to a 1-based (line, col) pair with bisect.
+    """
+
+    def __init__(self, text):
+        starts = [0]
+        find = text.find
+        newline = find('\n')
+        while newline != -1:
+            starts.append(newline + 1)
+            newline = find('\n', newline + 1)
+        self.line_starts = starts
+
+    def position(self, offset):
+        """Return (line, col) for a character offset"""
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
 class Token:
-    def __init__(self, token_type, lexeme, line=0, col=0):
+    __slots__ = ("type", "lexeme", "_line", "_col", "offset", "_line_index")
+
+    def __init__(self, token_type, lexeme, line=0, col=0, offset=None, line_index=None):
         self.type = token_type
         self.lexeme = sys.intern(lexeme)
-        self.line = line
-        self.col = col
+        # line/col of None are resolved lazily from offset via line_index on first access
+        self._line = line
+        self._col = col
+        self.offset = offset
+        self._line_index = line_index
+
+    def _resolve_position(self):
+        self._line, self._col = self._line_index.position(self.offset)
+
+    @property
+    def line(self):
+        if self._line is None:
+            self._resolve_position()
+        return self._line
+
+    @line.setter
+    def line(self, value):
+        self._line = value
+
+    @property
+    def col(self):
+        if self._col is None:
+            self._resolve_position()
+        return self._col
+
+    @col.setter
+    def col(self, value):
+        self._col = value
 
     def __repr__(self):
         return f"Token({self.type.name}, '{self.lexeme}', line={self.line}, col={self.col})"
 
+# Token type <-> one-byte code used by TokenBuffer
+TOKEN_TYPES = list(TokenType)
+TOKEN_TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+class TokenBuffer:
+    """
+    Columnar (struct-of-arrays) token storage for large inputs.
+    Per token: a one-byte type code, a 32-bit offset and a 32-bit length;
+    lexemes are sliced from the source only when a Token is materialized.
+    Supports len(), indexing (returns a Token with a lazy position) and iteration.
+    """
+
+    def __init__(self, source, line_index=None):
+        self.source = source
+        self.line_index = line_index if line_index is not None else LineIndex(source)
+        self.types = array('B')
+        self.offsets = array('I')
+        self.lengths = array('I')
+        self._last_index = None
+        self._last_token = None
+
+    def append(self, token_type, offset, length):
+        self.types.append(TOKEN_TYPE_CODES[token_type])
+        self.offsets.append(offset)
+        self.lengths.append(length)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        # The parser asks for the same position several times in a row; reuse that Token
+        if index == self._last_index:
+            return self._last_token
+        offset = self.offsets[index]
+        token = Token(TOKEN_TYPES[self.types[index]], self.source[offset:offset + self.lengths[index]],
+                      None, None, offset, self.line_index)
+        self._last_index = index
+        self._last_token = token
+        return token
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self[index]
+
+    def type_at(self, index):
+        """Token type at index without materializing a Token"""
+        return TOKEN_TYPES[self.types[index]]
+
+    def lexeme_at(self, index):
+        offset = self.offsets[index]
+        return self.source[offset:offset + self.lengths[index]]
+
+    def without_trivia(self):
+        """Return a buffer without whitespace/comment tokens (self if it has none)"""
+        trivia = {TOKEN_TYPE_CODES[t] for t in (TokenType.WHITESPACE, TokenType.NEWLINE,
+                                                 TokenType.LINECOMMENT, TokenType.BLOCKCOMMENT)}
+        keep = [i for i, code in enumerate(self.types) if code not in trivia]
+        if len(keep) == len(self.types):
+            return self
+        filtered = TokenBuffer(self.source, self.line_index)
+        filtered.types = array('B', [self.types[i] for i in keep])
+        filtered.offsets = array('I', [self.offsets[i] for i in keep])
+        filtered.lengths = array('I', [self.lengths[i] for i in keep])
+        return filtered
+
+    def memory_size(self):
+        """Bytes used by the columnar arrays (the source text is shared, not counted)"""
+        return sum(column.itemsize * len(column) for column in (self.types, self.offsets, self.lengths))
+
 class FSALexer:
     """
     Table-driven FSA-based lexer for PArL language (Task 1)
     Implements the micro-syntax as specified in the assignment EBNF
+
+    Engines (selected with the ``engine`` constructor argument):
+      "fsa"   - reference engine driven directly by the ``Tx`` dictionaries
+      "dense" - ``Tx`` frozen into a flat state x category array plus a
+                256-entry character class table (non-ASCII falls back to
+                ``_categorize_char``); produces identical tokens
+      "regex" - one pre-compiled alternation for well-formed ASCII tokens;
+                any span it cannot decide (error tokens, nested comments,
+                non-ASCII neighbours) is re-scanned by the reference FSA
     """
+
+    ENGINES = ("fsa", "dense", "regex")
+    DEFAULT_CHUNK_SIZE = 64 * 1024
     
-    def __init__(self):
+    def __init__(self, engine: str = "fsa"):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown lexer engine '{engine}'. Valid engines are: {', '.join(self.ENGINES)}")
+        self.engine = engine
         self._init_char_categories()
         self._init_transition_table()
         self._init_keywords_and_builtins()
+        if engine == "dense":
+            self._compile_dense_tables()
+        elif engine == "regex":
+            self._compile_regex_scanner()
         self.debug = False
 
     def _init_char_categories(self):
@@ -404,17 +544,106 @@ class FSALexer:
             "__clear": TokenType.BUILTIN_CLEAR,
         }
 
+    def _compile_dense_tables(self):
+        """Freeze the transition table into flat arrays for the dense engine"""
+        num_categories = len(self.categories)
+        num_states = 1 + max(
+            max(self.Tx),
+            max(self.accepting_states),
+            max(next_state for row in self.Tx.values() for next_state in row.values()),
+        )
+
+        # Row-major state x category matrix, -1 marks the error transition
+        dense_tx = array('h', [-1]) * (num_states * num_categories)
+        for state, row in self.Tx.items():
+            for cat_idx, next_state in row.items():
+                dense_tx[state * num_categories + cat_idx] = next_state
+
+        self.dense_tx = dense_tx
+        self.dense_num_categories = num_categories
+        # Category index for every Latin-1 code point; wider characters use _categorize_char
+        self.char_class_table = bytes(
+            self.cat_map[self._categorize_char(chr(code))] for code in range(256)
+        )
+        self.dense_accepting = [self.accepting_states.get(state) for state in range(num_states)]
+
+    def _compile_regex_scanner(self):
+        """
+        Build the fast-path scanner for the regex engine.
+        Each alternative only matches a lexeme the DFA would accept with the same
+        maximal munch; anything that could lead to an ERROR_* token is left to the FSA.
+        """
+        def ascii_class(*categories):
+            """Character class of the ASCII characters in the given categories, as ranges"""
+            codes = [code for code in range(128) if self._categorize_char(chr(code)) in categories]
+            ranges = []
+            for code in codes:
+                if ranges and ranges[-1][1] == code - 1:
+                    ranges[-1][1] = code
+                else:
+                    ranges.append([code, code])
+            escape = lambda code: chr(code) if chr(code).isalnum() else f"\\x{code:02x}"
+            parts = [escape(lo) if lo == hi else f"{escape(lo)}-{escape(hi)}" for lo, hi in ranges]
+            return "[" + "".join(parts) + "]"
+
+        letter = ascii_class("letter", "hexletter")
+        ident_tail = ascii_class("letter", "hexletter", "digit", "underscore")
+        digit = ascii_class("digit")
+        hex_digit = ascii_class("hexletter", "digit")
+        whitespace = ascii_class("whitespace")
+
+        alternatives = [
+            (f"{digit}+\\.{digit}+", TokenType.FLOAT_LITERAL),
+            (f"{digit}+(?![.0-9])", TokenType.INT_LITERAL),
+            (f"{letter}{ident_tail}*", TokenType.IDENTIFIER),
+            (f"__{letter}{ident_tail}*", TokenType.IDENTIFIER),
+            (f"#{hex_digit}{{6}}", TokenType.COLOUR_LITERAL),
+            (f"{whitespace}+", TokenType.WHITESPACE),
+            (r"\n", TokenType.NEWLINE),
+            (r"//[^\n]*", TokenType.LINECOMMENT),
+            (r"/\*", None),  # Block comment opener, closed by _tokenize_regex
+            (r"/", TokenType.SLASH),
+            (r"\*(?!/)", TokenType.MULTIPLY),
+            (r"->", TokenType.ARROW),
+            (r"-", TokenType.MINUS),
+            (r"==", TokenType.EQUAL_EQUAL),
+            (r"=", TokenType.EQUAL),
+            (r"!=", TokenType.NOT_EQUAL),
+            (r"<=", TokenType.LESS_EQUAL),
+            (r"<", TokenType.LESS),
+            (r">=", TokenType.GREATER_EQUAL),
+            (r">", TokenType.GREATER),
+            (r"\+", TokenType.PLUS),
+            (r"\(", TokenType.LPAREN),
+            (r"\)", TokenType.RPAREN),
+            (r"\{", TokenType.LBRACE),
+            (r"\}", TokenType.RBRACE),
+            (r"\[", TokenType.LBRACKET),
+            (r"\]", TokenType.RBRACKET),
+            (r":", TokenType.COLON),
+            (r",", TokenType.COMMA),
+            (r";", TokenType.SEMICOLON),
+            (r"%", TokenType.MODULO),
+        ]
+
+        self.regex_scanner = re.compile("|".join(f"({pattern})" for pattern, _ in alternatives))
+        # Indexed by match.lastindex (group 0 is the whole match)
+        self.regex_group_types = [None] + [token_type for _, token_type in alternatives]
+        self.reserved_words = {**self.builtins, **self.keywords}
+
     def tokenize(self, text):
+        if self.engine == "dense":
+            return self._tokenize_dense(text)
+        if self.engine == "regex":
+            return self._tokenize_regex(text)
+
         tokens = []
         pos = 0
-        line = 1
-        col = 1
         text_len = len(text)
+        line_index = LineIndex(text)
 
         while pos < text_len:
             start_pos = pos
-            start_line = line
-            start_col = col
 
             state = 0
             last_state = 0
@@ -448,29 +677,316 @@ class FSALexer:
                 if (token_type not in [TokenType.WHITESPACE, TokenType.NEWLINE, 
                       TokenType.LINECOMMENT, TokenType.BLOCKCOMMENT] 
     or self.debug):
-                    tokens.append(Token(token_type, lexeme, start_line, start_col))
-
-                for i in range(start_pos, last_accepting_pos):
-                    if text[i] == '\n':
-                        line += 1
-                        col = 1
-                    else:
-                        col += 1
+                    tokens.append(Token(token_type, lexeme, None, None, start_pos, line_index))
             else:
                 error_char = text[start_pos] if start_pos < text_len else ""
                 error_type = self._determine_error_type(text, start_pos, last_state)
-                tokens.append(Token(error_type, error_char, start_line, start_col))
+                tokens.append(Token(error_type, error_char, None, None, start_pos, line_index))
+                pos = start_pos + 1
+
+        tokens.append(Token(TokenType.END, "", None, None, text_len, line_index))
+        return tokens
+
+    def iter_tokens(self, stream, chunk_size=None):
+        """
+        Lazily tokenize a text/binary file object or mmap, reading bounded chunks.
+        DFA state is carried across chunk boundaries, so only the lexeme currently
+        being scanned is kept alongside the current chunk (peak memory is
+        O(chunk_size + longest token)). Yields the same tokens as tokenize().
+        Binary input is decoded incrementally as UTF-8.
+        """
+        chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        if not hasattr(self, "dense_tx"):
+            self._compile_dense_tables()
+        dense_tx = self.dense_tx
+        num_categories = self.dense_num_categories
+        char_class_table = self.char_class_table
+        accepting = self.dense_accepting
+        cat_map = self.cat_map
+        categorize = self._categorize_char
+        skipped = (TokenType.WHITESPACE, TokenType.NEWLINE,
+                   TokenType.LINECOMMENT, TokenType.BLOCKCOMMENT)
+
+        decoder = None
+        eof = False
+        buffer = ""
+        line = 1
+        col = 1
+
+        # Scanner state for the token starting at buffer[start]
+        start = 0
+        pos = 0
+        state = 0
+        last_state = 0
+        last_accepting_state = -1
+        last_accepting_pos = 0
+
+        while True:
+            buffer_len = len(buffer)
+            while pos < buffer_len:
+                code = ord(buffer[pos])
+                if code < 256:
+                    char_cat_index = char_class_table[code]
+                else:
+                    char_cat_index = cat_map[categorize(buffer[pos])]
+
+                next_state = dense_tx[state * num_categories + char_cat_index]
+                if next_state == -1:
+                    break
+
+                state = last_state = next_state
+                pos += 1
+
+                if accepting[state] is not None:
+                    last_accepting_state = state
+                    last_accepting_pos = pos
+
+            if pos == buffer_len and not eof:
+                # Ran out of input mid-scan: keep the DFA state and read the next chunk
+                chunk = stream.read(chunk_size)
+                if isinstance(chunk, (bytes, bytearray)):
+                    if decoder is None:
+                        decoder = codecs.getincrementaldecoder("utf-8")()
+                    # A chunk may end inside a multi-byte character
+                    raw = chunk
+                    chunk = decoder.decode(raw, final=not raw)
+                    while raw and not chunk:
+                        raw = stream.read(chunk_size)
+                        chunk = decoder.decode(raw, final=not raw)
+                if chunk:
+                    buffer = buffer[start:] + chunk
+                    pos -= start
+                    last_accepting_pos -= start
+                    start = 0
+                else:
+                    eof = True
+                continue
+
+            if start == buffer_len:
+                break
+
+            if last_accepting_state != -1:
+                end = last_accepting_pos
+                lexeme = buffer[start:end]
+                token_type = self._refine_token_type(accepting[last_accepting_state], lexeme)
+                if self.debug or token_type not in skipped:
+                    yield Token(token_type, lexeme, line, col)
+            else:
+                end = start + 1
+                lexeme = buffer[start]
+                yield Token(self._determine_error_type(buffer, start, last_state), lexeme, line, col)
+
+            newlines = lexeme.count('\n')
+            if newlines:
+                line += newlines
+                col = len(lexeme) - lexeme.rfind('\n')
+            else:
+                col += len(lexeme)
+
+            start = pos = end
+            state = 0
+            last_state = 0
+            last_accepting_state = -1
+            last_accepting_pos = end
+
+        yield Token(TokenType.END, "", line, col)
+
+    def tokenize_buffer(self, text):
+        """
+        Tokenize into a columnar TokenBuffer instead of a list of Token objects.
+        Scans with the dense tables (compiled on first use) whatever the engine;
+        the buffer holds the same tokens as tokenize().
+        """
+        if not hasattr(self, "dense_tx"):
+            self._compile_dense_tables()
+        dense_tx = self.dense_tx
+        num_categories = self.dense_num_categories
+        char_class_table = self.char_class_table
+        accepting = self.dense_accepting
+        cat_map = self.cat_map
+        categorize = self._categorize_char
+        skipped = (TokenType.WHITESPACE, TokenType.NEWLINE,
+                   TokenType.LINECOMMENT, TokenType.BLOCKCOMMENT)
+        keep_trivia = self.debug
+
+        buffer = TokenBuffer(text)
+        append = buffer.append
+        pos = 0
+        text_len = len(text)
+
+        while pos < text_len:
+            start_pos = pos
+
+            state = 0
+            last_state = 0
+            last_accepting_state = -1
+            last_accepting_pos = pos
+
+            while pos < text_len:
+                code = ord(text[pos])
+                if code < 256:
+                    char_cat_index = char_class_table[code]
+                else:
+                    char_cat_index = cat_map[categorize(text[pos])]
+
+                next_state = dense_tx[state * num_categories + char_cat_index]
+                if next_state == -1:
+                    break
+
+                state = last_state = next_state
+                pos += 1
+
+                if accepting[state] is not None:
+                    last_accepting_state = state
+                    last_accepting_pos = pos
+
+            if last_accepting_state != -1:
+                pos = last_accepting_pos
+                token_type = self._refine_token_type(accepting[last_accepting_state],
+                                                     text[start_pos:last_accepting_pos])
+                if keep_trivia or token_type not in skipped:
+                    append(token_type, start_pos, last_accepting_pos - start_pos)
+            else:
+                append(self._determine_error_type(text, start_pos, last_state), start_pos, 1)
                 pos = start_pos + 1
-                if error_char == '\n':
-                    line += 1
-                    col = 1
+
+        append(TokenType.END, text_len, 0)
+        return buffer
+
+    def _tokenize_dense(self, text):
+        """Maximal-munch scan over the frozen dense tables (same output as the FSA engine)"""
+        dense_tx = self.dense_tx
+        num_categories = self.dense_num_categories
+        char_class_table = self.char_class_table
+        accepting = self.dense_accepting
+        cat_map = self.cat_map
+        categorize = self._categorize_char
+        skipped = (TokenType.WHITESPACE, TokenType.NEWLINE,
+                   TokenType.LINECOMMENT, TokenType.BLOCKCOMMENT)
+        keep_trivia = self.debug
+
+        tokens = []
+        pos = 0
+        text_len = len(text)
+        line_index = LineIndex(text)
+
+        while pos < text_len:
+            start_pos = pos
+
+            state = 0
+            last_state = 0
+            last_accepting_state = -1
+            last_accepting_pos = pos
+
+            while pos < text_len:
+                code = ord(text[pos])
+                if code < 256:
+                    char_cat_index = char_class_table[code]
                 else:
-                    col += 1
+                    char_cat_index = cat_map[categorize(text[pos])]
+
+                next_state = dense_tx[state * num_categories + char_cat_index]
+                if next_state == -1:
+                    break
+
+                state = last_state = next_state
+                pos += 1
+
+                if accepting[state] is not None:
+                    last_accepting_state = state
+                    last_accepting_pos = pos
 
-        tokens.append(Token(TokenType.END, "", line, col))
+            if last_accepting_state != -1:
+                lexeme = text[start_pos:last_accepting_pos]
+                pos = last_accepting_pos
+                token_type = self._refine_token_type(accepting[last_accepting_state], lexeme)
+
+                if keep_trivia or token_type not in skipped:
+                    tokens.append(Token(token_type, lexeme, None, None, start_pos, line_index))
+            else:
+                error_char = text[start_pos]
+                error_type = self._determine_error_type(text, start_pos, last_state)
+                tokens.append(Token(error_type, error_char, None, None, start_pos, line_index))
+                pos = start_pos + 1
+
+        tokens.append(Token(TokenType.END, "", None, None, text_len, line_index))
         return tokens
 
 
+    def _tokenize_regex(self, text):
+        """Regex fast path with per-token fallback to the reference FSA"""
+        scanner = self.regex_scanner.match
+        group_types = self.regex_group_types
+        reserved_words = self.reserved_words
+        IDENTIFIER = TokenType.IDENTIFIER
+        BLOCKCOMMENT = TokenType.BLOCKCOMMENT
+        skipped = (TokenType.WHITESPACE, TokenType.NEWLINE, TokenType.LINECOMMENT, BLOCKCOMMENT)
+        keep_trivia = self.debug
+
+        tokens = []
+        pos = 0
+        text_len = len(text)
+        line_index = LineIndex(text)
+
+        while pos < text_len:
+            match = scanner(text, pos)
+            token_type = None
+
+            if match is not None:
+                end = match.end()
+                token_type = group_types[match.lastindex]
+                if token_type is None:
+                    # '/*': accept only when the first '*/' closes it without a nested '/*'
+                    close = text.find('*/', pos + 2)
+                    if close != -1 and text.find('/*', pos + 2, close + 1) == -1:
+                        token_type = BLOCKCOMMENT
+                        end = close + 2
+                elif end < text_len and text[end] >= '\x80':
+                    # A non-ASCII neighbour might extend the lexeme in the DFA
+                    token_type = None
+
+            if token_type is None:
+                token_type, end = self._scan_token(text, pos)
+            elif token_type is IDENTIFIER:
+                token_type = reserved_words.get(text[pos:end], IDENTIFIER)
+
+            if keep_trivia or token_type not in skipped:
+                tokens.append(Token(token_type, text[pos:end], None, None, pos, line_index))
+            pos = end
+
+        tokens.append(Token(TokenType.END, "", None, None, text_len, line_index))
+        return tokens
+
+    def _scan_token(self, text, start_pos):
+        """
+        Scan exactly one token at start_pos with the reference FSA.
+        Returns (token_type, end_pos); error tokens always span a single character.
+        """
+        text_len = len(text)
+        pos = start_pos
+        state = 0
+        last_state = 0
+        last_accepting_state = -1
+        last_accepting_pos = pos
+
+        while pos < text_len:
+            next_state = self.Tx[state][self.cat_map[self._categorize_char(text[pos])]]
+            if next_state == -1:
+                break
+            last_state = next_state
+            state = next_state
+            pos += 1
+            if state in self.accepting_states:
+                last_accepting_state = state
+                last_accepting_pos = pos
+
+        if last_accepting_state != -1:
+            lexeme = text[start_pos:last_accepting_pos]
+            token_type = self._refine_token_type(self.accepting_states[last_accepting_state], lexeme)
+            return token_type, last_accepting_pos
+
+        return self._determine_error_type(text, start_pos, last_state), start_pos + 1
+
     def _determine_error_type(self, text, error_pos, state):
         # Handle new error states
         if state == 30:
@@ -0,0 +1,11 @@
+"""
+PArL AST Optimizer Module
+Optimizations over the checked AST, run before code generation
+"""
+
+from .constant_folder import ConstantFolder, fold_constants
+
+__all__ = [
+    'ConstantFolder',
+    'fold_constants'
+]
@@ -0,0 +1,369 @@
+"""
+PArL Constant Folder
+AST-level optimization run between semantic analysis and code generation:
+- constant BinaryOperation / UnaryOperation / CastExpression trees become a
+  single Literal (result types from TypeChecker)
+- scalar 'let' variables with a constant initializer that are never assigned
+  are replaced by their value wherever they are read in the same function
+- 'if' statements with a constant condition keep only the arm that runs
+
+Folded values are the ones the PArIR VM would compute: casts emit no code, so
+'(2 * 8) as float' folds to the int 16 typed as float, integer division
+truncates towards zero, and anything that would fail at run time (division by
+zero) is left for the VM to report.
+"""
+
+from typing import Dict, List, Optional
+
+from parser.ast_nodes import *
+from parser.ast_walker import ASTWalker, evaluate, walk
+from semantic_analyzer.semantic_analyzer import TypeChecker
+
+# Expression children of each node type (IndexAccess.base is the array, never folded)
+EXPRESSION_FIELDS = {
+    BinaryOperation: ("left", "right"),
+    UnaryOperation: ("operand",),
+    CastExpression: ("expression",),
+    FunctionCall: ("arguments",),
+    IndexAccess: ("index",),
+    ArrayLiteral: ("elements",),
+    PadRead: ("x", "y"),
+    PadRandI: ("max_val",),
+    ReturnStatement: ("value",),
+    PrintStatement: ("expression",),
+    DelayStatement: ("expression",),
+    WriteStatement: ("x", "y", "color"),
+    WriteBoxStatement: ("x", "y", "width", "height", "color"),
+    ClearStatement: ("color",),
+}
+
+MAX_COLOUR = 0xFFFFFF
+
+
+class _Binding:
+    """One declared variable (or parameter) as resolved by scope"""
+    __slots__ = ("function", "assigned", "value")
+
+    def __init__(self, function: Optional[str], assigned: bool = False):
+        self.function = function  # None for the main program
+        self.assigned = assigned
+        self.value: Optional[Literal] = None  # set once the initializer folds to a constant
+
+
+def _divide(a, b):
+    """PArIR 'div': integer division truncates towards zero"""
+    if isinstance(a, int) and isinstance(b, int):
+        quotient = abs(a) // abs(b)
+        return quotient if (a < 0) == (b < 0) else -quotient
+    return a / b
+
+
+def _modulo(a, b):
+    """PArIR 'mod': remainder of the truncating division"""
+    return a - b * _divide(a, b) if isinstance(a, int) and isinstance(b, int) else a % b
+
+
+BINARY_OPERATIONS = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': _divide,
+    '%': _modulo,
+    '<': lambda a, b: int(a < b),
+    '>': lambda a, b: int(a > b),
+    '<=': lambda a, b: int(a <= b),
+    '>=': lambda a, b: int(a >= b),
+    '==': lambda a, b: int(a == b),
+    '!=': lambda a, b: int(a != b),
+    'and': lambda a, b: int(bool(a and b)),
+    'or': lambda a, b: int(bool(a or b)),
+}
+
+
+def runtime_value(node: Literal):
+    """The number the generated 'push' leaves on the VM stack for a literal"""
+    if isinstance(node.value, bool):
+        return int(node.value)
+    if isinstance(node.value, str):
+        return int(node.value[1:], 16)
+    return node.value
+
+
+def make_literal(value, literal_type: str, line: int = 0, col: int = 0) -> Optional[Literal]:
+    """Literal whose generated code pushes value (None if no literal of that type can)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if literal_type == "bool":
+        return Literal(bool(value), "bool", line, col) if type(value) is int and value in (0, 1) else None
+    if literal_type == "colour":
+        if type(value) is int and 0 <= value <= MAX_COLOUR:
+            return Literal(f"#{value:06x}", "colour", line, col)
+        return None
+    if literal_type in ("int", "float"):
+        return Literal(value, literal_type, line, col)
+    return None
+
+
+def _declares_variables(statements: List[ASTNode]) -> bool:
+    """True if statements declare a variable in their own scope (directly or in plain nested blocks)"""
+    return any(isinstance(node, VariableDeclaration)
+               for stmt in statements
+               for node in walk(stmt, descend=lambda node: isinstance(node, Block)))
+
+
+class ConstantFolder(ASTWalker):
+    """
+    Folds constants in a semantically valid Program in place. A first pass
+    resolves every identifier to its declaration (with the analyzer's scoping
+    rules) and records which variables are ever assigned; the second pass
+    folds, propagates and prunes. Expressions are folded bottom-up by the
+    ASTWalker enter/exit hooks and statements are driven by work stacks or
+    evaluate(), so neither kind of nesting is limited by recursion.
+    """
+
+    # Literal replacing a node once its sub-expressions are folded (the handler returns None to keep it)
+    FOLDERS = Dispatcher({
+        Identifier: "_propagate",
+        BinaryOperation: "_fold_binary",
+        UnaryOperation: "_fold_unary",
+        CastExpression: "_fold_cast",
+    })
+
+    def __init__(self):
+        self.references: Dict[Identifier, _Binding] = {}
+        self.declarations: Dict[VariableDeclaration, _Binding] = {}
+        self.scopes: List[Dict[str, _Binding]] = []
+        self.function: Optional[str] = None
+        self.folded = 0      # operations and casts replaced by a literal
+        self.propagated = 0  # variable reads replaced by a literal
+        self.pruned = 0      # if statements with a constant condition
+
+    def optimize(self, ast: Program) -> Program:
+        """Main entry point: fold the program (modified in place) and return it"""
+        self.scopes = [{}]
+        self.function = None
+        self._resolve_statements(ast.statements)
+        evaluate(self._fold_statement, ast)
+        return ast
+
+    # ===== NAME RESOLUTION =====
+
+    def _declare(self, name: str, assigned: bool = False) -> _Binding:
+        binding = _Binding(self.function, assigned)
+        self.scopes[-1][name] = binding
+        return binding
+
+    def _lookup(self, name: str) -> Optional[_Binding]:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def _exit_scope(self):
+        self.scopes.pop()
+
+    def _exit_function(self):
+        self.scopes.pop()
+        self.function = None
+
+    def _resolve_statements(self, statements: List[ASTNode]):
+        """
+        Record the declaration each identifier refers to, mirroring SemanticAnalyzer's
+        scopes. Nested statements and the scope exits after them are kept on a work
+        stack, so statement nesting is not limited by recursion either.
+        """
+        work: List = list(reversed(statements))
+        while work:
+            item = work.pop()
+            if callable(item):
+                item()
+            elif item is not None:
+                self._resolve(item, work)
+
+    def _resolve(self, node: ASTNode, work: List):
+        """Resolve node's own identifiers; nested statements (and scope exits) go on work, last first"""
+        if isinstance(node, FunctionDeclaration):
+            self.function = node.name
+            self.scopes.append({})
+            for param in node.params:
+                self._declare(param.name, assigned=True)
+            work.append(self._exit_function)
+            work.append(node.body)
+        elif isinstance(node, VariableDeclaration):
+            self._resolve_expression(node.initializer)
+            self.declarations[node] = self._declare(node.name, assigned=isinstance(node.var_type, ArrayType))
+        elif isinstance(node, Assignment):
+            if isinstance(node.target, Identifier):
+                binding = self._lookup(node.target.name)
+                if binding is not None:
+                    binding.assigned = True
+            else:
+                self._resolve_expression(node.target)
+            self._resolve_expression(node.value)
+        elif isinstance(node, Block):
+            self.scopes.append({})
+            work.append(self._exit_scope)
+            work.extend(reversed(node.statements))
+        elif isinstance(node, IfStatement):
+            self._resolve_expression(node.condition)
+            work.extend((node.else_block, node.then_block))
+        elif isinstance(node, WhileStatement):
+            self._resolve_expression(node.condition)
+            work.append(node.body)
+        elif isinstance(node, ForStatement):
+            self.scopes.append({})
+            if node.init is not None:
+                self._resolve(node.init, work)  # a declaration or assignment: nothing nested
+            self._resolve_expression(node.condition)
+            work.extend((self._exit_scope, node.body, node.update))
+        else:
+            # Expressions and the statements holding them declare nothing
+            self._resolve_expression(node)
+
+    def _resolve_expression(self, node: Optional[ASTNode]):
+        for child in walk(node):
+            if isinstance(child, Identifier):
+                binding = self._lookup(child.name)
+                if binding is not None:
+                    self.references[child] = binding
+
+    # ===== FOLDING =====
+
+    def _fold_statement(self, node: ASTNode):
+        """
+        Statements that replace node (several when a pruned if is spliced into its
+        parent). Run by evaluate(): nested statements and blocks are yielded and
+        their replacements sent back, so statement nesting needs no recursion.
+        """
+        if isinstance(node, FunctionDeclaration):
+            self.function = node.name
+            yield node.body
+            self.function = None
+        elif isinstance(node, VariableDeclaration):
+            if node.initializer is not None:
+                node.initializer = self._fold_expression(node.initializer)
+            binding = self.declarations.get(node)
+            if binding is not None and not binding.assigned and isinstance(node.initializer, Literal):
+                binding.value = node.initializer
+        elif isinstance(node, Assignment):
+            if isinstance(node.target, IndexAccess):
+                self._fold_expression(node.target)
+            node.value = self._fold_expression(node.value)
+        elif isinstance(node, (Program, Block)):
+            folded = []
+            for stmt in node.statements:
+                folded.extend((yield stmt))
+            node.statements = folded
+        elif isinstance(node, IfStatement):
+            return (yield from self._fold_if(node))
+        elif isinstance(node, WhileStatement):
+            node.condition = self._fold_expression(node.condition)
+            yield node.body
+        elif isinstance(node, ForStatement):
+            if node.init is not None:
+                yield node.init
+            node.condition = self._fold_expression(node.condition)
+            if node.update is not None:
+                yield node.update
+            yield node.body
+        else:
+            self._fold_expression(node)
+        return [node]
+
+    def _fold_if(self, node: IfStatement):
+        """
+        Keep only the arm a constant condition selects. An arm without
+        declarations is spliced into the enclosing statements; one that declares
+        variables stays behind 'if (true)' so it keeps its own frame and scope.
+        """
+        node.condition = self._fold_expression(node.condition)
+        yield node.then_block
+        if node.else_block:
+            yield node.else_block
+        if not isinstance(node.condition, Literal):
+            return [node]
+
+        self.pruned += 1
+        arm = node.then_block if runtime_value(node.condition) else node.else_block
+        if arm is None:
+            return []
+        if not _declares_variables(arm.statements):
+            return arm.statements
+        return [IfStatement(Literal(True, "bool", node.condition.line, node.condition.col), arm, None,
+                            node.line, node.col)]
+
+    def _fold_expression(self, node: ASTNode) -> ASTNode:
+        """Fold node's sub-expressions, then node itself; returns its replacement"""
+        return self.walk(node)
+
+    def enter(self, node: ASTNode) -> List[ASTNode]:
+        """Sub-expressions to fold before node"""
+        children = []
+        for name in EXPRESSION_FIELDS.get(type(node), ()):
+            child = getattr(node, name)
+            if isinstance(child, list):
+                children.extend(child)
+            elif child is not None:
+                children.append(child)
+        return children
+
+    def exit(self, node: ASTNode, values: List[ASTNode]) -> ASTNode:
+        """Store the folded sub-expressions in node, then fold node itself"""
+        folded = iter(values)
+        for name in EXPRESSION_FIELDS.get(type(node), ()):
+            child = getattr(node, name)
+            if isinstance(child, list):
+                setattr(node, name, [next(folded) for _ in child])
+            elif child is not None:
+                setattr(node, name, next(folded))
+
+        fold = self.FOLDERS.lookup(self, node.__class__)
+        replacement = fold(self, node) if fold is not None else None
+        return node if replacement is None else replacement
+
+    def _propagate(self, node: Identifier) -> Optional[Literal]:
+        binding = self.references.get(node)
+        if binding is None or binding.value is None or binding.function != self.function:
+            return None
+        self.propagated += 1
+        return Literal(binding.value.value, binding.value.literal_type, node.line, node.col)
+
+    def _fold_binary(self, node: BinaryOperation) -> Optional[Literal]:
+        left, right = node.left, node.right
+        if not isinstance(left, Literal) or not isinstance(right, Literal) or node.operator not in BINARY_OPERATIONS:
+            return None
+        result_type = TypeChecker.get_binary_operation_result_type(left.literal_type, node.operator,
+                                                                   right.literal_type)
+        a, b = runtime_value(left), runtime_value(right)
+        if result_type is None or (node.operator in ('/', '%') and b == 0):
+            return None
+        return self._folded(make_literal(BINARY_OPERATIONS[node.operator](a, b), result_type, node.line, node.col))
+
+    def _fold_unary(self, node: UnaryOperation) -> Optional[Literal]:
+        operand = node.operand
+        if not isinstance(operand, Literal):
+            return None
+        result_type = TypeChecker.get_unary_operation_result_type(node.operator, operand.literal_type)
+        if result_type is None:
+            return None
+        value = runtime_value(operand)
+        # '-x' is generated as 'push 0; sub' (0 - x), 'not' as 'not'
+        value = 0 - value if node.operator == '-' else int(not value)
+        return self._folded(make_literal(value, result_type, node.line, node.col))
+
+    def _fold_cast(self, node: CastExpression) -> Optional[Literal]:
+        operand = node.expression
+        if not isinstance(operand, Literal) or not TypeChecker.can_cast(operand.literal_type, node.target_type):
+            return None
+        # A cast generates no code: the value is unchanged, only its static type is
+        return self._folded(make_literal(runtime_value(operand), node.target_type, node.line, node.col))
+
+    def _folded(self, literal: Optional[Literal]) -> Optional[Literal]:
+        if literal is not None:
+            self.folded += 1
+        return literal
+
+
+def fold_constants(ast: Program) -> Program:
+    """Run constant folding, propagation and if pruning over a semantically valid program"""
+    return ConstantFolder().optimize(ast)
@@ -0,0 +1,28 @@
+"""
+PArL Compiler Driver (parlc)
+Batch compilation of .parl files to PArIR over a process pool
+
+Usage: python -m parlc [-j N] [-o DIR] file.parl ...
+"""
+
+from .driver import (
+    CompileOptions,
+    CompileResult,
+    compile_source,
+    compile_file,
+    compile_files,
+    main
+)
+from .cache import CacheStats, CompilationCache, compiler_fingerprint
+
+__all__ = [
+    'CompileOptions',
+    'CompileResult',
+    'compile_source',
+    'compile_file',
+    'compile_files',
+    'main',
+    'CacheStats',
+    'CompilationCache',
+    'compiler_fingerprint'
+]
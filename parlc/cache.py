@@ -0,0 +1,164 @@
+"""
+Content-addressed compilation cache
+Maps sha256(compiler fingerprint + options + source) to the PArIR instruction
+list, stored as one JSON file per entry. Safe for concurrent workers: entries
+are written to a temporary file and moved into place with os.replace.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+COMPILER_VERSION = "1.0.0"
+
+# Packages whose source determines the generated PArIR
+COMPILER_PACKAGES = ("lexer", "parser", "semantic_analyzer", "optimizer", "code_generator")
+
+
+@lru_cache(maxsize=None)
+def compiler_fingerprint() -> str:
+    """
+    COMPILER_VERSION plus a hash of the compiler's own source files, so editing
+    the compiler invalidates the cache even without a version bump
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256(COMPILER_VERSION.encode("utf-8"))
+    for package in COMPILER_PACKAGES:
+        package_dir = os.path.join(root, package)
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                digest.update(name.encode("utf-8"))
+                with open(os.path.join(package_dir, name), "rb") as f:
+                    digest.update(f.read())
+    return f"{COMPILER_VERSION}+{digest.hexdigest()[:16]}"
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for one CompilationCache instance"""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    failed_writes: int = 0  # entries that could not be stored (unusable cache directory, disk full, ...)
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CompilationCache:
+    """
+    On-disk cache of generated PArIR with size-bounded LRU eviction.
+    Recency is the entry file's mtime, refreshed on every hit.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+    def key(self, source: str, options_fingerprint: str = "") -> str:
+        """Content address for a source text compiled with the given options"""
+        digest = hashlib.sha256()
+        for part in (compiler_fingerprint(), options_fingerprint, source):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return the cached instructions for key, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            instructions = entry["instructions"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing, evicted by another process, or unreadable: treat as a miss
+            self.stats.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # mark as most recently used
+        except OSError:
+            pass
+        self.stats.hits += 1
+        return instructions
+
+    def put(self, key: str, instructions: List[str]):
+        """
+        Store instructions under key (atomic: readers never see a partial entry).
+        Never raises: an entry that cannot be written is counted in stats.failed_writes
+        """
+        path = self._entry_path(key)
+        entry_dir = os.path.dirname(path)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=entry_dir, prefix=".tmp-", suffix=".json")
+        except OSError:
+            self.stats.failed_writes += 1
+            return
+
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"compiler": compiler_fingerprint(), "instructions": instructions}, f)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            self.stats.failed_writes += 1
+            return
+        self.stats.writes += 1
+
+    def entries(self):
+        """(mtime, size, path) for every entry currently on disk"""
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for bucket in os.listdir(self.directory):
+            bucket_dir = os.path.join(self.directory, bucket)
+            if not os.path.isdir(bucket_dir):
+                continue
+            for name in os.listdir(bucket_dir):
+                if name.startswith(".tmp-") or not name.endswith(".json"):
+                    continue
+                path = os.path.join(bucket_dir, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                found.append((info.st_mtime, info.st_size, path))
+        return found
+
+    def size(self) -> int:
+        """Total bytes of all entries"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits max_bytes; returns entries removed"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self.stats.evictions += removed
+        return removed
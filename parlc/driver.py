@@ -0,0 +1,296 @@
+"""
+PArL Compiler Driver
+Runs the full pipeline (lexer -> parser -> semantic analyzer -> [optimizer ->] code generator)
+over many .parl files, fanning them out over a process pool
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from lexer.lexer import FSALexer
+from parser.parser import PArLParser
+from semantic_analyzer.semantic_analyzer import SemanticAnalyzer
+from optimizer.constant_folder import fold_constants
+from code_generator.code_generator import PArIRGenerator
+from code_generator.instructions import encode_program, parse_program
+from .cache import CompilationCache
+
+
+@dataclass
+class CompileOptions:
+    """Settings shared by every file in a batch (must stay picklable for the workers)"""
+    lexer_engine: str = "fsa"
+    output_dir: Optional[str] = None
+    write_output: bool = True
+    output_format: str = "text"  # "text" (.parir) or "binary" (.pirb)
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = CompilationCache.DEFAULT_MAX_BYTES
+    opt_level: int = 0  # 1: peephole optimization of the generated PArIR
+    elide_empty_frames: bool = False  # no oframe/cframe for declaration-free blocks
+    hoist_loop_frames: bool = False  # loop-body locals allocated once per loop, not per iteration
+    fold_constants: bool = False  # AST constant folding/propagation and constant-if pruning
+
+    # Fields that cannot change the generated PArIR (every lexer engine yields identical tokens)
+    NON_CODEGEN_FIELDS = ("lexer_engine", "output_dir", "write_output", "output_format",
+                          "cache_dir", "cache_max_bytes")
+
+    def fingerprint(self) -> str:
+        """Stable text of the options that affect code generation (part of the cache key)"""
+        settings = {name: value for name, value in asdict(self).items()
+                    if name not in self.NON_CODEGEN_FIELDS}
+        return json.dumps(settings, sort_keys=True)
+
+
+@dataclass
+class CompileResult:
+    """Outcome of compiling one file"""
+    path: str
+    instructions: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    failed_stage: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    output_path: Optional[str] = None
+    cache_hit: Optional[bool] = None  # None when caching is disabled
+    source_map: List = field(default_factory=list)  # SourceLocation per instruction (not cached)
+
+    @property
+    def success(self) -> bool:
+        return self.failed_stage is None
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.timings.values())
+
+
+def compile_source(source: str, options: CompileOptions = None, path: str = "<source>") -> CompileResult:
+    """Compile PArL source text, recording per-stage timings and the first failing stage"""
+    options = options or CompileOptions()
+    result = CompileResult(path)
+
+    # Lexical analysis
+    start = time.perf_counter()
+    tokens = FSALexer(engine=options.lexer_engine).tokenize(source)
+    result.timings["lex"] = time.perf_counter() - start
+    error_tokens = [t for t in tokens if t.type.name.startswith("ERROR")]
+    if error_tokens:
+        result.failed_stage = "lex"
+        result.errors = [f"{t.type.name} '{t.lexeme}' at line {t.line}, column {t.col}" for t in error_tokens]
+        return result
+
+    # Parsing
+    start = time.perf_counter()
+    parser = PArLParser(tokens)
+    try:
+        ast = parser.parse()
+    except Exception as e:
+        ast = None
+        if not parser.errors:
+            parser.errors.append(e)
+    result.timings["parse"] = time.perf_counter() - start
+    if ast is None or parser.has_errors():
+        result.failed_stage = "parse"
+        result.errors = [str(e) for e in parser.errors]
+        return result
+
+    # Semantic analysis
+    start = time.perf_counter()
+    analyzer = SemanticAnalyzer()
+    valid = analyzer.analyze(ast)
+    result.timings["semantic"] = time.perf_counter() - start
+    if not valid:
+        result.failed_stage = "semantic"
+        result.errors = [str(e) for e in analyzer.errors]
+        return result
+
+    # AST optimization
+    if options.fold_constants:
+        start = time.perf_counter()
+        try:
+            ast = fold_constants(ast)
+        except Exception as e:
+            result.failed_stage = "optimize"
+            result.errors = [f"Internal optimization error: {e}"]
+        result.timings["optimize"] = time.perf_counter() - start
+        if not result.success:
+            return result
+
+    # Code generation
+    start = time.perf_counter()
+    try:
+        generator = PArIRGenerator(opt_level=options.opt_level, elide_empty_frames=options.elide_empty_frames,
+                                   hoist_loop_frames=options.hoist_loop_frames)
+        result.instructions = generator.generate(ast)
+        result.source_map = generator.source_map
+    except Exception as e:
+        result.failed_stage = "codegen"
+        result.errors = [f"Internal code generation error: {e}"]
+    result.timings["codegen"] = time.perf_counter() - start
+    return result
+
+
+OUTPUT_EXTENSIONS = {"text": ".parir", "binary": ".pirb"}
+
+
+def output_path_for(path: str, options: CompileOptions) -> str:
+    """<name>.parir (or .pirb) next to the input, or inside options.output_dir"""
+    base = os.path.splitext(os.path.basename(path))[0] + OUTPUT_EXTENSIONS[options.output_format]
+    directory = options.output_dir if options.output_dir else os.path.dirname(path)
+    return os.path.join(directory, base)
+
+
+def compile_file(path: str, options: CompileOptions = None) -> CompileResult:
+    """Compile one file and write its PArIR (worker entry point; never raises)"""
+    options = options or CompileOptions()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return CompileResult(path, errors=[f"Cannot read file: {e}"], failed_stage="read")
+
+    if options.cache_dir:
+        cache = CompilationCache(options.cache_dir, options.cache_max_bytes)
+        start = time.perf_counter()
+        key = cache.key(source, options.fingerprint())
+        instructions = cache.get(key)
+        if instructions is not None:
+            result = CompileResult(path, instructions=instructions, cache_hit=True)
+            result.timings["cache"] = time.perf_counter() - start
+        else:
+            result = compile_source(source, options, path)
+            result.cache_hit = False
+            if result.success:
+                cache.put(key, result.instructions)
+    else:
+        result = compile_source(source, options, path)
+
+    if result.success and options.write_output:
+        result.output_path = output_path_for(path, options)
+        try:
+            if options.output_format == "binary":
+                with open(result.output_path, "wb") as f:
+                    f.write(encode_program(parse_program(result.instructions)))
+            else:
+                with open(result.output_path, "w", encoding="utf-8") as f:
+                    for instruction in result.instructions:
+                        f.write(instruction + "\n")
+        except OSError as e:
+            result.failed_stage = "write"
+            result.errors = [f"Cannot write output: {e}"]
+    return result
+
+
+def _compile_file_job(job):
+    path, options = job
+    return compile_file(path, options)
+
+
+def compile_files(paths: Iterable[str], options: CompileOptions = None, jobs: Optional[int] = None,
+                  chunksize: int = 1) -> List[CompileResult]:
+    """
+    Compile many files. Results are returned in input order regardless of which
+    worker finishes first. jobs=1 compiles in-process; None uses every CPU core.
+    """
+    options = options or CompileOptions()
+    paths = list(paths)
+    if options.output_dir:
+        os.makedirs(options.output_dir, exist_ok=True)
+
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        results = [compile_file(path, options) for path in paths]
+    else:
+        work = [(path, options) for path in paths]
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            results = list(executor.map(_compile_file_job, work, chunksize=chunksize))
+
+    if options.cache_dir:
+        # Workers only add entries; trimming to the size bound happens once per batch
+        CompilationCache(options.cache_dir, options.cache_max_bytes).evict()
+    return results
+
+
+def format_summary(results: List[CompileResult], wall_time: float, verbose: bool = False) -> str:
+    """Per-file timing/error lines followed by batch totals"""
+    lines = []
+    for result in results:
+        status = "ok" if result.success else f"FAILED ({result.failed_stage})"
+        line = f"{result.path}: {status} in {result.total_time * 1000:.1f} ms"
+        if result.success:
+            line += f", {len(result.instructions)} instructions"
+            if result.cache_hit:
+                line += " (cached)"
+        lines.append(line)
+        if verbose:
+            stages = ", ".join(f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in result.timings.items())
+            lines.append(f"    stages: {stages}")
+        for error in result.errors:
+            lines.append(f"    {error}")
+
+    failed = sum(1 for result in results if not result.success)
+    compile_time = sum(result.total_time for result in results)
+    lines.append("-" * 60)
+    lines.append(f"{len(results)} file(s), {len(results) - failed} compiled, {failed} failed")
+    lines.append(f"Wall time {wall_time:.2f} s, compile time {compile_time:.2f} s")
+    lookups = [result.cache_hit for result in results if result.cache_hit is not None]
+    if lookups:
+        hits = sum(1 for hit in lookups if hit)
+        lines.append(f"Cache: {hits} hit(s), {len(lookups) - hits} miss(es), "
+                     f"hit rate {hits / len(lookups) * 100:.1f}%")
+    return "\n".join(lines)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="parlc", description="Compile PArL programs to PArIR")
+    parser.add_argument("files", nargs="+", help=".parl source files")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: number of CPU cores, 1 = no pool)")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="directory for .parir files (default: next to each input)")
+    parser.add_argument("--lexer-engine", choices=FSALexer.ENGINES, default="fsa",
+                        help="FSALexer engine used for tokenizing")
+    parser.add_argument("--chunksize", type=int, default=1,
+                        help="files handed to a worker at a time")
+    parser.add_argument("--no-output", action="store_true", help="check only, do not write .parir files")
+    parser.add_argument("--format", choices=sorted(OUTPUT_EXTENSIONS), default="text",
+                        help="output as PArIR text (.parir) or the binary instruction format (.pirb)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="reuse PArIR for unchanged sources from this directory")
+    parser.add_argument("--cache-size", type=int, default=CompilationCache.DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="cache size bound in MiB (least recently used entries are evicted)")
+    parser.add_argument("-O", "--opt-level", type=int, choices=PArIRGenerator.OPT_LEVELS, default=0,
+                        help="optimization level (-O1: peephole pass over the generated PArIR)")
+    parser.add_argument("--elide-empty-frames", action="store_true",
+                        help="open no frame for if arms and loop bodies that declare no variables")
+    parser.add_argument("--hoist-loop-frames", action="store_true",
+                        help="open loop-body frames once around the loop instead of on every iteration")
+    parser.add_argument("--fold-constants", action="store_true",
+                        help="fold constant expressions, propagate constant lets and prune constant ifs")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show per-stage timings")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        print("parlc: --jobs must be at least 1", file=sys.stderr)
+        return 2
+
+    options = CompileOptions(lexer_engine=args.lexer_engine, output_dir=args.output_dir,
+                             write_output=not args.no_output, output_format=args.format,
+                             cache_dir=args.cache_dir, opt_level=args.opt_level,
+                             elide_empty_frames=args.elide_empty_frames,
+                             hoist_loop_frames=args.hoist_loop_frames,
+                             fold_constants=args.fold_constants,
+                             cache_max_bytes=args.cache_size * 1024 * 1024)
+    start = time.perf_counter()
+    results = compile_files(args.files, options, jobs=args.jobs, chunksize=args.chunksize)
+    wall_time = time.perf_counter() - start
+
+    print(format_summary(results, wall_time, args.verbose))
+    return 0 if all(result.success for result in results) else 1
@@ -1,4 +1,5 @@
 from .parser import PArLParser
 from .ast_nodes import *
+from .ast_walker import ASTWalker, evaluate, walk, walk_with_depth
 from .parser_errors import ParserError
-from .token_stream import TokenStream
\ No newline at end of file
+from .token_stream import TokenStream, BufferedTokenStream, ColumnarTokenStream
\ No newline at end of file
@@ -3,22 +3,70 @@ Abstract Syntax Tree Node Definitions for PArL Language
 Enhanced with beautiful tree-style printing by default
 """
 
-from typing import List, Optional, Any, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 from abc import ABC, abstractmethod
 
+from .ast_walker import walk_with_depth
+
+
+# accept(): visitor class -> node class -> unbound visit method
+_ACCEPT_METHODS: Dict[type, Dict[type, Callable]] = {}
+
+
+class Dispatcher:
+    """
+    Node class -> handler table shared by every instance of a visitor class.
+    handlers maps node classes to method names; each visitor class gets its
+    own table, filled the first time a node class is dispatched (a node class
+    without an entry takes the handler of its nearest listed base class, or
+    None). After that, lookup() costs two dict lookups per node.
+    """
+    __slots__ = ("handlers", "tables")
+    
+    def __init__(self, handlers: Dict[type, str]):
+        self.handlers = handlers
+        self.tables: Dict[type, Dict[type, Optional[Callable]]] = {}
+    
+    def lookup(self, visitor, node_class: type) -> Optional[Callable]:
+        """Unbound handler of visitor's class for node_class (call it as handler(visitor, node))"""
+        table = self.tables.get(visitor.__class__)
+        if table is None:
+            table = self.tables[visitor.__class__] = {}
+        try:
+            return table[node_class]
+        except KeyError:
+            pass
+        handler = None
+        for base in node_class.__mro__:
+            if base in self.handlers:
+                handler = getattr(visitor.__class__, self.handlers[base])
+                break
+        table[node_class] = handler
+        return handler
+
 
 class ASTNode(ABC):
-    """Base class for all AST nodes with visitor pattern support and beautiful tree printing"""
+    """
+    Base class for all AST nodes with visitor pattern support and beautiful tree printing.
+    Every node class declares __slots__, so nodes carry no per-instance __dict__
+    """
+    __slots__ = ("line", "col")
+    
     def __init__(self, line: int = 0, col: int = 0):
         self.line = line
         self.col = col
     
     def accept(self, visitor):
         """Visitor pattern implementation for semantic analysis/code generation"""
-        method_name = f"visit_{self.__class__.__name__.lower()}"
-        if hasattr(visitor, method_name):
-            return getattr(visitor, method_name)(self)
-        return visitor.generic_visit(self)
+        methods = _ACCEPT_METHODS.get(visitor.__class__)
+        if methods is None:
+            methods = _ACCEPT_METHODS[visitor.__class__] = {}
+        method = methods.get(self.__class__)
+        if method is None:
+            # visit_<class name> if the visitor defines it, else generic_visit; resolved once per pair
+            method = getattr(visitor.__class__, f"visit_{self.__class__.__name__.lower()}", None)
+            method = methods[self.__class__] = method or visitor.__class__.generic_visit
+        return method(visitor, self)
     
     @abstractmethod
     def __str__(self):
@@ -26,24 +74,13 @@ class ASTNode(ABC):
         pass
     
     def _tree_children(self, children, indent_level=1):
-        """Helper for indentation-based tree printing"""
+        """Helper for indentation-based tree printing (iterative, so deep trees print too)"""
         if not children:
             return ""
         
-        indent = "  " * indent_level  # 2 spaces per level
-        result = ""
-        
-        for child in children:
-            if child is not None:
-                # Add the child with proper indentation
-                result += f"\n{indent}{child._get_node_label()}"
-                
-                # Add grandchildren with increased indentation
-                grandchildren = child._get_children()
-                if grandchildren:
-                    result += child._tree_children(grandchildren, indent_level + 1)
-        
-        return result
+        # 2 spaces per level
+        return "".join(f"\n{'  ' * level}{child._get_node_label()}"
+                       for child, level in walk_with_depth(children, indent_level))
     
     def _get_node_label(self):
         """Get the label for this node in the tree"""
@@ -57,6 +94,8 @@ class ASTNode(ABC):
 # ===== PROGRAM STRUCTURE =====
 class Program(ASTNode):
     """Root AST node representing entire program"""
+    __slots__ = ("statements",)
+    
     def __init__(self, statements: List[ASTNode], line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.statements = statements
@@ -75,6 +114,8 @@ class Program(ASTNode):
 
 class Block(ASTNode):
     """Block of statements enclosed in braces"""
+    __slots__ = ("statements",)
+    
     def __init__(self, statements: List[ASTNode], line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.statements = statements
@@ -94,6 +135,8 @@ class Block(ASTNode):
 # ===== DECLARATIONS =====
 class VariableDeclaration(ASTNode):
     """Variable declaration: let name:type = expr"""
+    __slots__ = ("name", "var_type", "initializer")
+    
     def __init__(self, name: str, var_type: str, initializer: Optional[ASTNode] = None,
                  line: int = 0, col: int = 0):
         super().__init__(line, col)
@@ -116,6 +159,8 @@ class VariableDeclaration(ASTNode):
 
 class FunctionDeclaration(ASTNode):
     """Function declaration with parameters and body"""
+    __slots__ = ("name", "params", "return_type", "body")
+    
     def __init__(self, name: str, params: List['FormalParameter'], 
                  return_type: str, body: Block, line: int = 0, col: int = 0):
         super().__init__(line, col)
@@ -143,6 +188,8 @@ class FunctionDeclaration(ASTNode):
 
 class FormalParameter(ASTNode):
     """Function parameter with name and type"""
+    __slots__ = ("name", "param_type")
+    
     def __init__(self, name: str, param_type: str, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.name = name
@@ -161,6 +208,8 @@ class FormalParameter(ASTNode):
 # ===== STATEMENTS =====
 class Assignment(ASTNode):
     """Assignment statement: identifier = expression"""
+    __slots__ = ("target", "value")
+    
     def __init__(self, target: ASTNode, value: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.target = target
@@ -180,6 +229,8 @@ class Assignment(ASTNode):
 
 class IfStatement(ASTNode):
     """If statement with optional else"""
+    __slots__ = ("condition", "then_block", "else_block")
+    
     def __init__(self, condition: ASTNode, then_block: Block, 
                  else_block: Optional[Block] = None, line: int = 0, col: int = 0):
         super().__init__(line, col)
@@ -207,6 +258,8 @@ class IfStatement(ASTNode):
 
 class WhileStatement(ASTNode):
     """While loop statement"""
+    __slots__ = ("condition", "body")
+    
     def __init__(self, condition: ASTNode, body: Block, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.condition = condition
@@ -226,6 +279,8 @@ class WhileStatement(ASTNode):
 
 class ForStatement(ASTNode):
     """For loop statement"""
+    __slots__ = ("init", "condition", "update", "body")
+    
     def __init__(self, init: Optional[ASTNode], condition: ASTNode, 
                  update: Optional[ASTNode], body: Block, line: int = 0, col: int = 0):
         super().__init__(line, col)
@@ -262,6 +317,8 @@ class ForStatement(ASTNode):
 
 class ReturnStatement(ASTNode):
     """Return statement with expression"""
+    __slots__ = ("value",)
+    
     def __init__(self, value: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.value = value
@@ -281,6 +338,8 @@ class ReturnStatement(ASTNode):
 # ===== BUILT-IN STATEMENTS =====
 class PrintStatement(ASTNode):
     """__print statement"""
+    __slots__ = ("expression",)
+    
     def __init__(self, expression: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.expression = expression
@@ -299,6 +358,8 @@ class PrintStatement(ASTNode):
 
 class DelayStatement(ASTNode):
     """__delay statement"""
+    __slots__ = ("expression",)
+    
     def __init__(self, expression: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.expression = expression
@@ -317,6 +378,8 @@ class DelayStatement(ASTNode):
 
 class WriteStatement(ASTNode):
     """__write statement"""
+    __slots__ = ("x", "y", "color")
+    
     def __init__(self, x: ASTNode, y: ASTNode, color: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.x = x
@@ -337,6 +400,8 @@ class WriteStatement(ASTNode):
 
 class WriteBoxStatement(ASTNode):
     """__write_box statement"""
+    __slots__ = ("x", "y", "width", "height", "color")
+    
     def __init__(self, x: ASTNode, y: ASTNode, width: ASTNode, 
                  height: ASTNode, color: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
@@ -360,6 +425,8 @@ class WriteBoxStatement(ASTNode):
 
 class ClearStatement(ASTNode):
     """__clear statement"""
+    __slots__ = ("color",)
+    
     def __init__(self, color: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.color = color
@@ -379,6 +446,8 @@ class ClearStatement(ASTNode):
 # ===== EXPRESSIONS =====
 class BinaryOperation(ASTNode):
     """Binary operation expression"""
+    __slots__ = ("left", "operator", "right")
+    
     def __init__(self, left: ASTNode, operator: str, right: ASTNode,
                  line: int = 0, col: int = 0):
         super().__init__(line, col)
@@ -400,6 +469,8 @@ class BinaryOperation(ASTNode):
 
 class UnaryOperation(ASTNode):
     """Unary operation expression"""
+    __slots__ = ("operator", "operand")
+    
     def __init__(self, operator: str, operand: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.operator = operator
@@ -419,6 +490,8 @@ class UnaryOperation(ASTNode):
 
 class CastExpression(ASTNode):
     """Type cast expression: expr as type"""
+    __slots__ = ("expression", "target_type")
+    
     def __init__(self, expression: ASTNode, target_type: str, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.expression = expression
@@ -438,6 +511,8 @@ class CastExpression(ASTNode):
 
 class FunctionCall(ASTNode):
     """Function call expression"""
+    __slots__ = ("name", "arguments")
+    
     def __init__(self, name: str, arguments: List[ASTNode], line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.name = name
@@ -458,6 +533,8 @@ class FunctionCall(ASTNode):
 
 class IndexAccess(ASTNode):
     """Array/identifier index access (part of identifier per EBNF)"""
+    __slots__ = ("base", "index")
+    
     def __init__(self, base: ASTNode, index: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.base = base
@@ -478,6 +555,8 @@ class IndexAccess(ASTNode):
 # ===== LITERALS AND IDENTIFIERS =====
 class Literal(ASTNode):
     """Literal value (int, float, bool, colour)"""
+    __slots__ = ("value", "literal_type")
+    
     def __init__(self, value: Any, literal_type: str, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.value = value
@@ -495,6 +574,8 @@ class Literal(ASTNode):
 
 class Identifier(ASTNode):
     """Variable identifier"""
+    __slots__ = ("name",)
+    
     def __init__(self, name: str, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.name = name
@@ -512,6 +593,8 @@ class Identifier(ASTNode):
 # ===== BUILT-IN EXPRESSIONS =====
 class PadWidth(ASTNode):
     """__width built-in expression"""
+    __slots__ = ()
+    
     def __init__(self, line: int = 0, col: int = 0):
         super().__init__(line, col)
     
@@ -527,6 +610,8 @@ class PadWidth(ASTNode):
 
 class PadHeight(ASTNode):
     """__height built-in expression"""
+    __slots__ = ()
+    
     def __init__(self, line: int = 0, col: int = 0):
         super().__init__(line, col)
     
@@ -542,6 +627,8 @@ class PadHeight(ASTNode):
 
 class PadRead(ASTNode):
     """__read built-in expression"""
+    __slots__ = ("x", "y")
+    
     def __init__(self, x: ASTNode, y: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.x = x
@@ -561,6 +648,8 @@ class PadRead(ASTNode):
 
 class PadRandI(ASTNode):
     """__randi built-in expression"""
+    __slots__ = ("max_val",)
+    
     def __init__(self, max_val: ASTNode, line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.max_val = max_val
@@ -580,6 +669,8 @@ class PadRandI(ASTNode):
 # ===== ARRAY SUPPORT =====
 class ArrayType:
     """Represents array type information"""
+    __slots__ = ("element_type", "size", "is_array")
+    
     def __init__(self, element_type: str, size: Optional[int] = None):
         self.element_type = element_type
         self.size = size  # None for dynamic arrays
@@ -601,6 +692,8 @@ class ArrayType:
 
 class ArrayLiteral(ASTNode):
     """Array literal: [expr, expr, ...]"""
+    __slots__ = ("elements",)
+    
     def __init__(self, elements: List[ASTNode], line: int = 0, col: int = 0):
         super().__init__(line, col)
         self.elements = elements
@@ -638,14 +731,15 @@ def create_literal_from_token(token) -> Literal:
 
 
 def get_operator_precedence(operator: str) -> int:
-    """Get operator precedence for proper parsing"""
+    """Get operator precedence for proper parsing (higher binds tighter, 0 for non-operators)"""
     precedence_map = {
-        # Relational operators (lowest precedence in expression parsing)
-        '==': 1, '!=': 1, '<': 1, '>': 1, '<=': 1, '>=': 1,
+        # Logical operators (lowest precedence in expression parsing)
+        'or': 1, 'and': 2,
+        # Relational operators
+        '==': 3, '!=': 3, '<': 3, '>': 3, '<=': 3, '>=': 3,
         # Additive operators
-        '+': 2, '-': 2, 'or': 2,
+        '+': 4, '-': 4,
         # Multiplicative operators (highest precedence)
-        '*': 3, '/': 3, '%': 3, 'and': 3
+        '*': 5, '/': 5, '%': 5
     }
     return precedence_map.get(operator, 0)
-
@@ -0,0 +1,102 @@
+"""
+Iterative AST Traversal for PArL
+Explicit-stack walkers shared by the compiler passes, so that how deep a
+parsed program nests (a 5000-operand expression chain is a 5000-deep tree) is
+bounded by memory rather than by Python's recursion limit:
+- walk / walk_with_depth: pre-order node iterators (with optional pruning)
+- ASTWalker: enter/exit hooks, each exit receiving the values of the node's children
+- evaluate: runs generator-based visit methods ('value = yield child') on a stack
+
+Nodes are only used through _get_children(), so this module does not import
+the node classes.
+"""
+
+from types import GeneratorType
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+def walk(root, descend: Optional[Callable[[Any], bool]] = None) -> Iterator:
+    """
+    Yield root and its descendants in pre-order (source order). When descend
+    is given, the children of a node are only visited if descend(node) is true.
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        yield node
+        if descend is None or descend(node):
+            stack.extend(reversed(node._get_children()))
+
+
+def walk_with_depth(nodes: Iterable, depth: int = 0) -> Iterator[Tuple[Any, int]]:
+    """Yield (node, depth) for nodes and all their descendants in pre-order, nodes at depth"""
+    stack = [(node, depth) for node in reversed(list(nodes))]
+    while stack:
+        node, level = stack.pop()
+        if node is None:
+            continue
+        yield node, level
+        stack.extend((child, level + 1) for child in reversed(node._get_children()))
+
+
+class ASTWalker:
+    """
+    Depth-first traversal with enter/exit hooks on an explicit stack.
+
+    enter(node) runs before the children are visited and returns the children
+    to visit, in order (None means node._get_children(); an empty sequence
+    skips the subtree). exit(node, values) runs after them and its result is
+    the node's value, values being the values of the visited children in
+    order; walk() returns the value of the root.
+    """
+
+    def enter(self, node) -> Optional[Iterable]:
+        return None
+
+    def exit(self, node, values: List) -> Any:
+        return None
+
+    def walk(self, root) -> Any:
+        values: List = []
+        stack: List[Tuple[Any, Optional[int]]] = [(root, None)]  # (node, None) to enter, (node, base) to exit
+        while stack:
+            node, base = stack.pop()
+            if base is not None:
+                children_values = values[base:]
+                del values[base:]
+                values.append(self.exit(node, children_values))
+                continue
+            children = self.enter(node)
+            if children is None:
+                children = node._get_children()
+            stack.append((node, len(values)))
+            stack.extend((child, None) for child in reversed(list(children)) if child is not None)
+        return values[-1] if values else None
+
+
+def evaluate(visit: Callable, root) -> Any:
+    """
+    Return visit(root), where visit(node) either returns the node's value or is
+    a generator that yields child nodes, gets each child's value back from the
+    yield (value = yield child) and returns its own value. The generators of
+    the nodes being visited are kept on a list instead of the Python call stack.
+    """
+    value = visit(root)
+    if not isinstance(value, GeneratorType):
+        return value
+    stack = [value]
+    value = None
+    while stack:
+        try:
+            child = stack[-1].send(value)
+        except StopIteration as stop:
+            stack.pop()
+            value = stop.value
+            continue
+        value = visit(child)
+        if isinstance(value, GeneratorType):
+            stack.append(value)
+            value = None
+    return value
@@ -3,27 +3,84 @@ PArL Language Parser - Task 2 Implementation
 Hand-crafted recursive descent LL(k) parser following assignment EBNF
 """
 
-from typing import List, Optional, Union
-from lexer import Token, TokenType, FSALexer
-from .token_stream import TokenStream
+from typing import Iterable, List, Optional, Union
+from lexer import Token, TokenBuffer, TokenType, FSALexer
+from .token_stream import ERROR_TYPES, TokenStream, BufferedTokenStream, ColumnarTokenStream
 from .ast_nodes import *
 from .parser_errors import *
 
 
+# Binary operator tokens (lexeme as in BinaryOperation.operator) and their binding power
+BINARY_OPERATORS = {
+    TokenType.OR: 'or', TokenType.AND: 'and',
+    TokenType.EQUAL_EQUAL: '==', TokenType.NOT_EQUAL: '!=', TokenType.LESS: '<',
+    TokenType.GREATER: '>', TokenType.LESS_EQUAL: '<=', TokenType.GREATER_EQUAL: '>=',
+    TokenType.PLUS: '+', TokenType.MINUS: '-',
+    TokenType.MULTIPLY: '*', TokenType.SLASH: '/', TokenType.MODULO: '%',
+}
+BINDING_POWER = {token_type: get_operator_precedence(operator) for token_type, operator in BINARY_OPERATORS.items()}
+UNARY_OPERATORS = frozenset({TokenType.MINUS, TokenType.NOT})
+
+# Statement parse method per first token, with the context of the ';' that must follow
+# (None when the statement ends itself: blocks, control flow and assignments)
+STATEMENT_PARSERS = {
+    TokenType.FUN: ("parse_function_declaration", None),
+    TokenType.LET: ("parse_variable_declaration", "';' after variable declaration"),
+    TokenType.IF: ("parse_if_statement", None),
+    TokenType.WHILE: ("parse_while_statement", None),
+    TokenType.FOR: ("parse_for_statement", None),
+    TokenType.RETURN: ("parse_return_statement", "';' after return statement"),
+    TokenType.BUILTIN_PRINT: ("parse_print_statement", "';' after print statement"),
+    TokenType.BUILTIN_DELAY: ("parse_delay_statement", "';' after delay statement"),
+    TokenType.BUILTIN_WRITE: ("parse_write_statement", "';' after write statement"),
+    TokenType.BUILTIN_WRITE_BOX: ("parse_write_box_statement", "';' after write_box statement"),
+    TokenType.BUILTIN_CLEAR: ("parse_clear_statement", "';' after clear statement"),
+    TokenType.LBRACE: ("parse_block", None),
+    TokenType.IDENTIFIER: ("parse_assignment_or_expression_statement", None),
+}
+
+# FIRST sets
+LITERAL_FIRST = frozenset({TokenType.INT_LITERAL, TokenType.FLOAT_LITERAL, TokenType.COLOUR_LITERAL,
+                           TokenType.TRUE, TokenType.FALSE})
+TYPE_FIRST = frozenset({TokenType.TYPE_INT, TokenType.TYPE_FLOAT, TokenType.TYPE_BOOL, TokenType.TYPE_COLOUR})
+# Statements top-level error recovery can resume at
+RECOVERY_FIRST = frozenset({TokenType.LET, TokenType.FUN, TokenType.IF, TokenType.WHILE,
+                            TokenType.FOR, TokenType.RETURN, TokenType.LBRACE})
+
+# Primary expression parse method per first token
+PRIMARY_PARSERS = {
+    TokenType.LBRACKET: "parse_array_literal",
+    **{token_type: "parse_literal" for token_type in LITERAL_FIRST},
+    TokenType.BUILTIN_WIDTH: "parse_pad_width",
+    TokenType.BUILTIN_HEIGHT: "parse_pad_height",
+    TokenType.BUILTIN_READ: "parse_pad_read",
+    TokenType.BUILTIN_RANDI: "parse_pad_rand_int",
+    TokenType.IDENTIFIER: "parse_identifier_with_optional_index",
+}
+
+
 class PArLParser:
     """
     Recursive descent parser for PArL language
     Implements hand-crafted top-down LL(k) parsing as specified in assignment
     """
     
-    def __init__(self, tokens: List[Token] = None, lexer: FSALexer = None):
+    def __init__(self, tokens: Iterable[Token] = None, lexer: FSALexer = None):
         """
-        Initialize parser with either token list or lexer (supporting both approaches)
+        Initialize parser with either token list, token iterator or lexer (supporting both approaches)
         """
-        if tokens is not None:
+        if isinstance(tokens, TokenBuffer):
+            # Columnar TokenBuffer: Token objects are only built for the tokens the AST keeps
+            self.stream = ColumnarTokenStream(tokens)
+            self.lexer = None
+        elif isinstance(tokens, (list, tuple)):
             # Token list approach
             self.stream = TokenStream(tokens)
             self.lexer = None
+        elif tokens is not None:
+            # Lazy token iterator (e.g. FSALexer.iter_tokens) with bounded lookahead
+            self.stream = BufferedTokenStream(tokens)
+            self.lexer = None
         elif lexer is not None:
             # GetNextToken approach (alternative mentioned in assignment)
             self.lexer = lexer
@@ -32,6 +89,11 @@ class PArLParser:
         else:
             raise ValueError("Must provide either tokens list or lexer")
         
+        # Token type -> bound parse method (one lookup per statement / primary expression)
+        self.statement_dispatch = {token_type: (getattr(self, name), terminator)
+                                   for token_type, (name, terminator) in STATEMENT_PARSERS.items()}
+        self.primary_dispatch = {token_type: getattr(self, name) for token_type, name in PRIMARY_PARSERS.items()}
+        
         self.errors = []
         self.debug = False
     
@@ -63,79 +125,29 @@ class PArLParser:
                 self.stream.synchronize_on_error()
                 
                 # If we're still not at a good recovery point, advance
-                if not self.stream.at_end() and not self.stream.match(
-                    TokenType.LET, TokenType.FUN, TokenType.IF, TokenType.WHILE,
-                    TokenType.FOR, TokenType.RETURN, TokenType.LBRACE):
-                    self.stream.advance()
+                if not self.stream.at_end() and not self.stream.match_set(RECOVERY_FIRST):
+                    self.stream.skip()
         
         return Program(statements, start_token.line, start_token.col)
     
     # ===== STATEMENT PARSING =====
     
     def parse_statement(self) -> Optional[ASTNode]:
-        """Parse any statement type based on current token"""
-        current = self.stream.current_token()
-        
-        # Check for lexical errors first
-        if current.type.name.startswith('ERROR'):
-            raise LexicalErrorInParsingError(current)
-        
-        # Function declaration
-        if self.stream.match(TokenType.FUN):
-            return self.parse_function_declaration()
-        
-        # Variable declaration
-        elif self.stream.match(TokenType.LET):
-            stmt = self.parse_variable_declaration()
-            self.stream.expect(TokenType.SEMICOLON, "';' after variable declaration")
-            return stmt
-        
-        # Control flow statements
-        elif self.stream.match(TokenType.IF):
-            return self.parse_if_statement()
-        elif self.stream.match(TokenType.WHILE):
-            return self.parse_while_statement()
-        elif self.stream.match(TokenType.FOR):
-            return self.parse_for_statement()
-        elif self.stream.match(TokenType.RETURN):
-            stmt = self.parse_return_statement()
-            self.stream.expect(TokenType.SEMICOLON, "';' after return statement")
-            return stmt
-        
-        # Built-in statements
-        elif self.stream.match(TokenType.BUILTIN_PRINT):
-            stmt = self.parse_print_statement()
-            self.stream.expect(TokenType.SEMICOLON, "';' after print statement")
-            return stmt
-        elif self.stream.match(TokenType.BUILTIN_DELAY):
-            stmt = self.parse_delay_statement()
-            self.stream.expect(TokenType.SEMICOLON, "';' after delay statement")
-            return stmt
-        elif self.stream.match(TokenType.BUILTIN_WRITE):
-            stmt = self.parse_write_statement()
-            self.stream.expect(TokenType.SEMICOLON, "';' after write statement")
-            return stmt
-        elif self.stream.match(TokenType.BUILTIN_WRITE_BOX):
-            stmt = self.parse_write_box_statement()
-            self.stream.expect(TokenType.SEMICOLON, "';' after write_box statement")
-            return stmt
-        elif self.stream.match(TokenType.BUILTIN_CLEAR):
-            stmt = self.parse_clear_statement()
-            self.stream.expect(TokenType.SEMICOLON, "';' after clear statement")
-            return stmt
-        
-        # Block statement
-        elif self.stream.match(TokenType.LBRACE):
-            return self.parse_block()
-        
-        # Assignment or expression statement
-        elif self.stream.match(TokenType.IDENTIFIER):
-            # Look ahead to determine if it's an assignment
-            # Need to handle identifier with potential array access per EBNF
-            return self.parse_assignment_or_expression_statement()
-        
-        else:
+        """Parse any statement type based on current token (dispatched through STATEMENT_PARSERS)"""
+        entry = self.statement_dispatch.get(self.stream.current_type())
+        
+        if entry is None:
+            current = self.stream.current_token()
+            # Lexical errors are reported as such, anything else cannot start a statement
+            if current.type in ERROR_TYPES:
+                raise LexicalErrorInParsingError(current)
             raise UnexpectedTokenError("statement", current)
+        
+        parse, terminator = entry
+        stmt = parse()
+        if terminator is not None:
+            self.stream.skip_expected(TokenType.SEMICOLON, terminator)
+        return stmt
     
     def parse_assignment_or_expression_statement(self) -> ASTNode:
         """Parse assignment or expression statement starting with identifier"""
@@ -144,29 +156,29 @@ class PArLParser:
         
         # Check if this is an assignment
         if self.stream.match(TokenType.EQUAL):
-            self.stream.advance()  # consume '='
+            self.stream.skip()  # consume '='
             value = self.parse_expression()
-            self.stream.expect(TokenType.SEMICOLON, "';' after assignment")
+            self.stream.skip_expected(TokenType.SEMICOLON, "';' after assignment")
             return Assignment(target, value, target.line, target.col)
         else:
             # This is an expression statement (like function call)
             # The target should be a function call if it's a valid expression statement
             if not isinstance(target, FunctionCall):
                 raise SyntaxError("Invalid expression statement", self.stream.current_token())
-            self.stream.expect(TokenType.SEMICOLON, "';' after expression statement")
+            self.stream.skip_expected(TokenType.SEMICOLON, "';' after expression statement")
             return target
     
     def parse_variable_declaration(self) -> VariableDeclaration:
         """Parse variable declaration with array support"""
-        start_token = self.stream.expect(TokenType.LET)
+        line, col = self.stream.expect_position(TokenType.LET)
         name_token = self.stream.expect(TokenType.IDENTIFIER, "variable name")
-        self.stream.expect(TokenType.COLON, "':' after variable name")
+        self.stream.skip_expected(TokenType.COLON, "':' after variable name")
         var_type = self.parse_type()
         
         # Handle initialization
         initializer = None
         if self.stream.match(TokenType.EQUAL):
-            self.stream.advance()  # consume '='
+            self.stream.skip()  # consume '='
             
             if self.stream.match(TokenType.LBRACKET):
                 # Array literal initialization
@@ -176,7 +188,7 @@ class PArLParser:
                 initializer = self.parse_expression()
         
         return VariableDeclaration(name_token.lexeme, var_type, initializer,
-                                start_token.line, start_token.col)
+                                line, col)
     
     def parse_comma_separated_expression(self) -> ASTNode:
         """
@@ -190,37 +202,37 @@ class PArLParser:
     
     def parse_array_literal(self) -> ArrayLiteral:
         """Parse array literal: [expr, expr, ...]"""
-        start_token = self.stream.expect(TokenType.LBRACKET, "'[' for array literal")
+        line, col = self.stream.expect_position(TokenType.LBRACKET, "'[' for array literal")
         elements = []
         
         if not self.stream.match(TokenType.RBRACKET):
             elements.append(self.parse_expression())
             while self.stream.match(TokenType.COMMA):
-                self.stream.advance()  # consume ','
+                self.stream.skip()  # consume ','
                 elements.append(self.parse_expression())
         
-        self.stream.expect(TokenType.RBRACKET, "']' after array elements")
-        return ArrayLiteral(elements, start_token.line, start_token.col)
+        self.stream.skip_expected(TokenType.RBRACKET, "']' after array elements")
+        return ArrayLiteral(elements, line, col)
     
     def parse_function_declaration(self) -> FunctionDeclaration:
         """Parse function declaration: 'fun' Identifier '(' [FormalParams] ')' '->' Type Block"""
-        start_token = self.stream.expect(TokenType.FUN)
+        line, col = self.stream.expect_position(TokenType.FUN)
         name_token = self.stream.expect(TokenType.IDENTIFIER, "function name")
-        self.stream.expect(TokenType.LPAREN, "'(' after function name")
+        self.stream.skip_expected(TokenType.LPAREN, "'(' after function name")
         
         # Parse parameters
         params = []
         if not self.stream.match(TokenType.RPAREN):
             params = self.parse_formal_params()
         
-        self.stream.expect(TokenType.RPAREN, "')' after parameters")
-        self.stream.expect(TokenType.ARROW, "'->' before return type")
+        self.stream.skip_expected(TokenType.RPAREN, "')' after parameters")
+        self.stream.skip_expected(TokenType.ARROW, "'->' before return type")
         return_type = self.parse_type()  # This already supports ArrayType
         
         body = self.parse_block()
         
         return FunctionDeclaration(name_token.lexeme, params, return_type, body,
-                                 start_token.line, start_token.col)
+                                 line, col)
     
     def parse_formal_params(self) -> List[FormalParameter]:
         """Parse formal parameter list"""
@@ -228,7 +240,7 @@ class PArLParser:
         params.append(self.parse_formal_param())
         
         while self.stream.match(TokenType.COMMA):
-            self.stream.advance()  # consume ','
+            self.stream.skip()  # consume ','
             params.append(self.parse_formal_param())
         
         return params
@@ -236,7 +248,7 @@ class PArLParser:
     def parse_formal_param(self) -> FormalParameter:
         """Parse single formal parameter: Identifier ':' Type"""
         name_token = self.stream.expect(TokenType.IDENTIFIER, "parameter name")
-        self.stream.expect(TokenType.COLON, "':' after parameter name")
+        self.stream.skip_expected(TokenType.COLON, "':' after parameter name")
         param_type = self.parse_type()  # This already supports ArrayType
         
         return FormalParameter(name_token.lexeme, param_type,
@@ -244,34 +256,34 @@ class PArLParser:
     
     def parse_if_statement(self) -> IfStatement:
         """Parse if statement: 'if' '(' Expr ')' Block ['else' Block]"""
-        start_token = self.stream.expect(TokenType.IF)
-        self.stream.expect(TokenType.LPAREN, "'(' after 'if'")
+        line, col = self.stream.expect_position(TokenType.IF)
+        self.stream.skip_expected(TokenType.LPAREN, "'(' after 'if'")
         condition = self.parse_expression()
-        self.stream.expect(TokenType.RPAREN, "')' after if condition")
+        self.stream.skip_expected(TokenType.RPAREN, "')' after if condition")
         then_block = self.parse_block()
         
         else_block = None
         if self.stream.match(TokenType.ELSE):
-            self.stream.advance()  # consume 'else'
+            self.stream.skip()  # consume 'else'
             else_block = self.parse_block()
         
         return IfStatement(condition, then_block, else_block,
-                          start_token.line, start_token.col)
+                          line, col)
     
     def parse_while_statement(self) -> WhileStatement:
         """Parse while statement: 'while' '(' Expr ')' Block"""
-        start_token = self.stream.expect(TokenType.WHILE)
-        self.stream.expect(TokenType.LPAREN, "'(' after 'while'")
+        line, col = self.stream.expect_position(TokenType.WHILE)
+        self.stream.skip_expected(TokenType.LPAREN, "'(' after 'while'")
         condition = self.parse_expression()
-        self.stream.expect(TokenType.RPAREN, "')' after while condition")
+        self.stream.skip_expected(TokenType.RPAREN, "')' after while condition")
         body = self.parse_block()
         
-        return WhileStatement(condition, body, start_token.line, start_token.col)
+        return WhileStatement(condition, body, line, col)
     
     def parse_for_statement(self) -> ForStatement:
         """Parse for statement: 'for' '(' [VariableDecl] ';' Expr ';' [Assignment] ')' Block"""
-        start_token = self.stream.expect(TokenType.FOR)
-        self.stream.expect(TokenType.LPAREN, "'(' after 'for'")
+        line, col = self.stream.expect_position(TokenType.FOR)
+        self.stream.skip_expected(TokenType.LPAREN, "'(' after 'for'")
         
         # Parse initialization (optional)
         init = None
@@ -280,28 +292,28 @@ class PArLParser:
                 init = self.parse_variable_declaration()
             except ParserError as e:
                 raise ParserError(f"Invalid for loop initialization: {e.message}", e.token)
-        self.stream.expect(TokenType.SEMICOLON, "';' after for loop initialization")
+        self.stream.skip_expected(TokenType.SEMICOLON, "';' after for loop initialization")
         
         # Parse condition
         try:
             condition = self.parse_expression()
         except ParserError as e:
             raise ParserError(f"Invalid for loop condition: {e.message}", e.token)
-        self.stream.expect(TokenType.SEMICOLON, "';' after for loop condition")
+        self.stream.skip_expected(TokenType.SEMICOLON, "';' after for loop condition")
         
         # Parse update (optional) - improved error handling
         update = None
         if not self.stream.match(TokenType.RPAREN):
             try:
                 target = self.parse_identifier_with_optional_index()
-                self.stream.expect(TokenType.EQUAL, "'=' in for loop update")
+                self.stream.skip_expected(TokenType.EQUAL, "'=' in for loop update")
                 value = self.parse_expression()
                 update = Assignment(target, value, target.line, target.col)
             except ParserError as e:
                 # Better error message for for loop context
                 raise ParserError(f"Invalid for loop update clause: {e.message}", e.token)
         
-        self.stream.expect(TokenType.RPAREN, "')' after for loop clauses")
+        self.stream.skip_expected(TokenType.RPAREN, "')' after for loop clauses")
         
         try:
             body = self.parse_block()
@@ -309,61 +321,61 @@ class PArLParser:
             raise ParserError(f"Invalid for loop body: {e.message}", e.token)
         
         return ForStatement(init, condition, update, body,
-                        start_token.line, start_token.col)
+                        line, col)
 
     
     def parse_return_statement(self) -> ReturnStatement:
         """Parse return statement: 'return' Expr"""
-        start_token = self.stream.expect(TokenType.RETURN)
+        line, col = self.stream.expect_position(TokenType.RETURN)
         value = self.parse_expression()
-        return ReturnStatement(value, start_token.line, start_token.col)
+        return ReturnStatement(value, line, col)
     
     def parse_print_statement(self) -> PrintStatement:
         """Parse print statement: '__print' Expr"""
-        start_token = self.stream.expect(TokenType.BUILTIN_PRINT)
+        line, col = self.stream.expect_position(TokenType.BUILTIN_PRINT)
         expr = self.parse_comma_separated_expression()
-        return PrintStatement(expr, start_token.line, start_token.col)
+        return PrintStatement(expr, line, col)
     
     def parse_delay_statement(self) -> DelayStatement:
         """Parse delay statement: '__delay' Expr"""
-        start_token = self.stream.expect(TokenType.BUILTIN_DELAY)
+        line, col = self.stream.expect_position(TokenType.BUILTIN_DELAY)
         expr = self.parse_comma_separated_expression()
-        return DelayStatement(expr, start_token.line, start_token.col)
+        return DelayStatement(expr, line, col)
 
     def parse_write_statement(self) -> WriteStatement:
         """Parse write statement: '__write' Expr ',' Expr ',' Expr"""
-        start_token = self.stream.expect(TokenType.BUILTIN_WRITE)
+        line, col = self.stream.expect_position(TokenType.BUILTIN_WRITE)
         x = self.parse_comma_separated_expression()
-        self.stream.expect(TokenType.COMMA, "',' after first argument")
+        self.stream.skip_expected(TokenType.COMMA, "',' after first argument")
         y = self.parse_comma_separated_expression()
-        self.stream.expect(TokenType.COMMA, "',' after second argument")
+        self.stream.skip_expected(TokenType.COMMA, "',' after second argument")
         color = self.parse_comma_separated_expression()
-        return WriteStatement(x, y, color, start_token.line, start_token.col)
+        return WriteStatement(x, y, color, line, col)
 
     def parse_write_box_statement(self) -> WriteBoxStatement:
         """Parse write_box statement: '__write_box' Expr ',' Expr ',' Expr ',' Expr ',' Expr"""
-        start_token = self.stream.expect(TokenType.BUILTIN_WRITE_BOX)
+        line, col = self.stream.expect_position(TokenType.BUILTIN_WRITE_BOX)
         x = self.parse_comma_separated_expression()
-        self.stream.expect(TokenType.COMMA, "',' after first argument")
+        self.stream.skip_expected(TokenType.COMMA, "',' after first argument")
         y = self.parse_comma_separated_expression()
-        self.stream.expect(TokenType.COMMA, "',' after second argument")
+        self.stream.skip_expected(TokenType.COMMA, "',' after second argument")
         width = self.parse_comma_separated_expression()
-        self.stream.expect(TokenType.COMMA, "',' after third argument")
+        self.stream.skip_expected(TokenType.COMMA, "',' after third argument")
         height = self.parse_comma_separated_expression()
-        self.stream.expect(TokenType.COMMA, "',' after fourth argument")
+        self.stream.skip_expected(TokenType.COMMA, "',' after fourth argument")
         color = self.parse_comma_separated_expression()
         return WriteBoxStatement(x, y, width, height, color,
-                                start_token.line, start_token.col)
+                                line, col)
 
     def parse_clear_statement(self) -> ClearStatement:
         """Parse clear statement: '__clear' Expr"""
-        start_token = self.stream.expect(TokenType.BUILTIN_CLEAR)
+        line, col = self.stream.expect_position(TokenType.BUILTIN_CLEAR)
         color = self.parse_comma_separated_expression()
-        return ClearStatement(color, start_token.line, start_token.col)
+        return ClearStatement(color, line, col)
     
     def parse_block(self) -> Block:
         """Parse block: '{' { Statement } '}'"""
-        start_token = self.stream.expect(TokenType.LBRACE, "'{'")
+        line, col = self.stream.expect_position(TokenType.LBRACE, "'{'")
         statements = []
         
         while not self.stream.match(TokenType.RBRACE) and not self.stream.at_end():
@@ -380,87 +392,44 @@ class PArLParser:
                 if self.stream.match(TokenType.RBRACE):
                     break
         
-        self.stream.expect(TokenType.RBRACE, "'}'")
-        return Block(statements, start_token.line, start_token.col)
-    
-    def parse_logical_or_expression(self) -> ASTNode:
-        """Parse logical OR expression (lowest precedence after assignment)"""
-        left = self.parse_logical_and_expression()
-        
-        while self.stream.match(TokenType.OR):
-            op_token = self.stream.advance()
-            right = self.parse_logical_and_expression()
-            left = BinaryOperation(left, op_token.lexeme, right,
-                                left.line, left.col)
-        
-        return left
-
-    def parse_logical_and_expression(self) -> ASTNode:
-        """Parse logical AND expression (higher than OR, lower than comparisons)"""
-        left = self.parse_relational_expression()
-        
-        while self.stream.match(TokenType.AND):
-            op_token = self.stream.advance()
-            right = self.parse_relational_expression()
-            left = BinaryOperation(left, op_token.lexeme, right,
-                                left.line, left.col)
-        
-        return left
+        self.stream.skip_expected(TokenType.RBRACE, "'}'")
+        return Block(statements, line, col)
     
     # ===== EXPRESSION PARSING =====
     
-    def parse_expression(self) -> ASTNode:
-        """Parse expression with proper precedence hierarchy"""
-        return self.parse_logical_or_expression()
-
-    def parse_relational_expression(self) -> ASTNode:
-        """Parse relational expression: SimpleExpr { RelationalOp SimpleExpr }"""
-        left = self.parse_additive_expression()
-        
-        while self.stream.match(TokenType.EQUAL_EQUAL, TokenType.NOT_EQUAL,
-                               TokenType.LESS, TokenType.GREATER,
-                               TokenType.LESS_EQUAL, TokenType.GREATER_EQUAL):
-            op_token = self.stream.advance()
-            right = self.parse_additive_expression()
-            left = BinaryOperation(left, op_token.lexeme, right,
-                                 left.line, left.col)
-        
-        return left
-    
-    def parse_additive_expression(self) -> ASTNode:
-        """Parse additive expression: Term { AdditiveOp Term }"""
-        left = self.parse_multiplicative_expression()
-        
-        # SYSTEMATIC FIX: Remove OR from here - it belongs at lower precedence
-        while self.stream.match(TokenType.PLUS, TokenType.MINUS):  # No more OR here
-            op_token = self.stream.advance()
-            right = self.parse_multiplicative_expression()
-            left = BinaryOperation(left, op_token.lexeme, right,
-                                left.line, left.col)
-        
-        return left
-
-    # UPDATE parse_multiplicative_expression - REMOVE TokenType.AND:
-    def parse_multiplicative_expression(self) -> ASTNode:
-        """Parse multiplicative expression: Factor { MultiplicativeOp Factor }"""
+    def parse_expression(self, min_precedence: int = 1) -> ASTNode:
+        """
+        Parse expression by precedence climbing: CastExpr { BinaryOp CastExpr }.
+        Operators come from BINDING_POWER and are all left-associative, so a
+        chain at one level is a loop and only a tighter-binding right operand recurses
+        """
         left = self.parse_cast_expression()
-        
-        # SYSTEMATIC FIX: Remove AND from here - it belongs at lower precedence
-        while self.stream.match(TokenType.MULTIPLY, TokenType.SLASH, TokenType.MODULO):  # No more AND here
-            op_token = self.stream.advance()
-            right = self.parse_cast_expression()
-            left = BinaryOperation(left, op_token.lexeme, right,
+        stream = self.stream
+        
+        while True:
+            precedence = BINDING_POWER.get(stream.current_type(), 0)
+            if precedence < min_precedence:
+                return left
+            operator = stream.advance_lexeme()
+            right = self.parse_expression(precedence + 1)
+            left = BinaryOperation(left, operator, right,
                                 left.line, left.col)
-        
-        return left
     
     def parse_cast_expression(self) -> ASTNode:
-        """Parse cast expression: UnaryExpr [ 'as' Type ]"""
-        expr = self.parse_unary_expression()
+        """Parse cast expression: UnaryExpr [ 'as' Type ], UnaryExpr ::= { '-' | 'not' } Factor"""
+        stream = self.stream
+        prefix_tokens = []
+        while stream.current_type() in UNARY_OPERATORS:
+            prefix_tokens.append(stream.advance())
+        
+        expr = self.parse_primary_expression()
+        for op_token in reversed(prefix_tokens):
+            expr = UnaryOperation(op_token.lexeme, expr,
+                                op_token.line, op_token.col)
         
         # Handle cast at higher precedence than arithmetic operations
-        if self.stream.match(TokenType.AS):
-            as_token = self.stream.advance()  # consume 'as'
+        if stream.current_type() is TokenType.AS:
+            as_token = stream.advance()  # consume 'as'
             target_type = self.parse_type()
             
             # Add validation for meaningful casts
@@ -474,62 +443,29 @@ class PArLParser:
             expr = CastExpression(expr, target_type, as_token.line, as_token.col)
         
         return expr
-
-    def parse_unary_expression(self) -> ASTNode:
-        """Parse unary expression: ['-' | 'not'] Factor"""
-        if self.stream.match(TokenType.MINUS, TokenType.NOT):
-            op_token = self.stream.advance()
-            operand = self.parse_unary_expression()
-            return UnaryOperation(op_token.lexeme, operand,
-                                op_token.line, op_token.col)
-        
-        return self.parse_primary_expression()
     
     def parse_primary_expression(self) -> ASTNode:
-        """Parse primary expression with array literal support"""
-        current = self.stream.current_token()
-
-        # Add this check at the start:
-        if current.type.name.startswith('ERROR'):
-            raise LexicalErrorInParsingError(current)
-
-        # Array literals
-        if current.type == TokenType.LBRACKET:
-            return self.parse_array_literal()
-        
-        # Literals
-        elif current.type in [TokenType.INT_LITERAL, TokenType.FLOAT_LITERAL,
-                        TokenType.COLOUR_LITERAL, TokenType.TRUE, TokenType.FALSE]:
-            return self.parse_literal()
-        
-        # Built-in functions
-        elif current.type == TokenType.BUILTIN_WIDTH:
-            self.stream.advance()
-            return PadWidth(current.line, current.col)
-        
-        elif current.type == TokenType.BUILTIN_HEIGHT:
-            self.stream.advance()
-            return PadHeight(current.line, current.col)
-        
-        elif current.type == TokenType.BUILTIN_READ:
-            return self.parse_pad_read()
-        
-        elif current.type == TokenType.BUILTIN_RANDI:
-            return self.parse_pad_rand_int()
-        
-        # Identifier (variable, function call, or with array access)
-        elif current.type == TokenType.IDENTIFIER:
-            return self.parse_identifier_with_optional_index()
-        
-        # Parenthesized expression
-        elif current.type == TokenType.LPAREN:
-            self.stream.advance()  # consume '('
+        """
+        Parse primary expression with array literal support (dispatched through PRIMARY_PARSERS).
+        '(' Expr ')' is handled here rather than in its own method, so each nesting
+        level costs no extra Python frame
+        """
+        stream = self.stream
+        if stream.current_type() is TokenType.LPAREN:
+            stream.skip()  # consume '('
             expr = self.parse_expression()
-            self.stream.expect(TokenType.RPAREN, "')' after expression")
+            stream.skip_expected(TokenType.RPAREN, "')' after expression")
             return expr
         
-        else:
+        parse = self.primary_dispatch.get(stream.current_type())
+        
+        if parse is None:
+            current = stream.current_token()
+            if current.type in ERROR_TYPES:
+                raise LexicalErrorInParsingError(current)
             raise UnexpectedTokenError("expression", current)
+        
+        return parse()
     
     def parse_identifier_with_optional_index(self) -> ASTNode:
         """
@@ -546,9 +482,9 @@ class PArLParser:
         
         # Check for array access first (per EBNF, this is part of identifier)
         if self.stream.match(TokenType.LBRACKET):
-            self.stream.advance()  # consume '['
+            self.stream.skip()  # consume '['
             index = self.parse_expression()
-            self.stream.expect(TokenType.RBRACKET, "']' after array index")
+            self.stream.skip_expected(TokenType.RBRACKET, "']' after array index")
             base = IndexAccess(base, index, name_token.line, name_token.col)
         
         # Then check for function call
@@ -566,16 +502,16 @@ class PArLParser:
     
     def parse_function_call_continuation(self, name: str, name_token: Token) -> FunctionCall:
         """Parse function call continuation after identifier: '(' [ActualParams] ')'"""
-        self.stream.expect(TokenType.LPAREN, "'(' for function call")
+        self.stream.skip_expected(TokenType.LPAREN, "'(' for function call")
         
         arguments = []
         if not self.stream.match(TokenType.RPAREN):
             arguments.append(self.parse_expression())
             while self.stream.match(TokenType.COMMA):
-                self.stream.advance()  # consume ','
+                self.stream.skip()  # consume ','
                 arguments.append(self.parse_expression())
         
-        self.stream.expect(TokenType.RPAREN, "')' after function arguments")
+        self.stream.skip_expected(TokenType.RPAREN, "')' after function arguments")
         return FunctionCall(name, arguments, name_token.line, name_token.col)
     
     def parse_literal(self) -> Literal:
@@ -583,36 +519,42 @@ class PArLParser:
         token = self.stream.advance()
         return create_literal_from_token(token)
     
+    def parse_pad_width(self) -> PadWidth:
+        """Parse __width expression"""
+        token = self.stream.advance()
+        return PadWidth(token.line, token.col)
+    
+    def parse_pad_height(self) -> PadHeight:
+        """Parse __height expression"""
+        token = self.stream.advance()
+        return PadHeight(token.line, token.col)
+    
     def parse_pad_read(self) -> PadRead:
         """Parse __read expression: '__read' Expr ',' Expr"""
-        start_token = self.stream.expect(TokenType.BUILTIN_READ)
+        line, col = self.stream.expect_position(TokenType.BUILTIN_READ)
         x = self.parse_comma_separated_expression()
-        self.stream.expect(TokenType.COMMA, "',' after first argument to __read")
+        self.stream.skip_expected(TokenType.COMMA, "',' after first argument to __read")
         y = self.parse_comma_separated_expression()
-        return PadRead(x, y, start_token.line, start_token.col)
+        return PadRead(x, y, line, col)
     
     def parse_pad_rand_int(self) -> PadRandI:
         """Parse __randi expression: '__randi' Expr"""
-        start_token = self.stream.expect(TokenType.BUILTIN_RANDI)
+        line, col = self.stream.expect_position(TokenType.BUILTIN_RANDI)
         max_val = self.parse_comma_separated_expression()
-        return PadRandI(max_val, start_token.line, start_token.col)
+        return PadRandI(max_val, line, col)
     
     def parse_type(self) -> Union[str, ArrayType]:
         """Parse type specification including arrays: 'int' | 'int[5]' | 'int[]'"""
-        token = self.stream.current_token()
-        
-        if token.type in [TokenType.TYPE_INT, TokenType.TYPE_FLOAT,
-                        TokenType.TYPE_BOOL, TokenType.TYPE_COLOUR]:
-            base_type = token.lexeme
-            self.stream.advance()
+        if self.stream.match_set(TYPE_FIRST):
+            base_type = self.stream.advance_lexeme()
             
             # Check for array declaration
             if self.stream.match(TokenType.LBRACKET):
-                self.stream.advance()  # consume '['
+                self.stream.skip()  # consume '['
                 
                 if self.stream.match(TokenType.RBRACKET):
                     # Dynamic array: int[]
-                    self.stream.advance()  # consume ']'
+                    self.stream.skip()  # consume ']'
                     return ArrayType(base_type, None)
                 elif self.stream.match(TokenType.INT_LITERAL):
                     # Fixed-size array: int[5]
@@ -620,14 +562,14 @@ class PArLParser:
                     size = int(size_token.lexeme)
                     if size <= 0:
                         raise ParserError(f"Array size must be positive, got {size}", size_token)
-                    self.stream.expect(TokenType.RBRACKET, "']' after array size")
+                    self.stream.skip_expected(TokenType.RBRACKET, "']' after array size")
                     return ArrayType(base_type, size)
                 else:
                     raise UnexpectedTokenError("array size or ']'", self.stream.current_token())
             
             return base_type
         else:
-            raise UnexpectedTokenError("type (int, float, bool, or colour)", token)
+            raise UnexpectedTokenError("type (int, float, bool, or colour)", self.stream.current_token())
     
     # ===== ERROR HANDLING AND UTILITIES =====
     
@@ -3,9 +3,24 @@ Token Stream Management for PArL Parser
 Provides clean abstraction for token iteration with lookahead support
 """
 
-from typing import List, Optional
-from lexer import Token, TokenType
-from .parser_errors import UnexpectedTokenError, UnexpectedEOFError
+import sys
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+from lexer import Token, TokenBuffer, TokenType
+from lexer.lexer import TOKEN_TYPES
+from .parser_errors import LexicalErrorInParsingError, UnexpectedTokenError, UnexpectedEOFError
+
+# Tokens the parser never sees
+TRIVIA_TYPES = frozenset({TokenType.WHITESPACE, TokenType.NEWLINE,
+                          TokenType.LINECOMMENT, TokenType.BLOCKCOMMENT})
+
+# Lexer error tokens (ERROR, ERROR_INVALID_FLOAT, ...)
+ERROR_TYPES = frozenset(t for t in TokenType if t.name.startswith('ERROR'))
+
+# Statement boundaries used for error recovery
+SYNC_TYPES = frozenset({TokenType.SEMICOLON, TokenType.LBRACE, TokenType.RBRACE,
+                        TokenType.LET, TokenType.FUN, TokenType.IF, TokenType.WHILE,
+                        TokenType.FOR, TokenType.RETURN, TokenType.END})
 
 
 class TokenStream:
@@ -13,12 +28,16 @@ class TokenStream:
     
     def __init__(self, tokens: List[Token]):
         # Filter out comments and whitespace, but keep error tokens for handling
-        self.tokens = [t for t in tokens if t.type not in 
-                      [TokenType.WHITESPACE, TokenType.NEWLINE, 
-                       TokenType.LINECOMMENT, TokenType.BLOCKCOMMENT]]
+        self.tokens = [t for t in tokens if t.type not in TRIVIA_TYPES]
         self.position = 0
         self.errors = []
     
+    def current_type(self) -> TokenType:
+        """Get current token type"""
+        if self.position < len(self.tokens):
+            return self.tokens[self.position].type
+        return self.current_token().type
+    
     def current_token(self) -> Token:
         """Get current token"""
         if self.position < len(self.tokens):
@@ -40,21 +59,32 @@ class TokenStream:
             self.position += 1
         return current
     
+    def skip(self):
+        """Move to next token without returning the current one (for tokens the AST does not keep)"""
+        if self.position < len(self.tokens) - 1:
+            self.position += 1
+    
+    def advance_lexeme(self) -> str:
+        """Move to next token and return the current one's lexeme (for operators)"""
+        return self.advance().lexeme
+    
     def match(self, *token_types: TokenType) -> bool:
         """Check if current token matches any of the given types"""
-        current = self.current_token()
-        return current.type in token_types
+        return self.current_type() in token_types
+    
+    def match_set(self, token_types: frozenset) -> bool:
+        """Check if current token's type is in a precomputed set (e.g. a FIRST set)"""
+        return self.current_type() in token_types
     
     def expect(self, token_type: TokenType, context: str = None) -> Token:
         """Consume token if it matches expected type, otherwise raise error"""
         current = self.current_token()
         
         # Check for lexical errors first
-        if current.type.name.startswith('ERROR'):
-            from parser_errors import LexicalErrorInParsingError
+        if current.type in ERROR_TYPES:
             raise LexicalErrorInParsingError(current)
         
-        if self.match(token_type):
+        if current.type is token_type:
             return self.advance()
         
         # Create descriptive error message
@@ -65,9 +95,21 @@ class TokenStream:
         else:
             raise UnexpectedTokenError(expected_name, current)
     
+    def skip_expected(self, token_type: TokenType, context: str = None):
+        """expect() for tokens the AST does not keep (punctuation): nothing is returned"""
+        if self.current_type() is token_type:
+            self.skip()
+        else:
+            self.expect(token_type, context)  # raises the error for the current token
+    
+    def expect_position(self, token_type: TokenType, context: str = None) -> Tuple[int, int]:
+        """expect() for tokens the AST only takes a position from (keywords, '{'): returns (line, col)"""
+        token = self.expect(token_type, context)
+        return token.line, token.col
+    
     def at_end(self) -> bool:
         """Check if we're at the end of tokens"""
-        return self.current_token().type == TokenType.END
+        return self.current_type() == TokenType.END
     
     def consume_if_match(self, *token_types: TokenType) -> Optional[Token]:
         """Consume and return token if it matches any given type, otherwise return None"""
@@ -77,19 +119,13 @@ class TokenStream:
     
     def synchronize_on_error(self):
         """Skip tokens until we find a statement boundary for error recovery"""
-        sync_tokens = {
-            TokenType.SEMICOLON, TokenType.LBRACE, TokenType.RBRACE,
-            TokenType.LET, TokenType.FUN, TokenType.IF, TokenType.WHILE,
-            TokenType.FOR, TokenType.RETURN, TokenType.END
-        }
-        
         while not self.at_end():
-            current = self.current_token()
-            if current.type in sync_tokens:
-                if current.type == TokenType.SEMICOLON:
-                    self.advance()  # consume the semicolon
+            current_type = self.current_type()
+            if current_type in SYNC_TYPES:
+                if current_type == TokenType.SEMICOLON:
+                    self.skip()  # consume the semicolon
                 break
-            self.advance()
+            self.skip()
     
     def get_context_info(self, context_size: int = 3) -> str:
         """Get context information around current position for debugging"""
@@ -102,4 +138,152 @@ class TokenStream:
             token = self.tokens[i]
             context_tokens.append(f"{marker}{token.type.name}: '{token.lexeme}'")
         
-        return "\n".join(context_tokens)
\ No newline at end of file
+        return "\n".join(context_tokens)
+
+
+class BufferedTokenStream(TokenStream):
+    """
+    TokenStream over a lazy token iterator (e.g. FSALexer.iter_tokens)
+    Only a bounded lookahead window and a short history are kept in memory
+    """
+    
+    def __init__(self, tokens: Iterable[Token], history_size: int = 3):
+        self.source = (t for t in tokens if t.type not in TRIVIA_TYPES)
+        self.lookahead = deque()
+        self.history = deque(maxlen=history_size)
+        self.position = 0
+        self.errors = []
+    
+    def _fill(self, count: int):
+        """Pull tokens from the source until count tokens are buffered (or it is exhausted)"""
+        while len(self.lookahead) < count:
+            token = next(self.source, None)
+            if token is None:
+                break
+            self.lookahead.append(token)
+    
+    def current_token(self) -> Token:
+        """Get current token"""
+        return self.peek(0)
+    
+    def current_type(self) -> TokenType:
+        """Get current token type"""
+        return self.peek(0).type
+    
+    def peek(self, offset: int = 1) -> Token:
+        """Look ahead at token with given offset (default 1 for next token)"""
+        self._fill(offset + 1)
+        if offset < len(self.lookahead):
+            return self.lookahead[offset]
+        # Past the end: the last token (should be END), as in TokenStream
+        if self.lookahead:
+            return self.lookahead[-1]
+        return self.history[-1] if self.history else Token(TokenType.END, "", 0, 0)
+    
+    def skip(self):
+        """Move to next token without returning the current one"""
+        self.advance()
+    
+    def advance(self) -> Token:
+        """Move to next token and return the current one"""
+        current = self.current_token()
+        self._fill(2)
+        if len(self.lookahead) > 1:
+            self.history.append(self.lookahead.popleft())
+            self.position += 1
+        return current
+    
+    def get_context_info(self, context_size: int = 3) -> str:
+        """Get context information around current position for debugging"""
+        self._fill(context_size + 1)
+        before = list(self.history)[-context_size:] if context_size else []
+        after = list(self.lookahead)[:context_size + 1]
+        
+        context_tokens = []
+        for i, token in enumerate(before + after):
+            marker = " >> " if i == len(before) else "    "
+            context_tokens.append(f"{marker}{token.type.name}: '{token.lexeme}'")
+        
+        return "\n".join(context_tokens)
+
+
+class ColumnarTokenStream(TokenStream):
+    """
+    TokenStream over a columnar TokenBuffer
+    Types are read straight from the buffer's type-code array, so matching,
+    skipping and expecting punctuation build no Token; one is materialized
+    only for the tokens the parser returns (names, literals, node positions)
+    """
+    
+    def __init__(self, tokens: TokenBuffer):
+        self.tokens = tokens.without_trivia()
+        if not len(self.tokens):
+            self.tokens = TokenBuffer(tokens.source, tokens.line_index)
+            self.tokens.append(TokenType.END, len(tokens.source), 0)
+        self.codes = self.tokens.types
+        self.offsets = self.tokens.offsets
+        self.line_index = self.tokens.line_index
+        self.last = len(self.codes) - 1  # advancing stops on the final (END) token
+        self.position = 0
+        self.errors = []
+    
+    def current_type(self) -> TokenType:
+        """Get current token type (no Token is materialized)"""
+        return TOKEN_TYPES[self.codes[self.position]]
+    
+    def current_token(self) -> Token:
+        """Get current token"""
+        return self.tokens[self.position]
+    
+    def peek(self, offset: int = 1) -> Token:
+        """Look ahead at token with given offset (default 1 for next token)"""
+        return self.tokens[min(self.position + offset, self.last)]
+    
+    def advance(self) -> Token:
+        """Move to next token and return the current one"""
+        position = self.position
+        if position < self.last:
+            self.position = position + 1
+        return self.tokens[position]
+    
+    def skip(self):
+        """Move to next token without returning (or materializing) the current one"""
+        if self.position < self.last:
+            self.position += 1
+    
+    def advance_lexeme(self) -> str:
+        """Move to next token and return the current one's lexeme (sliced from the source, interned like Token's)"""
+        position = self.position
+        if position < self.last:
+            self.position = position + 1
+        return sys.intern(self.tokens.lexeme_at(position))
+    
+    def match(self, *token_types: TokenType) -> bool:
+        """Check if current token matches any of the given types"""
+        return TOKEN_TYPES[self.codes[self.position]] in token_types
+    
+    def match_set(self, token_types: frozenset) -> bool:
+        """Check if current token's type is in a precomputed set (e.g. a FIRST set)"""
+        return TOKEN_TYPES[self.codes[self.position]] in token_types
+    
+    def expect(self, token_type: TokenType, context: str = None) -> Token:
+        """Consume token if it matches expected type, otherwise raise error"""
+        if TOKEN_TYPES[self.codes[self.position]] is token_type:
+            return self.advance()
+        return super().expect(token_type, context)  # raises the error for the current token
+    
+    def skip_expected(self, token_type: TokenType, context: str = None):
+        """expect() for tokens the AST does not keep: no Token is materialized unless it is an error"""
+        if TOKEN_TYPES[self.codes[self.position]] is not token_type:
+            self.expect(token_type, context)  # raises the error expect() would
+        elif self.position < self.last:
+            self.position += 1
+    
+    def expect_position(self, token_type: TokenType, context: str = None) -> Tuple[int, int]:
+        """expect() returning (line, col) resolved from the token's offset, without a Token"""
+        position = self.position
+        if TOKEN_TYPES[self.codes[position]] is not token_type:
+            return super().expect_position(token_type, context)  # raises the error for the current token
+        if position < self.last:
+            self.position = position + 1
+        return self.line_index.position(self.offsets[position])
@@ -6,6 +6,7 @@ Complete modulo support and enhanced type checking
 from typing import Dict, List, Optional, Set, Any, Union
 from enum import Enum, auto
 from parser.ast_nodes import *
+from parser.ast_walker import evaluate
 from parser.parser_errors import ParserError
 
 
@@ -273,6 +274,37 @@ class SemanticAnalyzer:
     Performs type checking, scope management, and semantic validation
     """
     
+    # Visit method per node class (resolved once per analyzer class)
+    STATEMENT_VISITORS = Dispatcher({
+        VariableDeclaration: "visit_variable_declaration",
+        Assignment: "visit_assignment",
+        IfStatement: "visit_if_statement",
+        WhileStatement: "visit_while_statement",
+        ForStatement: "visit_for_statement",
+        ReturnStatement: "visit_return_statement",
+        PrintStatement: "visit_print_statement",
+        DelayStatement: "visit_delay_statement",
+        WriteStatement: "visit_write_statement",
+        WriteBoxStatement: "visit_write_box_statement",
+        ClearStatement: "visit_clear_statement",
+        Block: "visit_block",
+        FunctionCall: "visit_expression",
+    })
+    EXPRESSION_VISITORS = Dispatcher({
+        BinaryOperation: "visit_binary_operation",
+        UnaryOperation: "visit_unary_operation",
+        CastExpression: "visit_cast_expression",
+        FunctionCall: "visit_function_call",
+        ArrayLiteral: "visit_array_literal",
+        IndexAccess: "visit_index_access",
+        Literal: "visit_literal",
+        Identifier: "visit_identifier",
+        PadWidth: "visit_pad_width",
+        PadHeight: "visit_pad_height",
+        PadRead: "visit_pad_read",
+        PadRandI: "visit_pad_rand_i",
+    })
+    
     def __init__(self):
         self.symbol_table = SymbolTable()
         self.errors: List[SemanticError] = []
@@ -358,7 +390,7 @@ class SemanticAnalyzer:
                 self.errors.append(e)
         
         # Analyze function body
-        self.visit_block(node.body)
+        self.visit_statement(node.body)
         
         # Check return statement requirements
         if node.return_type != "void" and not self.function_has_return:
@@ -376,41 +408,26 @@ class SemanticAnalyzer:
         self.symbol_table.enter_scope()
         
         for stmt in node.statements:
-            self.visit_statement(stmt)
+            yield stmt
         
         self.symbol_table.exit_scope()
     
     def visit_statement(self, node: ASTNode):
-        """Dispatch statement visits"""
-        if isinstance(node, VariableDeclaration):
-            self.visit_variable_declaration(node)
-        elif isinstance(node, Assignment):
-            self.visit_assignment(node)
-        elif isinstance(node, IfStatement):
-            self.visit_if_statement(node)
-        elif isinstance(node, WhileStatement):
-            self.visit_while_statement(node)
-        elif isinstance(node, ForStatement):
-            self.visit_for_statement(node)
-        elif isinstance(node, ReturnStatement):
-            self.visit_return_statement(node)
-        elif isinstance(node, PrintStatement):
-            self.visit_print_statement(node)
-        elif isinstance(node, DelayStatement):
-            self.visit_delay_statement(node)
-        elif isinstance(node, WriteStatement):
-            self.visit_write_statement(node)
-        elif isinstance(node, WriteBoxStatement):
-            self.visit_write_box_statement(node)
-        elif isinstance(node, ClearStatement):
-            self.visit_clear_statement(node)
-        elif isinstance(node, Block):
-            self.visit_block(node)
-        elif isinstance(node, FunctionCall):
-            self.visit_function_call(node)
-        else:
+        """
+        Dispatch statement visits. Visitors of statements holding blocks are
+        generators that yield each nested statement, run by evaluate() so that
+        deeply nested blocks need no recursion either
+        """
+        evaluate(self._visit_statement_node, node)
+    
+    def _visit_statement_node(self, node: ASTNode):
+        """Check a simple statement, or return the generator checking a compound one"""
+        visit = self.STATEMENT_VISITORS.lookup(self, node.__class__)
+        if visit is None:
             self._add_error(SemanticErrorType.TYPE_MISMATCH,
                           f"Unknown statement type: {type(node).__name__}", node)
+            return None
+        return visit(self, node)
     
     def visit_variable_declaration(self, node: VariableDeclaration):
         """Visit variable declaration with array support"""
@@ -551,9 +568,9 @@ class SemanticAnalyzer:
                           node.condition)
         
         # Visit branches
-        self.visit_block(node.then_block)
+        yield node.then_block
         if node.else_block:
-            self.visit_block(node.else_block)
+            yield node.else_block
     
     def visit_while_statement(self, node: WhileStatement):
         """Visit while statement"""
@@ -565,7 +582,7 @@ class SemanticAnalyzer:
                           node.condition)
         
         # Visit body
-        self.visit_block(node.body)
+        yield node.body
     
     def visit_for_statement(self, node: ForStatement):
         """Visit for statement"""
@@ -587,7 +604,7 @@ class SemanticAnalyzer:
             self.visit_assignment(node.update)
         
         # Visit body
-        self.visit_block(node.body)
+        yield node.body
         
         self.symbol_table.exit_scope()
     
@@ -681,42 +698,28 @@ class SemanticAnalyzer:
                           f"__clear expects colour, got '{color_type}'", node)
     
     def visit_expression(self, node: ASTNode) -> Optional[Union[str, ArrayType]]:
-        """Visit expression and return its type"""
-        if isinstance(node, BinaryOperation):
-            return self.visit_binary_operation(node)
-        elif isinstance(node, UnaryOperation):
-            return self.visit_unary_operation(node)
-        elif isinstance(node, CastExpression):
-            return self.visit_cast_expression(node)
-        elif isinstance(node, FunctionCall):
-            return self.visit_function_call(node)
-        elif isinstance(node, ArrayLiteral):
-            return self.visit_array_literal(node)
-        elif isinstance(node, IndexAccess):
-            return self.visit_index_access(node)
-        elif isinstance(node, Literal):
-            return self.visit_literal(node)
-        elif isinstance(node, Identifier):
-            return self.visit_identifier(node)
-        elif isinstance(node, PadWidth):
-            return "int"
-        elif isinstance(node, PadHeight):
-            return "int"
-        elif isinstance(node, PadRead):
-            return self.visit_pad_read(node)
-        elif isinstance(node, PadRandI):
-            return self.visit_pad_rand_i(node)
-        else:
+        """
+        Visit expression and return its type. Visitors of composite expressions
+        are generators that yield each operand and get its type back, run by
+        evaluate() so that deeply nested expressions need no recursion
+        """
+        return evaluate(self._visit_expression_node, node)
+    
+    def _visit_expression_node(self, node: ASTNode):
+        """Type of a leaf expression, or the generator checking a composite one"""
+        visit = self.EXPRESSION_VISITORS.lookup(self, node.__class__)
+        if visit is None:
             self._add_error(SemanticErrorType.TYPE_MISMATCH,
                         f"Unknown expression type: {type(node).__name__}", node)
             return None
-        
+        return visit(self, node)
+    
     def visit_binary_operation(self, node: BinaryOperation) -> Optional[str]:
         """
         Visit binary operation - SYSTEMATIC MODULO SUPPORT
         """
-        left_type = self.visit_expression(node.left)
-        right_type = self.visit_expression(node.right)
+        left_type = yield node.left
+        right_type = yield node.right
 
         # Both operands must have valid types to proceed
         if not left_type or not right_type:
@@ -750,7 +753,7 @@ class SemanticAnalyzer:
     
     def visit_unary_operation(self, node: UnaryOperation) -> Optional[str]:
         """Visit unary operation"""
-        operand_type = self.visit_expression(node.operand)
+        operand_type = yield node.operand
         
         if not operand_type:
             return None
@@ -769,7 +772,7 @@ class SemanticAnalyzer:
     
     def visit_cast_expression(self, node: CastExpression) -> Optional[str]:
         """Visit cast expression"""
-        expr_type = self.visit_expression(node.expression)
+        expr_type = yield node.expression
         target_type = node.target_type
 
         if expr_type is None:
@@ -805,7 +808,7 @@ class SemanticAnalyzer:
         
         # Check argument types (including arrays)
         for i, (arg, expected_type) in enumerate(zip(node.arguments, func_symbol.parameter_types)):
-            actual_type = self.visit_expression(arg)
+            actual_type = yield arg
             if actual_type and not TypeChecker.types_equal(actual_type, expected_type):
                 # Better error messages for array mismatches
                 if isinstance(expected_type, ArrayType) and not isinstance(actual_type, ArrayType):
@@ -827,6 +830,14 @@ class SemanticAnalyzer:
         """Visit literal"""
         return node.literal_type
     
+    def visit_pad_width(self, node: PadWidth) -> str:
+        """Visit __width built-in"""
+        return "int"
+    
+    def visit_pad_height(self, node: PadHeight) -> str:
+        """Visit __height built-in"""
+        return "int"
+    
     def visit_identifier(self, node: Identifier) -> Optional[str]:
         """Visit identifier"""
         symbol = self.symbol_table.lookup_variable(node.name)
@@ -840,8 +851,8 @@ class SemanticAnalyzer:
     
     def visit_pad_read(self, node: PadRead) -> Optional[str]:
         """Visit __read built-in"""
-        x_type = self.visit_expression(node.x)
-        y_type = self.visit_expression(node.y)
+        x_type = yield node.x
+        y_type = yield node.y
         
         if x_type and x_type != "int":
             self._add_error(SemanticErrorType.INVALID_BUILTIN_ARGS,
@@ -854,7 +865,7 @@ class SemanticAnalyzer:
     
     def visit_pad_rand_i(self, node: PadRandI) -> Optional[str]:
         """Visit __randi built-in"""
-        max_type = self.visit_expression(node.max_val)
+        max_type = yield node.max_val
         
         if max_type and max_type != "int":
             self._add_error(SemanticErrorType.INVALID_BUILTIN_ARGS,
@@ -870,13 +881,13 @@ class SemanticAnalyzer:
             return None
         
         # Determine element type from first element
-        first_type = self.visit_expression(node.elements[0])
+        first_type = yield node.elements[0]
         if not first_type:
             return None
         
         # Check all elements have same type
         for i, elem in enumerate(node.elements[1:], 1):
-            elem_type = self.visit_expression(elem)
+            elem_type = yield elem
             if elem_type and not TypeChecker.types_equal(elem_type, first_type):
                 self._add_error(SemanticErrorType.TYPE_MISMATCH,
                             f"Array element {i} type mismatch: expected '{first_type}', got '{elem_type}'", elem)
@@ -898,7 +909,7 @@ class SemanticAnalyzer:
                 return None
             
             # Check index type
-            index_type = self.visit_expression(node.index)
+            index_type = yield node.index
             if index_type and index_type != "int":
                 self._add_error(SemanticErrorType.TYPE_MISMATCH,
                             f"Array index must be int, got '{index_type}'", node.index)
@@ -60,7 +60,9 @@ def main():
                 ("test_task4.py", "Task 4 - Code Generation Tests"),
                 ("test_task5.py", "Task 5 - Array Tests"),
                 ("test_assignment.py", "Assignment Examples"),
-                ("test_simulator.py", "Simulator Test Programs")
+                ("test_simulator.py", "Simulator Test Programs"),
+                ("test_driver.py", "Compiler Driver Tests"),
+                ("test_vm.py", "PArIR Virtual Machine Tests")
             ]
             
             results = []
@@ -90,6 +92,8 @@ def main():
             print("- test_outputs/task_5/     - Array functionality results")
             print("- test_outputs/assignment/ - Assignment example results")
             print("- test_outputs/simulator/  - Simulator programs + PArIR files")
+            print("- test_outputs/driver/     - Compiler driver results")
+            print("- test_outputs/vm/         - PArIR virtual machine results")
             
             print("\nAll test suites have been processed with quality focus")
             print("Each test is numbered and clearly identified by purpose")
@@ -0,0 +1,258 @@
+"""
+Compiler Driver Tests
+Tests the parlc batch driver: process pool fan-out, deterministic ordering,
+written PArIR output and per-file error summaries
+"""
+
+import sys
+import os
+import tempfile
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parlc.cache import CompilationCache
+from parlc.driver import CompileOptions, compile_files, compile_source, format_summary
+from test.test_utils import (print_test_header, print_completion_status, set_ast_printing,
+                           create_test_output_file, close_test_output_file, write_to_file,
+                           reset_test_counter)
+
+if "--show-ast" in sys.argv:
+    set_ast_printing(True)
+else:
+    set_ast_printing(False)
+
+PROGRAMS = [
+    ("square.parl", """
+    fun square(x:int) -> int {
+        return x * x;
+    }
+    __print square(7);
+    """),
+    ("syntax_error.parl", "let x:int = 5 +;"),
+    ("loop.parl", """
+    for (let i:int = 0; i < 3; i = i + 1) {
+        __write i, i, #FF0000;
+    }
+    """),
+    ("type_error.parl", "let flag:bool = 3;"),
+    ("lexical_error.parl", "let f:float = 2.;"),
+    ("box.parl", "__write_box 1, 2, 3, 4, #00FF00;"),
+]
+
+
+def write_programs(directory):
+    """Write the test programs to directory and return their paths in order"""
+    paths = []
+    for name, source in PROGRAMS:
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+        paths.append(path)
+    return paths
+
+
+def test_parallel_batch_compilation():
+    """Test 1: Parallel Batch Compilation
+    Purpose: Verify pooled compilation keeps input order and matches in-process output
+    """
+    create_test_output_file("driver", "Parallel Batch Compilation")
+
+    print_test_header("Parallel Batch Compilation",
+                     "Tests compile_files over a process pool against sequential compilation")
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_programs(directory)
+        output_dir = os.path.join(directory, "out")
+        options = CompileOptions(output_dir=output_dir)
+
+        sequential = compile_files(paths, options, jobs=1)
+        pooled = compile_files(paths, options, jobs=2)
+
+        order_correct = [r.path for r in pooled] == paths
+        write_to_file(f"Results in input order: {order_correct}")
+
+        outputs_match = True
+        for seq, par in zip(sequential, pooled):
+            same = (seq.instructions == par.instructions and seq.failed_stage == par.failed_stage)
+            write_to_file(f"{os.path.basename(par.path):<20} "
+                          f"{'ok' if par.success else par.failed_stage:<10} "
+                          f"{'identical' if same else 'MISMATCH'}")
+            if not same:
+                outputs_match = False
+
+        files_written = True
+        for result in pooled:
+            if result.success:
+                with open(result.output_path, encoding="utf-8") as f:
+                    written = f.read().splitlines()
+                expected = compile_source(dict(PROGRAMS)[os.path.basename(result.path)]).instructions
+                if written != expected:
+                    files_written = False
+        write_to_file(f"PArIR files written to output directory: {files_written}")
+
+    success = order_correct and outputs_match and files_written
+
+    if success:
+        write_to_file("\nPooled compilation is deterministic and matches sequential compilation")
+    else:
+        write_to_file("\nPooled compilation diverges from sequential compilation")
+
+    print_completion_status("Batch Compilation", success)
+    close_test_output_file()
+    return success
+
+
+def test_error_summary_reporting():
+    """Test 2: Error Summary Reporting
+    Purpose: Verify each failing file reports its failing stage, errors and timings
+    """
+    create_test_output_file("driver", "Error Summary Reporting")
+
+    print_test_header("Error Summary Reporting",
+                     "Tests per-file stage, error and timing information in the batch summary")
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_programs(directory)
+        paths.append(os.path.join(directory, "missing.parl"))
+        results = compile_files(paths, CompileOptions(write_output=False), jobs=2)
+
+    expected_stages = [None, "parse", None, "semantic", "lex", None, "read"]
+    stages = [result.failed_stage for result in results]
+    stages_correct = stages == expected_stages
+    write_to_file(f"Failed stages: {stages}")
+
+    errors_reported = all(bool(result.errors) != result.success for result in results)
+    timings_recorded = all("lex" in result.timings for result in results if result.failed_stage != "read")
+
+    summary = format_summary(results, 0.0)
+    write_to_file("\nSUMMARY:")
+    write_to_file(summary)
+    summary_correct = "7 file(s), 3 compiled, 4 failed" in summary
+
+    success = stages_correct and errors_reported and timings_recorded and summary_correct
+
+    if success:
+        write_to_file("\nErrors and timings reported for every file")
+    else:
+        write_to_file("\nError summary is incomplete")
+
+    print_completion_status("Error Summary", success)
+    close_test_output_file()
+    return success
+
+
+def test_compilation_cache():
+    """Test 3: Compilation Cache
+    Purpose: Verify cached rebuilds reuse PArIR, keys track source/options and LRU eviction bounds size
+    """
+    create_test_output_file("driver", "Compilation Cache")
+
+    print_test_header("Compilation Cache",
+                     "Tests warm rebuild hits, cache keys, hit/miss statistics and LRU eviction")
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_programs(directory)
+        cache_dir = os.path.join(directory, "cache")
+        options = CompileOptions(write_output=False, cache_dir=cache_dir)
+
+        cold = compile_files(paths, options, jobs=2)
+        warm = compile_files(paths, options, jobs=2)
+
+        cold_hits = [r.cache_hit for r in cold]
+        warm_hits = [r.cache_hit for r in warm]
+        write_to_file(f"Cold build cache hits: {cold_hits}")
+        write_to_file(f"Warm build cache hits: {warm_hits}")
+        # Only successful compilations are cached
+        hits_correct = (not any(cold_hits) and
+                        warm_hits == [r.success for r in cold])
+        outputs_match = all(c.instructions == w.instructions for c, w in zip(cold, warm))
+        write_to_file(f"Warm build output identical: {outputs_match}")
+
+        cache = CompilationCache(cache_dir)
+        source = dict(PROGRAMS)["square.parl"]
+        key = cache.key(source, options.fingerprint())
+        keys_correct = (key != cache.key(source + " ", options.fingerprint()) and
+                        key != cache.key(source, options.fingerprint() + "O1") and
+                        key == cache.key(source, CompileOptions(lexer_engine="regex").fingerprint()))
+        write_to_file(f"Keys follow source and code generation options only: {keys_correct}")
+
+        cache.get(key)
+        cache.get("0" * 64)
+        stats_correct = (cache.stats.hits, cache.stats.misses) == (1, 1)
+        write_to_file(f"Statistics: {cache.stats.hits} hit(s), {cache.stats.misses} miss(es)")
+
+        # Bound the cache to roughly one entry: the most recently used one survives
+        entries = sorted(cache.entries())
+        for age, (_, _, path) in enumerate(entries):
+            os.utime(path, (1000 - age, 1000 - age))  # first entry becomes the most recent
+        small = CompilationCache(cache_dir, max_bytes=max(size for _, size, _ in entries))
+        removed = small.evict()
+        remaining = [path for _, _, path in small.entries()]
+        eviction_correct = (removed == len(entries) - 1 and remaining == [entries[0][2]])
+        write_to_file(f"LRU eviction removed {removed} of {len(entries)} entries, kept most recent: "
+                      f"{eviction_correct}")
+
+        # A cache directory that cannot be created only disables caching
+        blocker = os.path.join(directory, "notadir")
+        with open(blocker, "w") as f:
+            f.write("")
+        unusable = CompileOptions(write_output=False, cache_dir=os.path.join(blocker, "cache"))
+        try:
+            degraded = compile_files(paths, unusable, jobs=2)
+            unusable_ignored = [r.success for r in degraded] == [r.success for r in cold]
+        except OSError as e:
+            write_to_file(f"Unusable cache directory raised: {e}")
+            unusable_ignored = False
+        broken = CompilationCache(os.path.join(blocker, "cache"))
+        broken.put(key, ["halt"])
+        unusable_ignored = unusable_ignored and (broken.stats.writes, broken.stats.failed_writes) == (0, 1)
+        write_to_file(f"Unusable cache directory compiles uncached, counted as a failed write: {unusable_ignored}")
+
+    success = (hits_correct and outputs_match and keys_correct and stats_correct and eviction_correct and
+               unusable_ignored)
+
+    if success:
+        write_to_file("\nCompilation cache working correctly")
+    else:
+        write_to_file("\nCompilation cache is incorrect")
+
+    print_completion_status("Compilation Cache", success)
+    close_test_output_file()
+    return success
+
+
+def run_driver_tests():
+    """Run all compiler driver tests"""
+    reset_test_counter()
+
+    print("COMPILER DRIVER TESTS")
+    print("="*80)
+
+    results = []
+
+    results.append(("Parallel Batch Compilation", test_parallel_batch_compilation()))
+    results.append(("Error Summary Reporting", test_error_summary_reporting()))
+    results.append(("Compilation Cache", test_compilation_cache()))
+
+    # Summary
+    print("\nDRIVER TESTS SUMMARY")
+    print("="*80)
+
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASSED" if result else "FAILED"
+        print(f"{test_name:<50} {status}")
+
+    print("-"*80)
+    print(f"Passed: {passed}/{total}")
+    print("Check test_outputs/driver/ for detailed results")
+
+    return passed == total
+
+
+if __name__ == "__main__":
+    success = run_driver_tests()
+    sys.exit(0 if success else 1)
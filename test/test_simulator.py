@@ -14,6 +14,8 @@ from lexer.lexer import FSALexer
 from parser.parser import PArLParser
 from semantic_analyzer.semantic_analyzer import SemanticAnalyzer
 from code_generator.code_generator import PArIRGenerator
+from parlc.driver import CompileOptions, compile_source
+from vm.headless import compare_golden, load_golden, run_headless, save_golden
 from test.test_utils import (print_test_header, print_ast, print_completion_status, set_ast_printing, 
                            create_test_output_file, close_test_output_file, write_to_file, 
                            create_parir_output_file, reset_test_counter)
@@ -23,6 +25,148 @@ if "--show-ast" in sys.argv:
 else:
     set_ast_printing(False)
 
+# Rewrite the stored golden frames instead of comparing against them
+UPDATE_GOLDENS = "--update-goldens" in sys.argv
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "goldens", "simulator")
+GOLDEN_FRAMES = 32
+GOLDEN_SEED = 2000
+# Optimized builds must draw exactly the goldens of the plain build
+GOLDEN_OPTIMIZATIONS = [("-O1", CompileOptions(opt_level=1)),
+                        ("elide", CompileOptions(elide_empty_frames=True)),
+                        ("hoist", CompileOptions(hoist_loop_frames=True)),
+                        ("fold", CompileOptions(fold_constants=True))]
+
+# PArL sources of the simulator programs, by test name (also used by benchmarks.bench_vm)
+SIMULATOR_PROGRAMS = {
+    "Basic Color Cycling Animation": """
+    let c:colour = 0 as colour;
+
+    for (let i:int = 0; i < 64; i = i + 1) {
+        c = (__randi 16777216) as colour;
+        __clear c;
+        __delay 16;
+    }
+    """,
+
+    "Random Color Generation and Display": """
+    fun color() -> colour {
+        return (__randi 16384257 - #f9f9f9 as int) as colour;
+    }
+
+    fun cc(x:int, y:int) -> bool {
+        __print x;
+        __print y;
+
+        let c:colour = color();
+        let h:int = __randi __height;
+        let w:int = __randi __width;
+        __write w, h, c;
+
+        return true;
+    }
+
+    let a:bool = cc(0, 0);
+    __delay 1000;
+    """,
+
+    "Random Pixel Display": """
+    fun color() -> colour {
+        return (16777215 - __randi 16777215) as colour;
+    }
+
+    fun cc(x:int, y:int) -> bool {
+        __print x;
+        __print y;
+
+        let c:colour = color();
+        let h:int = __randi __height;
+        let w:int = __randi __width;
+        __write w, h, c;
+
+        return true;
+    }
+
+    let a:bool = cc(0, 0);
+    __delay 1000;
+    """,
+
+    "Color Animation While Loop": """
+    fun color() -> colour {
+        return (16777215 - __randi 16777215) as colour;
+    }
+
+    fun cc(x:int, y:int, iter:int) -> bool {
+        __print x;
+        __print y;
+        __print iter;
+        while (iter > 0) {
+            let c:colour = color();
+            let w:int = __randi __width;
+            let h:int = __randi __height;
+            __write w, h, c;
+            iter = iter - 1;
+        }
+        return true;
+    }
+
+    let a:bool = cc(0, 0, 100000);
+    __delay 1000;
+    """,
+
+    "Rainbow Pattern": """
+    fun draw_pattern(offset:int) -> bool {
+        let colors:colour[] = [#FF0000, #FF7F00, #FFFF00, #00FF00, #0000FF, #4B0082, #9400D3];
+
+        for (let x:int = 0; x < __width; x = x + 3) {
+            for (let y:int = 0; y < __height; y = y + 3) {                        
+                let colorIndex:int = (x + y + offset) % 7;
+                __write_box x, y, 2, 2, colors[colorIndex];
+            }
+        }
+
+        return true;
+    }
+
+    let offset:int = 0;
+    let r:bool = false;
+
+    while (true) {
+        r = draw_pattern(offset);
+        offset = offset + 1;
+        __delay 10;
+    }
+    """,
+
+    "Moving Checkerboard": """
+    // Simple moving checkerboard pattern
+    let size:int = 4;  // Size of each square
+    let frame:int = 0;
+    
+    while (frame < 200) {
+        for (let x:int = 0; x < __width; x = x + size) {
+            for (let y:int = 0; y < __height; y = y + size) {
+                // Create checkerboard pattern with animation
+                let checker:int = ((x / size) + (y / size) + frame) % 2;
+                
+                let color:colour = #000000;
+                if (checker == 0) {
+                    color = #FFFFFF;  // White
+                } else {
+                    color = #000000;  // Black
+                }
+                
+                __write_box x, y, size, size, color;
+            }
+        }
+        
+        frame = frame + 1;
+        __delay 100;
+    }
+    """,
+}
+
+
 def compile_program(source_code):
     """Complete compilation pipeline"""
     # Lexical analysis
@@ -61,15 +205,7 @@ def test_basic_color_animation():
     print_test_header("Basic Color Cycling Animation",
                      "Simple animation loop suitable for simulator execution")
     
-    test_code = """
-    let c:colour = 0 as colour;
-
-    for (let i:int = 0; i < 64; i = i + 1) {
-        c = (__randi 16777216) as colour;
-        __clear c;
-        __delay 16;
-    }
-    """
+    test_code = SIMULATOR_PROGRAMS["Basic Color Cycling Animation"]
     
     write_to_file("INPUT PROGRAM:")
     write_to_file(test_code)
@@ -106,26 +242,7 @@ def test_random_color_generation():
     print_test_header("Random Color Generation and Display",
                      "Random color generation and display")
     
-    test_code = """
-    fun color() -> colour {
-        return (__randi 16384257 - #f9f9f9 as int) as colour;
-    }
-
-    fun cc(x:int, y:int) -> bool {
-        __print x;
-        __print y;
-
-        let c:colour = color();
-        let h:int = __randi __height;
-        let w:int = __randi __width;
-        __write w, h, c;
-
-        return true;
-    }
-
-    let a:bool = cc(0, 0);
-    __delay 1000;
-    """
+    test_code = SIMULATOR_PROGRAMS["Random Color Generation and Display"]
     
     write_to_file("INPUT PROGRAM:")
     write_to_file(test_code)
@@ -163,26 +280,7 @@ def test_random_pixel_display():
     print_test_header("Random Pixel Display",
                      "Random pixel display with color generation")
     
-    test_code = """
-    fun color() -> colour {
-        return (16777215 - __randi 16777215) as colour;
-    }
-
-    fun cc(x:int, y:int) -> bool {
-        __print x;
-        __print y;
-
-        let c:colour = color();
-        let h:int = __randi __height;
-        let w:int = __randi __width;
-        __write w, h, c;
-
-        return true;
-    }
-
-    let a:bool = cc(0, 0);
-    __delay 1000;
-    """
+    test_code = SIMULATOR_PROGRAMS["Random Pixel Display"]
     
     write_to_file("INPUT PROGRAM:")
     write_to_file(test_code)
@@ -222,28 +320,7 @@ def test_color_animation_while():
     print_test_header("Color Animation While Loop",
                      "Animated random pixels with iteration count")
     
-    test_code = """
-    fun color() -> colour {
-        return (16777215 - __randi 16777215) as colour;
-    }
-
-    fun cc(x:int, y:int, iter:int) -> bool {
-        __print x;
-        __print y;
-        __print iter;
-        while (iter > 0) {
-            let c:colour = color();
-            let w:int = __randi __width;
-            let h:int = __randi __height;
-            __write w, h, c;
-            iter = iter - 1;
-        }
-        return true;
-    }
-
-    let a:bool = cc(0, 0, 100000);
-    __delay 1000;
-    """
+    test_code = SIMULATOR_PROGRAMS["Color Animation While Loop"]
     
     write_to_file("INPUT PROGRAM:")
     write_to_file(test_code)
@@ -281,29 +358,7 @@ def test_rainbow_pattern():
     print_test_header("Rainbow Pattern",
                      "Animated rainbow pattern using color array")
     
-    test_code = """
-    fun draw_pattern(offset:int) -> bool {
-        let colors:colour[] = [#FF0000, #FF7F00, #FFFF00, #00FF00, #0000FF, #4B0082, #9400D3];
-
-        for (let x:int = 0; x < __width; x = x + 3) {
-            for (let y:int = 0; y < __height; y = y + 3) {                        
-                let colorIndex:int = (x + y + offset) % 7;
-                __write_box x, y, 2, 2, colors[colorIndex];
-            }
-        }
-
-        return true;
-    }
-
-    let offset:int = 0;
-    let r:bool = false;
-
-    while (true) {
-        r = draw_pattern(offset);
-        offset = offset + 1;
-        __delay 10;
-    }
-    """
+    test_code = SIMULATOR_PROGRAMS["Rainbow Pattern"]
     
     write_to_file("INPUT PROGRAM:")
     write_to_file(test_code)
@@ -344,32 +399,7 @@ def test_moving_checkerboard():
     print_test_header("Moving Checkerboard",
                      "Creates an animated checkerboard pattern")
     
-    test_code = """
-    // Simple moving checkerboard pattern
-    let size:int = 4;  // Size of each square
-    let frame:int = 0;
-    
-    while (frame < 200) {
-        for (let x:int = 0; x < __width; x = x + size) {
-            for (let y:int = 0; y < __height; y = y + size) {
-                // Create checkerboard pattern with animation
-                let checker:int = ((x / size) + (y / size) + frame) % 2;
-                
-                let color:colour = #000000;
-                if (checker == 0) {
-                    color = #FFFFFF;  // White
-                } else {
-                    color = #000000;  // Black
-                }
-                
-                __write_box x, y, size, size, color;
-            }
-        }
-        
-        frame = frame + 1;
-        __delay 100;
-    }
-    """
+    test_code = SIMULATOR_PROGRAMS["Moving Checkerboard"]
     
     write_to_file("INPUT PROGRAM:")
     write_to_file(test_code)
@@ -402,6 +432,69 @@ def test_moving_checkerboard():
     return True
 
 
+def test_golden_frames():
+    """Test golden-frame regression of every simulator program"""
+    create_test_output_file("simulator", "Golden Frame Regression")
+    
+    print_test_header("Golden Frame Regression",
+                     "Runs each program headless and compares its frames with the stored goldens")
+    
+    write_to_file(f"Frames per program: {GOLDEN_FRAMES} (each __delay ends a frame), seed {GOLDEN_SEED}")
+    write_to_file(f"Goldens: test/goldens/simulator/\n")
+    
+    success = True
+    for name, source in SIMULATOR_PROGRAMS.items():
+        ast, instructions, error = compile_program(source)
+        if error:
+            write_to_file(f"{name:<38} compilation error: {error}")
+            success = False
+            continue
+        
+        recording = run_headless(instructions, frames=GOLDEN_FRAMES, seed=GOLDEN_SEED)
+        golden_path = os.path.join(GOLDEN_DIR, name.lower().replace(" ", "_") + ".json")
+        
+        if UPDATE_GOLDENS or not os.path.exists(golden_path):
+            save_golden(recording, golden_path)
+            write_to_file(f"{name:<38} {len(recording.frames):>3} frames  golden written")
+            continue
+        
+        differences = compare_golden(recording, load_golden(golden_path))
+        status = "match" if not differences else "MISMATCH"
+        write_to_file(f"{name:<38} {len(recording.frames):>3} frames  {recording.steps:>9,} instructions  {status}")
+        if differences:
+            success = False
+            for difference in differences[:5]:
+                write_to_file(f"    {difference}")
+            # Dump the frames for inspection
+            dump_dir = os.path.join("test_outputs", "simulator", "frames", name.lower().replace(" ", "_"))
+            run_headless(instructions, frames=GOLDEN_FRAMES, seed=GOLDEN_SEED, dump_dir=dump_dir)
+            write_to_file(f"    frames written to {dump_dir}/")
+            continue
+        
+        for setting, options in GOLDEN_OPTIMIZATIONS:
+            optimized = compile_source(source, options)
+            if not optimized.success:
+                write_to_file(f"{'':<38} {setting} compilation error: {optimized.errors}")
+                success = False
+                continue
+            recording = run_headless(optimized.instructions, frames=GOLDEN_FRAMES, seed=GOLDEN_SEED)
+            differences = compare_golden(recording, load_golden(golden_path))
+            status = "match" if not differences else "MISMATCH"
+            write_to_file(f"{'':<38} {setting:<10} {recording.steps:>9,} instructions  {status}")
+            if differences:
+                success = False
+                for difference in differences[:5]:
+                    write_to_file(f"    {difference}")
+    
+    if success:
+        write_to_file("\nAll programs draw their golden frames")
+    else:
+        write_to_file("\nSome programs no longer draw their golden frames")
+    print_completion_status("Golden Frames", success)
+    close_test_output_file()
+    return success
+
+
 def run_simulator_tests():
     """Run all simulator test programs"""
     reset_test_counter()
@@ -418,6 +511,7 @@ def run_simulator_tests():
     results.append(("Color Animation While Loop", test_color_animation_while()))
     results.append(("Rainbow Pattern", test_rainbow_pattern()))
     results.append(("Moving Checkerboard", test_moving_checkerboard()))
+    results.append(("Golden Frame Regression", test_golden_frames()))
     
     # Summary
     print("\nSIMULATOR TESTS SUMMARY")
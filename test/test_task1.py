@@ -4,13 +4,14 @@ Comprehensive testing of FSA-based lexical analysis
 Tests micro-syntax recognition, error detection, and token classification
 """
 
+import io
 import sys
 import os
 
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from lexer.lexer import FSALexer, TokenType
+from lexer.lexer import FSALexer, LineIndex, TokenType
 from test.test_utils import (print_test_header, print_completion_status, set_ast_printing, 
                            create_test_output_file, close_test_output_file, write_to_file, 
                            reset_test_counter)
@@ -383,6 +384,250 @@ def test_number_and_colour_literals():
     return success
 
 
+def test_lexer_engine_equivalence():
+    """Test 5: Lexer Engine Equivalence
+    Purpose: Verify every alternative engine produces the same tokens as the reference FSA
+    """
+    create_test_output_file("task_1", "Lexer Engine Equivalence")
+    
+    print_test_header("Lexer Engine Equivalence",
+                     "Tests that the dense and regex engines match the reference FSA token stream")
+    
+    test_code = """
+    // Valid program text
+    fun draw(x:int, y:int) -> bool {
+        let c:colour = #Ab12Cd;
+        __write_box x, y, 2, 2, c;
+        return x != y and x >= 0.5 as int;
+    }
+    /* block comment ** with stars */
+    let r:float = 3.14 * -2;
+    
+    // Error cases and non-ASCII input
+    let bad:float = 123.;
+    let bad2:colour = #GG0000;
+    */ let caf\u00e9:int = 1;   ! @
+    /* outer /* inner */
+    """
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    reference = FSALexer()
+    
+    write_to_file("\nENGINE COMPARISON:")
+    write_to_file("-" * 60)
+    
+    all_match = True
+    for engine in FSALexer.ENGINES[1:]:
+        lexer = FSALexer(engine=engine)
+        for debug in (False, True):
+            reference.debug = debug
+            lexer.debug = debug
+            expected = [(t.type, t.lexeme, t.line, t.col) for t in reference.tokenize(test_code)]
+            actual = [(t.type, t.lexeme, t.line, t.col) for t in lexer.tokenize(test_code)]
+            match = expected == actual
+            mode = "with trivia" if debug else "without trivia"
+            write_to_file(f"{engine} tokens {mode}: reference={len(expected)}, {engine}={len(actual)} "
+                          f"{'identical' if match else 'MISMATCH'}")
+            if not match:
+                all_match = False
+                for i, (e, a) in enumerate(zip(expected, actual)):
+                    if e != a:
+                        write_to_file(f"  First difference at token {i}: {e} vs {a}")
+                        break
+    
+    success = all_match
+    
+    if success:
+        write_to_file("\nAll engines produce identical token streams")
+    else:
+        write_to_file("\nAn engine diverges from the reference FSA")
+    
+    print_completion_status("Engine Equivalence", success)
+    close_test_output_file()
+    return success
+
+
+def test_streaming_tokenizer():
+    """Test 6: Streaming Tokenizer
+    Purpose: Verify iter_tokens over chunked text and binary streams matches tokenize
+    """
+    create_test_output_file("task_1", "Streaming Tokenizer")
+    
+    print_test_header("Streaming Tokenizer",
+                     "Tests chunked lexing of file objects, including tokens split across chunk boundaries")
+    
+    test_code = """
+    fun draw(x:int) -> colour {
+        /* comment spanning
+           several lines */
+        let c:colour = #00ff7F; // trailing comment
+        return c;
+    }
+    let caf\u00e9:float = 12.5e;
+    """
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    lexer = FSALexer()
+    
+    write_to_file("\nSTREAM COMPARISON:")
+    write_to_file("-" * 60)
+    
+    all_match = True
+    for debug in (False, True):
+        lexer.debug = debug
+        expected = [(t.type, t.lexeme, t.line, t.col) for t in lexer.tokenize(test_code)]
+        for chunk_size in (1, 3, 16, None):
+            streams = (("text", io.StringIO(test_code)),
+                       ("binary", io.BytesIO(test_code.encode("utf-8"))))
+            for kind, stream in streams:
+                actual = [(t.type, t.lexeme, t.line, t.col)
+                          for t in lexer.iter_tokens(stream, chunk_size)]
+                match = expected == actual
+                mode = "with trivia" if debug else "without trivia"
+                write_to_file(f"{kind} stream, chunk size {chunk_size or 'default'}, {mode}: "
+                              f"{len(actual)} tokens {'identical' if match else 'MISMATCH'}")
+                if not match:
+                    all_match = False
+    lexer.debug = False
+    
+    success = all_match
+    
+    if success:
+        write_to_file("\nStreaming tokenizer matches tokenize for every chunk size")
+    else:
+        write_to_file("\nStreaming tokenizer diverges from tokenize")
+    
+    print_completion_status("Streaming Tokenizer", success)
+    close_test_output_file()
+    return success
+
+
+def test_line_column_tracking():
+    """Test 7: Line and Column Tracking
+    Purpose: Verify token positions resolved through the line index, across multi-line trivia
+    """
+    create_test_output_file("task_1", "Line and Column Tracking")
+    
+    print_test_header("Line and Column Tracking",
+                     "Tests lazily resolved token positions after block comments and whitespace runs")
+    
+    test_code = "let a:int = 1;\n/* one\n   two\n*/   let b:float = 2.5;\n\n    __print b; @"
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    expected_positions = [
+        ("let", 1, 1), ("a", 1, 5), (";", 1, 14),
+        ("let", 4, 6), ("b", 4, 10), ("2.5", 4, 20),
+        ("__print", 6, 5), ("b", 6, 13), ("@", 6, 16), ("", 6, 17),
+    ]
+    
+    write_to_file("\nPOSITION CHECKS:")
+    write_to_file("-" * 60)
+    
+    all_correct = True
+    for engine in FSALexer.ENGINES:
+        tokens = FSALexer(engine=engine).tokenize(test_code)
+        positions = {}
+        for token in tokens:
+            positions.setdefault(token.lexeme, []).append((token.line, token.col))
+        
+        seen = {}
+        for lexeme, line, col in expected_positions:
+            index = seen.get(lexeme, 0)
+            seen[lexeme] = index + 1
+            actual = positions.get(lexeme, [])[index:index + 1]
+            correct = actual == [(line, col)]
+            if not correct:
+                all_correct = False
+                write_to_file(f"{engine}: '{lexeme}' expected {line}:{col}, got {actual}")
+        write_to_file(f"{engine}: {'all positions correct' if all_correct else 'POSITION ERRORS'}")
+    
+    line_index = LineIndex(test_code)
+    index_correct = (line_index.position(0) == (1, 1) and
+                     line_index.position(test_code.index("two")) == (3, 4) and
+                     line_index.position(len(test_code)) == (6, 17))
+    write_to_file(f"LineIndex offset lookups: {'correct' if index_correct else 'INCORRECT'}")
+    
+    success = all_correct and index_correct
+    
+    if success:
+        write_to_file("\nToken positions tracked correctly")
+    else:
+        write_to_file("\nToken position tracking is incorrect")
+    
+    print_completion_status("Position Tracking", success)
+    close_test_output_file()
+    return success
+
+
+def test_columnar_token_buffer():
+    """Test 8: Columnar Token Buffer
+    Purpose: Verify tokenize_buffer holds the same tokens as tokenize in compact arrays
+    """
+    create_test_output_file("task_1", "Columnar Token Buffer")
+    
+    print_test_header("Columnar Token Buffer",
+                     "Tests the struct-of-arrays TokenBuffer against the Token list")
+    
+    test_code = """
+    fun tint(c:colour) -> colour {
+        /* keep the
+           colour */
+        return c;   // unchanged
+    }
+    let v:float = 0.25 * tint(#A0B1C2) as float;
+    let broken:float = 7.;  $
+    """
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    lexer = FSALexer()
+    
+    write_to_file("\nBUFFER COMPARISON:")
+    write_to_file("-" * 60)
+    
+    all_match = True
+    for debug in (False, True):
+        lexer.debug = debug
+        expected = [(t.type, t.lexeme, t.line, t.col) for t in lexer.tokenize(test_code)]
+        buffer = lexer.tokenize_buffer(test_code)
+        actual = [(t.type, t.lexeme, t.line, t.col) for t in buffer]
+        columns = [(buffer.type_at(i), buffer.lexeme_at(i)) for i in range(len(buffer))]
+        match = (expected == actual and
+                 columns == [(token_type, lexeme) for token_type, lexeme, _, _ in expected])
+        mode = "with trivia" if debug else "without trivia"
+        write_to_file(f"Buffer {mode}: {len(buffer)} tokens in {buffer.memory_size()} bytes "
+                      f"{'identical' if match else 'MISMATCH'}")
+        if not match:
+            all_match = False
+    lexer.debug = False
+    
+    trimmed = lexer.tokenize_buffer(test_code)
+    lexer.debug = True
+    with_trivia = lexer.tokenize_buffer(test_code)
+    lexer.debug = False
+    filtered = with_trivia.without_trivia()
+    filter_match = list(filtered.types) == list(trimmed.types) and list(filtered.offsets) == list(trimmed.offsets)
+    write_to_file(f"Trivia filtering: {'identical' if filter_match else 'MISMATCH'}")
+    
+    success = all_match and filter_match
+    
+    if success:
+        write_to_file("\nTokenBuffer matches the Token list")
+    else:
+        write_to_file("\nTokenBuffer diverges from the Token list")
+    
+    print_completion_status("Token Buffer", success)
+    close_test_output_file()
+    return success
+
+
 def run_task1_tests():
     """Run all Task 1 lexer tests"""
     reset_test_counter()
@@ -397,6 +642,10 @@ def run_task1_tests():
     results.append(("Lexical Error Detection", test_lexical_error_detection()))
     results.append(("Comment Processing", test_comment_handling()))
     results.append(("Number and Colour Literal Recognition", test_number_and_colour_literals()))
+    results.append(("Lexer Engine Equivalence", test_lexer_engine_equivalence()))
+    results.append(("Streaming Tokenizer", test_streaming_tokenizer()))
+    results.append(("Line and Column Tracking", test_line_column_tracking()))
+    results.append(("Columnar Token Buffer", test_columnar_token_buffer()))
     
     # Summary
     print("\nTASK 1 SUMMARY")
@@ -4,6 +4,7 @@ Comprehensive testing of recursive descent parsing
 Tests EBNF compliance, AST generation, and syntax error detection
 """
 
+import io
 import sys
 import os
 
@@ -12,6 +13,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from lexer.lexer import FSALexer
 from parser.parser import PArLParser
+from parser.ast_nodes import ForStatement, IfStatement, WhileStatement
+from parser.ast_walker import walk
 from test.test_utils import (print_test_header, print_ast, print_completion_status, set_ast_printing,
                            create_test_output_file, close_test_output_file, write_to_file, 
                            reset_test_counter)
@@ -238,29 +241,13 @@ def test_control_flow_parsing():
     
     # Count different control structures
     if_count = while_count = for_count = 0
-    if hasattr(ast, 'statements'):
-        def count_control_structures(node):
-            nonlocal if_count, while_count, for_count
-            if hasattr(node, '__class__'):
-                if 'IfStatement' in node.__class__.__name__:
-                    if_count += 1
-                elif 'WhileStatement' in node.__class__.__name__:
-                    while_count += 1
-                elif 'ForStatement' in node.__class__.__name__:
-                    for_count += 1
-            
-            # Recursively check child nodes
-            if hasattr(node, '__dict__'):
-                for attr_value in node.__dict__.values():
-                    if hasattr(attr_value, '__class__') and hasattr(attr_value, '__dict__'):
-                        count_control_structures(attr_value)
-                    elif isinstance(attr_value, list):
-                        for item in attr_value:
-                            if hasattr(item, '__class__') and hasattr(item, '__dict__'):
-                                count_control_structures(item)
-        
-        for stmt in ast.statements:
-            count_control_structures(stmt)
+    for node in walk(ast):
+        if isinstance(node, IfStatement):
+            if_count += 1
+        elif isinstance(node, WhileStatement):
+            while_count += 1
+        elif isinstance(node, ForStatement):
+            for_count += 1
     
     write_to_file(f"If statements: {if_count}")
     write_to_file(f"While loops: {while_count}")
@@ -327,6 +314,131 @@ def test_syntax_error_detection():
     return success
 
 
+def test_streaming_token_parsing():
+    """Test 5: Streaming Token Parsing
+    Purpose: Verify parsing from a lazy token iterator or a TokenBuffer matches parsing a token list
+    """
+    create_test_output_file("task_2", "Streaming Token Parsing")
+    
+    print_test_header("Streaming Token Parsing",
+                     "Tests the parser over FSALexer.iter_tokens and a columnar TokenBuffer")
+    
+    test_cases = [
+        ("Valid program", """
+        fun area(w:int, h:int) -> int {
+            let a:int[] = [w, h];
+            return a[0] * a[1];
+        }
+        for (let i:int = 0; i < 4; i = i + 1) {
+            if (area(i, 2) >= 4 and not false) { __print i; } else { __delay 10; }
+        }
+        """),
+        ("Syntax error with recovery", "let x:int = 5 +; let y:int = 2; __print y"),
+        ("Lexical error where ';' is expected", "let x:int = 5 $ let y:int = 2; __print y;"),
+        ("Errors on types, punctuation and keywords",
+         "let x:foo = 1; if (x > 1 { __print x; } let a:int[0] = [1]; fun f( -> int { return 1; } while"),
+    ]
+    
+    lexer = FSALexer()
+    all_match = True
+    
+    for name, code in test_cases:
+        write_to_file(f"\n{name}:")
+        write_to_file(code)
+        
+        list_parser = PArLParser(lexer.tokenize(code))
+        stream_parser = PArLParser(lexer.iter_tokens(io.StringIO(code), chunk_size=8))
+        buffer_parser = PArLParser(lexer.tokenize_buffer(code))
+        
+        results = []
+        for parser in (list_parser, stream_parser, buffer_parser):
+            try:
+                results.append((str(parser.parse()), [str(e) for e in parser.errors]))
+            except Exception as e:
+                results.append((None, [str(e)]))
+        
+        match = results[0] == results[1] == results[2]
+        write_to_file(f"List AST and errors: {len(results[0][1])} error(s)")
+        write_to_file(f"Streaming parse {'identical' if results[0] == results[1] else 'MISMATCH'}")
+        write_to_file(f"TokenBuffer parse {'identical' if results[0] == results[2] else 'MISMATCH'}")
+        write_to_file("-" * 40)
+        if not match:
+            all_match = False
+    
+    success = all_match
+    
+    if success:
+        write_to_file("\nStreaming token parsing matches token list parsing")
+    else:
+        write_to_file("\nStreaming token parsing diverges from token list parsing")
+    
+    print_completion_status("Streaming Parsing", success)
+    close_test_output_file()
+    return success
+
+
+def test_precedence_climbing():
+    """Test 6: Precedence Climbing
+    Purpose: Verify operator binding and associativity, and that deeply nested expressions parse
+    """
+    create_test_output_file("task_2", "Precedence Climbing")
+    
+    print_test_header("Precedence Climbing",
+                     "Tests the binding-power table, left associativity, prefix operators and deep nesting")
+    
+    from parser.ast_nodes import BinaryOperation, CastExpression, Identifier, Literal, UnaryOperation
+    
+    def shape(node):
+        """Fully parenthesized form of an expression"""
+        if isinstance(node, BinaryOperation):
+            return f"({shape(node.left)} {node.operator} {shape(node.right)})"
+        if isinstance(node, UnaryOperation):
+            return f"({node.operator} {shape(node.operand)})"
+        if isinstance(node, CastExpression):
+            return f"({shape(node.expression)} as {node.target_type})"
+        if isinstance(node, Identifier):
+            return node.name
+        if isinstance(node, Literal):
+            return str(node.value)
+        return type(node).__name__
+    
+    test_cases = [
+        ("a or b and c == d + e * f", "(a or (b and (c == (d + (e * f)))))"),
+        ("a - b - c / d / e", "((a - b) - ((c / d) / e))"),
+        ("a < b < c and d", "(((a < b) < c) and d)"),
+        ("- - a as int * not b", "(((- (- a)) as int) * (not b))"),
+        ("(a or b) and c", "((a or b) and c)"),
+    ]
+    
+    all_correct = True
+    for expression, expected in test_cases:
+        ast, error = parse_program(f"let x:int = {expression};")
+        actual = shape(ast.statements[0].initializer) if ast else error
+        correct = actual == expected
+        write_to_file(f"{expression:<30} -> {actual}  {'OK' if correct else 'expected ' + expected}")
+        all_correct = all_correct and correct
+    
+    # Operator chains are loops; only parentheses nest parser calls
+    depth = 250
+    ast, error = parse_program("let x:int = " + "(" * depth + "1" + " + 1)" * depth + ";")
+    nested = ast is not None
+    write_to_file(f"\n{depth} nested parentheses: {'parsed' if nested else error}")
+    long_chain, error = parse_program("let x:int = " + " + ".join(["1"] * 5000) + ";")
+    chained = long_chain is not None
+    write_to_file(f"5000-operand chain: {'parsed' if chained else error}")
+    
+    success = all_correct and nested and chained
+    
+    if success:
+        write_to_file("\nExpressions bind and nest correctly")
+    else:
+        write_to_file("\nExpression parsing is incorrect")
+    
+    print_completion_status("Precedence Climbing", success)
+    close_test_output_file()
+    return success
+
+
 def run_task2_tests():
     """Run all Task 2 parser tests"""
     reset_test_counter()
@@ -341,6 +453,8 @@ def run_task2_tests():
     results.append(("Function Declaration Parsing", test_function_declaration_parsing()))
     results.append(("Control Flow Statement Parsing", test_control_flow_parsing()))
     results.append(("Syntax Error Detection and Recovery", test_syntax_error_detection()))
+    results.append(("Streaming Token Parsing", test_streaming_token_parsing()))
+    results.append(("Precedence Climbing", test_precedence_climbing()))
     
     # Summary
     print("\nTASK 2 SUMMARY")
@@ -480,6 +480,76 @@ def test_builtin_function_validation():
     return success
 
 
+def test_visitor_dispatch():
+    """Test 5: Visitor Dispatch
+    Purpose: Verify per-visitor-class dispatch tables pick overrides, base-class handlers and report unknown nodes
+    """
+    create_test_output_file("task_3", "Visitor Dispatch")
+    
+    print_test_header("Visitor Dispatch",
+                     "Tests Dispatcher tables on an analyzer subclass, node subclasses and ASTNode.accept")
+    
+    from parser.ast_nodes import Literal, PrintStatement, FormalParameter
+    
+    class CountingAnalyzer(SemanticAnalyzer):
+        """Analyzer that also counts __print statements"""
+        def __init__(self):
+            super().__init__()
+            self.prints = 0
+        
+        def visit_print_statement(self, node):
+            self.prints += 1
+            super().visit_print_statement(node)
+    
+    class TracedLiteral(Literal):
+        """Literal subclass without handlers of its own"""
+        __slots__ = ()
+    
+    class LabelVisitor:
+        """accept() visitor: visit_literal for literals, generic_visit for the rest"""
+        def visit_literal(self, node):
+            return f"literal {node.value}"
+        
+        def generic_visit(self, node):
+            return type(node).__name__
+    
+    test_code = """
+    let x:int = 3;
+    __print x;
+    if (x > 2) { __print x * 2; }
+    """
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    ast, _, error = analyze_program(test_code)
+    counting = CountingAnalyzer()
+    counted = ast is not None and counting.analyze(ast) and counting.prints == 2
+    write_to_file(f"\nCountingAnalyzer saw {counting.prints} print statements (errors: {error})")
+    
+    # The subclass table must not leak into plain analyzers
+    plain = SemanticAnalyzer()
+    plain.visit_statement(PrintStatement(Literal(1, "int")))
+    isolated = not plain.errors and not hasattr(plain, "prints")
+    
+    # Node subclasses reach their base class handler; unknown nodes are reported
+    subclass_type = plain.visit_expression(TracedLiteral(2.5, "float"))
+    plain.visit_statement(FormalParameter("p", "int", 7, 3))
+    unknown = [str(e) for e in plain.errors]
+    write_to_file(f"TracedLiteral typed as {subclass_type}; unknown statement errors: {unknown}")
+    
+    visitor = LabelVisitor()
+    labels = [node.accept(visitor) for node in (Literal(4, "int"), TracedLiteral(5, "int"), ast)]
+    write_to_file(f"accept() labels: {labels}")
+    
+    success = (counted and isolated and subclass_type == "float" and
+               unknown == ["Semantic Error at line 7, col 3: Unknown statement type: FormalParameter"] and
+               labels == ["literal 4", "TracedLiteral", "Program"])
+    
+    print_completion_status("Visitor Dispatch", success)
+    close_test_output_file()
+    return success
+
+
 def run_task3_tests():
     """Run all Task 3 semantic analysis tests"""
     reset_test_counter()
@@ -494,6 +564,7 @@ def run_task3_tests():
     results.append(("Scope Management and Variable Declaration", test_scope_management_and_variable_declaration()))
     results.append(("Function Validation", test_function_validation()))
     results.append(("Built-in Function Validation", test_builtin_function_validation()))
+    results.append(("Visitor Dispatch", test_visitor_dispatch()))
     
     # Summary
     print("\nTASK 3 SUMMARY")
@@ -14,6 +14,10 @@ from lexer.lexer import FSALexer
 from parser.parser import PArLParser
 from semantic_analyzer.semantic_analyzer import SemanticAnalyzer
 from code_generator.code_generator import PArIRGenerator
+from code_generator.instructions import render_program, parse_program, encode_program, decode_program
+from code_generator.peephole import peephole
+from optimizer.constant_folder import ConstantFolder
+from parser.ast_walker import walk
 from test.test_utils import (print_test_header, print_ast, print_completion_status, set_ast_printing,
                            create_test_output_file, close_test_output_file, write_to_file, 
                            reset_test_counter)
@@ -454,6 +458,564 @@ def test_builtin_operations_generation():
     return success
 
 
+def test_instruction_ir_serialization():
+    """Test 5: Instruction IR Serialization
+    Purpose: Verify the structured instruction stream renders, parses and encodes losslessly
+    """
+    create_test_output_file("task_4", "Instruction IR Serialization")
+    
+    print_test_header("Instruction IR Serialization",
+                     "Tests Instruction rendering, PArIR text parsing and the binary format")
+    
+    test_code = """
+    fun scale(v:float, k:int) -> float {
+        return v * k as float;
+    }
+    let a:int[3] = [1, -2, 3];
+    let c:colour = #1a2B3c;
+    let f:float = scale(2.5, a[1]);
+    while (a[0] < 4) {
+        a[0] = a[0] + 1;
+    }
+    if (f > 1.0 and not false) { __print f; } else { __write 1, 2, c; }
+    """
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    ast, instructions, error = compile_program(test_code)
+    
+    if error:
+        write_to_file(f"\nCompilation error: {error}")
+        print_completion_status("IR Serialization", False)
+        close_test_output_file()
+        return False
+    
+    ir = PArIRGenerator().generate_ir(ast)
+    rendered_match = render_program(ir) == instructions
+    write_to_file(f"\nStructured stream renders to generate() output: {rendered_match}")
+    
+    parsed = parse_program(instructions)
+    parse_match = parsed == ir
+    write_to_file(f"PArIR text parses back to the same instructions: {parse_match}")
+    
+    binary = encode_program(ir)
+    binary_match = decode_program(binary) == ir
+    text_size = sum(len(instr) + 1 for instr in instructions)
+    write_to_file(f"Binary round trip: {binary_match} ({len(binary)} bytes vs {text_size} bytes of text)")
+    
+    opcodes = sorted({instr.opcode.name for instr in ir})
+    write_to_file(f"Opcodes used: {', '.join(opcodes)}")
+    
+    success = rendered_match and parse_match and binary_match
+    
+    if success:
+        write_to_file("\nInstruction IR serializes losslessly")
+    else:
+        write_to_file("\nInstruction IR serialization is lossy")
+    
+    print_completion_status("IR Serialization", success)
+    close_test_output_file()
+    return success
+
+
+def test_source_map():
+    """Test 6: Source Map
+    Purpose: Verify every generated instruction maps back to the PArL line, column and function it came from
+    """
+    create_test_output_file("task_4", "Source Map")
+    
+    print_test_header("Source Map",
+                     "Tests the generator's instruction -> line/col/function side table")
+    
+    test_code = """
+fun sq(x:int) -> int {
+    return x * x;
+}
+let total:int = 0;
+for (let i:int = 0; i < 4; i = i + 1) {
+    total = total + sq(i);
+}
+__print total;
+"""
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    ast, instructions, error = compile_program(test_code)
+    
+    if error:
+        write_to_file(f"\nCompilation error: {error}")
+        print_completion_status("Source Map", False)
+        close_test_output_file()
+        return False
+    
+    generator = PArIRGenerator()
+    ir = generator.generate_ir(ast)
+    source_map = generator.source_map
+    
+    write_to_file("\nINSTRUCTIONS WITH SOURCE POSITIONS:")
+    for address, (instruction, location) in enumerate(zip(ir, source_map)):
+        where = f"{location.function}:{location.line}:{location.col}" if location else "-"
+        write_to_file(f"{address:>4}  {instruction.render():<16}{where}")
+    
+    aligned = len(source_map) == len(ir)
+    write_to_file(f"\nOne entry per instruction: {aligned}")
+    
+    # Everything in the function body belongs to sq; the multiply is on line 2
+    mul_locations = [source_map[a] for a, instr in enumerate(ir) if instr.opcode.name == "MUL"]
+    mul_correct = [(loc.function, loc.line) for loc in mul_locations] == [("sq", 2)]
+    write_to_file(f"'mul' attributed to sq line 2: {mul_correct}")
+    
+    call_lines = sorted(source_map[a].line for a, instr in enumerate(ir) if instr.opcode.name == "CALL")
+    print_lines = [source_map[a].line for a, instr in enumerate(ir) if instr.opcode.name == "PRINT"]
+    statements_correct = call_lines == [6] and print_lines == [8]
+    write_to_file(f"Call on line 6 and print on line 8: {statements_correct}")
+    
+    # Only the program skeleton (entry jump, main frame, function skip jump, final halt) is unmapped
+    unmapped = [ir[a].render() for a, loc in enumerate(source_map) if loc is None]
+    write_to_file(f"Unmapped instructions: {unmapped}")
+    skeleton_only = len(unmapped) == 10
+    
+    success = aligned and mul_correct and statements_correct and skeleton_only
+    
+    if success:
+        write_to_file("\nSource map generated correctly")
+    else:
+        write_to_file("\nSource map is incorrect")
+    
+    print_completion_status("Source Map", success)
+    close_test_output_file()
+    return success
+
+
+def test_peephole_optimization():
+    """Test 7: Peephole Optimization
+    Purpose: Verify -O1 removes redundant instruction windows, re-targets jumps and keeps program behaviour
+    """
+    create_test_output_file("task_4", "Peephole Optimization")
+    
+    print_test_header("Peephole Optimization",
+                     "Tests the -O1 rewrites against unoptimized code on the PArIR VM")
+    
+    from vm import run_program
+    
+    test_code = """
+fun noop() -> int {
+    return -5;
+}
+let n:int = 0;
+let total:int = noop();
+while (n < 100) {
+    if (n != 3) { total = total + n; }
+    n = n + 1;
+    if (n >= 6) { __print total; __print n - 1; n = 100; }
+    for (let i:int = 0; i < 2; i = i + 1) { }
+}
+"""
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    ast, instructions, error = compile_program(test_code)
+    
+    if error:
+        write_to_file(f"\nCompilation error: {error}")
+        print_completion_status("Peephole Optimization", False)
+        close_test_output_file()
+        return False
+    
+    generator = PArIRGenerator(opt_level=1)
+    optimized_ir = generator.generate_ir(ast)
+    optimized = render_program(optimized_ir)
+    
+    write_to_file(f"\n-O0: {len(instructions)} instructions, -O1: {len(optimized)} instructions")
+    write_to_file("\n-O1 CODE:")
+    for address, instruction in enumerate(optimized):
+        write_to_file(f"{address:>4}  {instruction}")
+    
+    plain, fast = run_program(instructions), run_program(optimized)
+    write_to_file(f"\nOutput -O0 {plain.output} in {plain.steps} steps, -O1 {fast.output} in {fast.steps} steps")
+    behaviour_kept = plain.output == fast.output == [7, 5] and fast.steps < plain.steps
+    smaller = len(optimized) < len(instructions)
+    
+    rendered = set(optimized)
+    rewrites_applied = ("inc" in rendered and "push -5" in rendered and "not" not in rendered and
+                        "alloc" not in rendered)
+    write_to_file(f"inc, negated literal, '!=' branch and empty alloc rewritten: {rewrites_applied}")
+    
+    map_aligned = len(generator.source_map) == len(optimized_ir)
+    write_to_file(f"Source map still one entry per instruction: {map_aligned}")
+    
+    # Jumps into the middle of a window block the rewrite: 'push 1' is a jump target here
+    guarded = parse_program(["push 1", "push [0:0]", "add", "push #PC-2", "jmp"])
+    guarded_kept = peephole(guarded)[0] == guarded
+    write_to_file(f"Window containing a jump target left unchanged: {guarded_kept}")
+    
+    success = behaviour_kept and smaller and rewrites_applied and map_aligned and guarded_kept
+    
+    if success:
+        write_to_file("\nPeephole optimization working correctly")
+    else:
+        write_to_file("\nPeephole optimization is incorrect")
+    
+    print_completion_status("Peephole Optimization", success)
+    close_test_output_file()
+    return success
+
+
+def test_empty_frame_elision():
+    """Test 8: Empty Frame Elision
+    Purpose: Verify declaration-free blocks open no frame and variable frame levels stay correct
+    """
+    create_test_output_file("task_4", "Empty Frame Elision")
+    
+    print_test_header("Empty Frame Elision",
+                     "Tests elide_empty_frames on nested if/while/for bodies, with and without locals")
+    
+    from vm import run_program
+    
+    test_code = """
+fun count(n:int) -> int {
+    let hits:int = 0;
+    for (let i:int = 0; i < n; i = i + 1) {
+        if (i % 3 == 0) {
+            hits = hits + 1;
+        } else {
+            let j:int = i;
+            while (j > 4) { j = j - 4; hits = hits + 1; }
+        }
+    }
+    return hits;
+}
+let k:int = 0;
+let total:int = 0;
+for (; k < 3; k = k + 1) {
+    if (k > 0) { total = total + count(k * 5); }
+}
+__print total;
+__print k;
+"""
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    ast, instructions, error = compile_program(test_code)
+    
+    if error:
+        write_to_file(f"\nCompilation error: {error}")
+        print_completion_status("Empty Frame Elision", False)
+        close_test_output_file()
+        return False
+    
+    elided = PArIRGenerator(elide_empty_frames=True).generate(ast)
+    
+    frames_before, frames_after = instructions.count("oframe"), elided.count("oframe")
+    write_to_file(f"\noframe instructions: {frames_before} -> {frames_after}")
+    write_to_file(f"Instructions: {len(instructions)} -> {len(elided)}")
+    # Left open: main, the for with an init and the else arm that declares j
+    frames_correct = frames_after == 3 and frames_before > frames_after
+    
+    plain, fast = run_program(instructions), run_program(elided)
+    write_to_file(f"Output with frames {plain.output} in {plain.steps} steps, "
+                  f"elided {fast.output} in {fast.steps} steps")
+    # count(5) = 2, count(10) = 4 + 3 (the while runs once for i = 5, 7 and 8)
+    behaviour_kept = plain.output == fast.output == [9, 3] and fast.steps < plain.steps
+    
+    write_to_file("\nELIDED CODE:")
+    for address, instruction in enumerate(elided):
+        write_to_file(f"{address:>4}  {instruction}")
+    
+    success = frames_correct and behaviour_kept
+    
+    if success:
+        write_to_file("\nEmpty frames elided correctly")
+    else:
+        write_to_file("\nEmpty frame elision is incorrect")
+    
+    print_completion_status("Empty Frame Elision", success)
+    close_test_output_file()
+    return success
+
+
+def test_loop_frame_hoisting():
+    """Test 9: Loop Frame Hoisting
+    Purpose: Verify loop-body locals are allocated once per loop and keep their per-iteration behaviour
+    """
+    create_test_output_file("task_4", "Loop Frame Hoisting")
+    
+    print_test_header("Loop Frame Hoisting",
+                     "Tests hoist_loop_frames on for/while bodies, shadowing and uninitialized locals")
+    
+    from vm import run_program
+    
+    test_code = """
+let total:int = 0;
+for (let i:int = 0; i < 5; i = i + 1) {
+    let sq:int = i * i;
+    let i:int = sq + 1;
+    total = total + i;
+}
+let n:int = 3;
+while (n > 0) {
+    let pair:int[2] = [n, n * 10];
+    total = total + pair[1] - pair[0];
+    n = n - 1;
+}
+let m:int = 0;
+while (m < 3) {
+    let fresh:int;
+    fresh = fresh + 1;
+    total = total + fresh;
+    m = m + 1;
+}
+__print total;
+"""
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    ast, instructions, error = compile_program(test_code)
+    
+    if error:
+        write_to_file(f"\nCompilation error: {error}")
+        print_completion_status("Loop Frame Hoisting", False)
+        close_test_output_file()
+        return False
+    
+    hoisted = PArIRGenerator(hoist_loop_frames=True).generate(ast)
+    
+    plain, fast = run_program(instructions), run_program(hoisted)
+    write_to_file(f"\nOutput per-iteration frames {plain.output} in {plain.steps} steps, "
+                  f"hoisted {fast.output} in {fast.steps} steps")
+    # 35 from the for loop, 54 from the while over pair, 3 from fresh (reset on every iteration)
+    behaviour_kept = plain.output == fast.output == [92] and fast.steps < plain.steps
+    
+    # One frame per loop instead of one per iteration; the loop with an uninitialized local keeps its own
+    opened_plain, opened_hoisted = count_frames(instructions), count_frames(hoisted)
+    write_to_file(f"Frames opened at run time: {opened_plain} -> {opened_hoisted}")
+    frames_correct = opened_plain == 1 + 1 + 5 + 3 + 3 and opened_hoisted == 1 + 1 + 1 + 3
+    
+    write_to_file("\nHOISTED CODE:")
+    for address, instruction in enumerate(hoisted):
+        write_to_file(f"{address:>4}  {instruction}")
+    
+    success = behaviour_kept and frames_correct
+    
+    if success:
+        write_to_file("\nLoop frames hoisted correctly")
+    else:
+        write_to_file("\nLoop frame hoisting is incorrect")
+    
+    print_completion_status("Loop Frame Hoisting", success)
+    close_test_output_file()
+    return success
+
+
+def test_constant_folding():
+    """Test 10: Constant Folding
+    Purpose: Verify constant expressions, constant lets and constant if conditions are resolved before codegen
+    """
+    create_test_output_file("task_4", "Constant Folding")
+    
+    print_test_header("Constant Folding",
+                     "Tests fold_constants on arithmetic, casts, never-assigned lets and constant ifs")
+    
+    from vm import run_program
+    
+    test_code = """
+let scale:int = 2 * 8;
+let half:float = (scale / 3) as float;
+let limit:int = scale - 1;
+let n:int = 0;
+if (limit > 10) {
+    n = n + 1;
+} else {
+    __print 999;
+}
+if (scale < 0) { __print 998; }
+for (let i:int = 0; i < limit; i = i + 1) {
+    n = n + (-scale + 18) / 2;
+}
+__print n;
+__print half;
+__print (7 - 10) / 2 % 2;
+"""
+    
+    write_to_file("INPUT PROGRAM:")
+    write_to_file(test_code)
+    
+    ast, instructions, error = compile_program(test_code)
+    
+    if error:
+        write_to_file(f"\nCompilation error: {error}")
+        print_completion_status("Constant Folding", False)
+        close_test_output_file()
+        return False
+    
+    folder = ConstantFolder()
+    folded = PArIRGenerator().generate(folder.optimize(ast))
+    write_to_file(f"\nFolded {folder.folded} operations, propagated {folder.propagated} constants, "
+                  f"pruned {folder.pruned} if statements")
+    write_to_file(f"Instructions: {len(instructions)} -> {len(folded)}")
+    
+    # Only n is assigned, so every arithmetic operation left is the loop's add/compare on n and i
+    arithmetic_left = [i for i in folded if i in ("mul", "div", "mod", "sub")]
+    pruned = not any(i in ("push 999", "push 998") for i in folded)
+    folding_correct = folder.pruned == 2 and not arithmetic_left and pruned and len(folded) < len(instructions)
+    
+    plain, fast = run_program(instructions), run_program(folded)
+    write_to_file(f"Output unfolded {plain.output} in {plain.steps} steps, "
+                  f"folded {fast.output} in {fast.steps} steps")
+    # The cast emits no code, so half holds the int 16 / 3 = 5; (7 - 10) / 2 truncates to -1
+    behaviour_kept = plain.output == fast.output == [16, 5, -1] and fast.steps < plain.steps
+    
+    write_to_file("\nFOLDED CODE:")
+    for address, instruction in enumerate(folded):
+        write_to_file(f"{address:>4}  {instruction}")
+    
+    success = folding_correct and behaviour_kept
+    
+    if success:
+        write_to_file("\nConstants folded correctly")
+    else:
+        write_to_file("\nConstant folding is incorrect")
+    
+    print_completion_status("Constant Folding", success)
+    close_test_output_file()
+    return success
+
+
+def test_deep_expressions():
+    """Test 11: Deep Expression Compilation
+    Purpose: Verify expression trees far deeper than the recursion limit print, type-check, fold and generate
+    """
+    create_test_output_file("task_4", "Deep Expression Compilation")
+    
+    print_test_header("Deep Expression Compilation",
+                     "Tests a 5000-operand chain (a 5000-deep AST) through every compiler pass")
+    
+    from vm import run_program
+    
+    operands = 5000
+    test_code = (f"let total:int = {' + '.join(['1'] * operands)};\n"
+                 f"let ok:bool = {' and '.join(['total > 0'] * 500)};\n"
+                 f"__print total - {' - '.join(['ok as int'] * 500)};\n")
+    
+    write_to_file(f"INPUT PROGRAM: {operands} operand sum, 500 operand 'and' chain and 500 operand difference")
+    write_to_file(f"Recursion limit: {sys.getrecursionlimit()}")
+    
+    ast, instructions, error = compile_program(test_code)
+    
+    if error:
+        write_to_file(f"\nCompilation error: {error}")
+        print_completion_status("Deep Expression Compilation", False)
+        close_test_output_file()
+        return False
+    
+    # One printed line per node
+    nodes = sum(1 for _ in walk(ast))
+    printed = len(str(ast).splitlines())
+    write_to_file(f"\nAST nodes: {nodes}, printed lines: {printed}")
+    
+    result = run_program(instructions)
+    folder = ConstantFolder()
+    folded = PArIRGenerator().generate(folder.optimize(ast))
+    write_to_file(f"Output {result.output} from {len(instructions)} instructions, "
+                  f"{len(folded)} after folding {folder.folded} operations")
+    
+    success = (nodes == printed and result.output == [operands - 500] and
+               run_program(folded).output == result.output and len(folded) < len(instructions))
+    
+    if success:
+        write_to_file("\nDeep expressions compiled correctly")
+    else:
+        write_to_file("\nDeep expression compilation is incorrect")
+    
+    print_completion_status("Deep Expression Compilation", success)
+    close_test_output_file()
+    return success
+
+
+def deep_statement_programs(depth):
+    """(name, AST, expected output) for an else-if chain and for plain blocks nested depth deep"""
+    from parser.ast_nodes import (BinaryOperation, Block, Identifier, IfStatement, Literal,
+                                  PrintStatement, Program, VariableDeclaration)
+    
+    chain = Block([PrintStatement(Literal(0, "int"))])
+    for i in range(depth, 0, -1):
+        condition = BinaryOperation(Identifier("x"), "==", Literal(i, "int"))
+        chain = Block([IfStatement(condition, Block([PrintStatement(Literal(i, "int"))]), chain)])
+    blocks = Block([PrintStatement(BinaryOperation(Identifier("x"), "*", Literal(2, "int")))])
+    for _ in range(depth):
+        blocks = Block([blocks])
+    declaration = VariableDeclaration("x", "int", Literal(7, "int"))
+    return [
+        ("else-if chain", Program([declaration, *chain.statements]), [7]),
+        ("nested blocks", Program([declaration, blocks]), [14]),
+    ]
+
+
+def test_deep_statements():
+    """Test 12: Deep Statement Compilation
+    Purpose: Verify every pass after the parser handles statement nesting far deeper than the recursion limit
+    """
+    create_test_output_file("task_4", "Deep Statement Compilation")
+    
+    print_test_header("Deep Statement Compilation",
+                     "Tests parsed 300-deep statement nesting and 3000-deep ASTs through every later pass")
+    
+    from vm import run_program
+    
+    # The recursive-descent parser bounds the nesting of parsed programs (about 325 else-if levels)
+    chain = "__print 0;"
+    for i in range(300, 0, -1):
+        chain = f"if (x == {i}) {{ __print {i}; }} else {{ {chain} }}"
+    parsed = compile_program(f"let x:int = 7;\n{chain}")
+    
+    write_to_file(f"Recursion limit: {sys.getrecursionlimit()}")
+    success = parsed[2] is None and run_program(parsed[1]).output == [7]
+    write_to_file(f"\nParsed 300-deep else-if chain: {parsed[2] or 'compiled'}")
+    
+    # Built directly, the ASTs go far deeper than any parsed program
+    for name, ast, expected in deep_statement_programs(3000):
+        analyzer = SemanticAnalyzer()
+        if not analyzer.analyze(ast):
+            write_to_file(f"\n{name}: semantic errors: {[str(e) for e in analyzer.errors][:3]}")
+            success = False
+            continue
+        printed = len(str(ast).splitlines()) == sum(1 for _ in walk(ast))
+        instructions = PArIRGenerator().generate(ast)
+        output = run_program(instructions).output
+        folder = ConstantFolder()
+        folded = PArIRGenerator().generate(folder.optimize(ast))
+        folded_output = run_program(folded).output
+        write_to_file(f"\n{name}: output {output} from {len(instructions)} instructions, "
+                      f"{folded_output} from {len(folded)} after pruning {folder.pruned} if statements")
+        success = (success and printed and output == folded_output == expected and
+                   len(folded) < len(instructions))
+    
+    if success:
+        write_to_file("\nDeep statements compiled correctly")
+    else:
+        write_to_file("\nDeep statement compilation is incorrect")
+    
+    print_completion_status("Deep Statement Compilation", success)
+    close_test_output_file()
+    return success
+
+
+def count_frames(instructions):
+    """Number of oframe instructions executed by the program"""
+    from vm import PArIRMachine
+    machine = PArIRMachine(instructions, engine="reference")
+    opened = 0
+    while not machine.halted:
+        opened += machine.pc < len(machine.program) and machine.program[machine.pc].opcode.name == "OFRAME"
+        machine.step()
+    return opened
+
+
 def run_task4_tests():
     """Run all Task 4 code generation tests"""
     reset_test_counter()
@@ -468,6 +1030,14 @@ def run_task4_tests():
     results.append(("Control Flow Code Generation", test_control_flow_generation()))
     results.append(("Function Calls and Parameter Passing", test_function_calls_and_parameters()))
     results.append(("Built-in Operations Code Generation", test_builtin_operations_generation()))
+    results.append(("Instruction IR Serialization", test_instruction_ir_serialization()))
+    results.append(("Source Map", test_source_map()))
+    results.append(("Peephole Optimization", test_peephole_optimization()))
+    results.append(("Empty Frame Elision", test_empty_frame_elision()))
+    results.append(("Loop Frame Hoisting", test_loop_frame_hoisting()))
+    results.append(("Constant Folding", test_constant_folding()))
+    results.append(("Deep Expression Compilation", test_deep_expressions()))
+    results.append(("Deep Statement Compilation", test_deep_statements()))
     
     # Summary
     print("\nTASK 4 SUMMARY")
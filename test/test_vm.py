@@ -0,0 +1,661 @@
+"""
+PArIR Virtual Machine Tests
+Compiles PArL programs and executes the generated PArIR on the local VM,
+checking printed values, frame handling and the framebuffer
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parlc.driver import compile_source
+from vm import Display, PArIRMachine, VMError, create_display, decode, format_colour, run_program
+from vm.clock import Clock, create_clock
+from vm.display import np
+from vm.headless import encode_npy, encode_png, run_headless
+from vm.profiler import profile_program
+from test.test_simulator import SIMULATOR_PROGRAMS
+from test.test_utils import (print_test_header, print_completion_status, set_ast_printing,
+                           create_test_output_file, close_test_output_file, write_to_file,
+                           reset_test_counter)
+
+if "--show-ast" in sys.argv:
+    set_ast_printing(True)
+else:
+    set_ast_printing(False)
+
+
+def compile_program(source_code):
+    """Generated PArIR for source_code (None plus errors if compilation fails)"""
+    result = compile_source(source_code)
+    if not result.success:
+        return None, f"{result.failed_stage} errors: {result.errors}"
+    return result.instructions, None
+
+
+def check_output(name, source_code, expected, **kwargs):
+    """Compile and run one program, writing the comparison to the test output file"""
+    instructions, error = compile_program(source_code)
+    if error:
+        write_to_file(f"{name:<28} compilation failed: {error}")
+        return False
+    machine = run_program(instructions, **kwargs)
+    correct = machine.output == expected
+    write_to_file(f"{name:<28} {machine.steps:>6} steps  printed {machine.output}"
+                  f"{'' if correct else f'  (expected {expected})'}")
+    return correct
+
+
+def test_program_execution():
+    """Test 1: Program Execution
+    Purpose: Verify arithmetic, control flow and arrays compute the values PArL specifies
+    """
+    create_test_output_file("vm", "Program Execution")
+
+    print_test_header("Program Execution",
+                     "Tests printed results of compiled programs run on the PArIR VM")
+
+    programs = [
+        ("Arithmetic", """
+        let a:int = 17;
+        let b:int = 5;
+        __print a + b;
+        __print a - b;
+        __print a * b;
+        __print a / b;
+        __print a % b;
+        __print -a;
+        __print 7.0 / 2.0;
+        """, [22, 12, 85, 3, 2, -17, 3.5]),
+        ("Comparisons and logic", """
+        let x:int = 3;
+        __print x < 4;
+        __print x >= 4;
+        __print x != 3;
+        __print (not (x == 3)) or (x > 1 and x < 10);
+        """, [1, 0, 0, 1]),
+        ("If / else", """
+        let x:int = 10;
+        if (x > 5) { x = x + 1; } else { x = x - 1; }
+        if (x > 15) { x = x - 5; } else { x = x + 5; }
+        __print x;
+        """, [16]),
+        ("While loop", """
+        let n:int = 0;
+        while (n < 4) { __print n; n = n + 1; }
+        """, [0, 1, 2, 3]),
+        ("Nested for loops", """
+        for (let i:int = 0; i < 3; i = i + 1) {
+            for (let j:int = 0; j < i; j = j + 1) {
+                __print i * 10 + j;
+            }
+        }
+        """, [10, 20, 21]),
+        ("Arrays", """
+        let xs:int[] = [4, 8, 15, 16, 23];
+        xs[2] = xs[1] + xs[3];
+        let total:int = 0;
+        for (let i:int = 0; i < 5; i = i + 1) { total = total + xs[i]; }
+        __print xs[2];
+        __print total;
+        """, [24, 75]),
+    ]
+
+    success = all([check_output(name, source, expected) for name, source, expected in programs])
+
+    if success:
+        write_to_file("\nAll programs printed the expected values")
+    else:
+        write_to_file("\nSome programs printed unexpected values")
+
+    print_completion_status("Program Execution", success)
+    close_test_output_file()
+    return success
+
+
+def test_function_calls_and_frames():
+    """Test 2: Function Calls and Frames
+    Purpose: Verify call/ret, argument slots, recursion and frame unwinding on early return
+    """
+    create_test_output_file("vm", "Function Calls and Frames")
+
+    print_test_header("Function Calls and Frames",
+                     "Tests call/ret, array arguments, recursion and returns from nested frames")
+
+    programs = [
+        ("Parameters", """
+        fun sub(a:int, b:int) -> int { return a - b; }
+        __print sub(10, 3);
+        """, [7]),
+        ("Recursion", """
+        fun fact(n:int) -> int {
+            if (n <= 1) { return 1; }
+            return n * fact(n - 1);
+        }
+        __print fact(6);
+        """, [720]),
+        ("Array argument", """
+        fun find(xs:int[5], v:int) -> int {
+            for (let i:int = 0; i < 5; i = i + 1) {
+                if (xs[i] == v) { return i; }
+            }
+            return -1;
+        }
+        let data:int[] = [4, 8, 15, 16, 23];
+        __print find(data, 16);
+        __print find(data, 7);
+        """, [3, -1]),
+        ("Locals across calls", """
+        fun scale(x:int, k:int) -> int {
+            let r:int = x * k;
+            return r;
+        }
+        let a:int = scale(3, 4);
+        let b:int = scale(a, 2);
+        __print a;
+        __print b;
+        """, [12, 24]),
+    ]
+
+    success = all([check_output(name, source, expected) for name, source, expected in programs])
+
+    # Early returns must leave no frames or values behind once main has finished
+    instructions, error = compile_program(programs[2][1])
+    machine = PArIRMachine(instructions)
+    machine.run()
+    balanced = not error and machine.frames == [] and machine.stack == [] and machine.call_stack == []
+    write_to_file(f"\nFrames, operand stack and call stack empty at halt: {balanced}")
+
+    success = success and balanced
+
+    if success:
+        write_to_file("\nFunction calls and frames handled correctly")
+    else:
+        write_to_file("\nFunction call or frame handling is incorrect")
+
+    print_completion_status("Function Calls and Frames", success)
+    close_test_output_file()
+    return success
+
+
+def test_display_operations():
+    """Test 3: Display Operations
+    Purpose: Verify write, writebox, clear, read, width, height and seeded irnd on the framebuffer
+    """
+    create_test_output_file("vm", "Display Operations")
+
+    print_test_header("Display Operations",
+                     "Tests the in-memory framebuffer driven by the PArIR display instructions")
+
+    source = """
+    __clear #000080;
+    __write_box 2, 1, 3, 2, #ff0000;
+    __write 0, 0, #00ff00;
+    __write 9, 9, #ffffff;
+    __print __read 3, 2;
+    __print __read 0, 0;
+    __print __width;
+    __print __height;
+    __delay 16;
+    """
+    instructions, error = compile_program(source)
+    if error:
+        write_to_file(f"Compilation failed: {error}")
+        print_completion_status("Display Operations", False)
+        close_test_output_file()
+        return False
+
+    machine = run_program(instructions, display=Display(8, 4))
+    write_to_file("FRAMEBUFFER (8x4):")
+    for row in machine.display.rows():
+        write_to_file("  " + " ".join(format_colour(colour) for colour in row))
+
+    navy, red, green = 0x000080, 0xFF0000, 0x00FF00
+    expected_rows = [[green] + [navy] * 7,
+                     [navy, navy, red, red, red, navy, navy, navy],
+                     [navy, navy, red, red, red, navy, navy, navy],
+                     [navy] * 8]
+    pixels_correct = machine.display.rows() == expected_rows
+    write_to_file(f"\nBox, pixel and clear drawn correctly (off-panel write clipped): {pixels_correct}")
+
+    output_correct = machine.output == [red, green, 8, 4] and machine.delays == [16]
+    write_to_file(f"read/width/height/delay results: {machine.output}, delays {machine.delays}")
+
+    random_source = """
+    for (let i:int = 0; i < 5; i = i + 1) {
+        __print __randi 100;
+    }
+    """
+    instructions, _ = compile_program(random_source)
+    first = run_program(instructions, seed=2000).output
+    second = run_program(instructions, seed=2000).output
+    random_correct = first == second and all(0 <= value < 100 for value in first)
+    write_to_file(f"Seeded __randi reproducible and in range: {random_correct} {first}")
+
+    success = pixels_correct and output_correct and random_correct
+
+    if success:
+        write_to_file("\nDisplay operations working correctly")
+    else:
+        write_to_file("\nDisplay operations are incorrect")
+
+    print_completion_status("Display Operations", success)
+    close_test_output_file()
+    return success
+
+
+def test_runtime_errors():
+    """Test 4: Runtime Errors
+    Purpose: Verify runtime faults and runaway programs raise VMError with the failing address
+    """
+    create_test_output_file("vm", "Runtime Errors")
+
+    print_test_header("Runtime Errors",
+                     "Tests division by zero, the step limit and malformed PArIR")
+
+    cases = [
+        ("Division by zero", "let z:int = 0; __print 10 / z;", {}),
+        ("Step limit", "while (true) { __delay 1; }", {"max_steps": 1000}),
+    ]
+
+    success = True
+    for name, source, kwargs in cases:
+        instructions, error = compile_program(source)
+        try:
+            run_program(instructions, **kwargs)
+            write_to_file(f"{name:<20} no error raised")
+            success = False
+        except VMError as e:
+            write_to_file(f"{name:<20} {e}")
+
+    try:
+        run_program([".main", "push 1", "push 2", "push .missing", "call", "halt"])
+        write_to_file(f"{'Undefined function':<20} no error raised")
+        success = False
+    except VMError as e:
+        write_to_file(f"{'Undefined function':<20} {e}")
+
+    if success:
+        write_to_file("\nRuntime errors reported correctly")
+    else:
+        write_to_file("\nRuntime errors not reported")
+
+    print_completion_status("Runtime Errors", success)
+    close_test_output_file()
+    return success
+
+
+def test_engine_equivalence():
+    """Test 5: Engine Equivalence
+    Purpose: Verify the threaded engine matches the reference interpreter step for step
+    """
+    create_test_output_file("vm", "Engine Equivalence")
+
+    print_test_header("Engine Equivalence",
+                     "Tests threaded and reference engines on the simulator programs")
+
+    decoded = decode(["push #PC+3", "jmp", ".f", "push .f", "halt"])
+    loader_correct = decoded.operands[0] == 3 and decoded.operands[3] == 2
+    write_to_file(f"Loader resolves #PC offsets and labels to absolute addresses: {loader_correct}")
+
+    success = loader_correct
+    for name, source in SIMULATOR_PROGRAMS.items():
+        instructions, error = compile_program(source)
+        if error:
+            write_to_file(f"{name:<38} compilation failed: {error}")
+            success = False
+            continue
+
+        states = []
+        for engine in ("reference", "threaded"):
+            # Endless animations are compared over their first 20000 instructions
+            machine = PArIRMachine(instructions, Display(16, 12), seed=7, max_steps=20000, engine=engine)
+            try:
+                machine.run()
+            except VMError:
+                pass
+            states.append((machine.output, machine.delays, machine.display.pixels,
+                           machine.frames, machine.stack, machine.steps, machine.pc, machine.halted))
+
+        same = states[0] == states[1]
+        write_to_file(f"{name:<38} {states[1][5]:>6} steps  "
+                      f"{'identical' if same else 'MISMATCH'}")
+        success = success and same
+
+    # Out-of-range slots (negative indices must not wrap around) fail identically on both engines
+    fault_programs = {
+        "negative index read": compile_program(
+            "let a:int[3] = [10, 20, 30]; let i:int = 0 - 3; __print a[i];")[0],
+        "negative index write": compile_program(
+            "let a:int[3] = [10, 20, 30]; let i:int = 0 - 5; a[i] = 5; __print a[0];")[0],
+        "index past the end": compile_program(
+            "let a:int[3] = [10, 20, 30]; let i:int = 10; __print a[i];")[0],
+        "st to a negative slot": ["push 3", "oframe", "push 7", "push -1", "push 0", "st", "halt"],
+        "sta from a negative slot": ["push 3", "oframe", "push 7", "push 8", "push 2", "push -1", "push 0",
+                                     "sta", "halt"],
+        "pusha from a negative slot": ["push 3", "oframe", "push 2", "pusha [-1:0]", "halt"],
+        "push from a negative slot": ["push 3", "oframe", "push [-1:0]", "halt"],
+    }
+    for name, instructions in fault_programs.items():
+        results = []
+        for engine in ("reference", "threaded"):
+            machine = PArIRMachine(instructions, Display(4, 4), engine=engine)
+            try:
+                machine.run()
+                error = None
+            except VMError as e:
+                error = str(e)
+            results.append((error, machine.output, machine.frames, machine.stack, machine.pc))
+        same = results[0] == results[1] and results[0][0] is not None
+        write_to_file(f"{name:<38} {results[1][0]}  {'identical' if same else 'MISMATCH'}")
+        success = success and same
+
+    if success:
+        write_to_file("\nThreaded engine matches the reference interpreter")
+    else:
+        write_to_file("\nThreaded engine diverges from the reference interpreter")
+
+    print_completion_status("Engine Equivalence", success)
+    close_test_output_file()
+    return success
+
+
+def test_framebuffer_backends():
+    """Test 6: Framebuffer Backends
+    Purpose: Verify the NumPy and array framebuffers clip, read, view and snapshot identically
+    """
+    create_test_output_file("vm", "Framebuffer Backends")
+
+    print_test_header("Framebuffer Backends",
+                     "Tests clipped box fills, zero-copy views and frame diffs on each display backend")
+
+    backends = ["array"] + (["numpy"] if np is not None else [])
+    if np is None:
+        write_to_file("NumPy not installed: testing the array backend only")
+
+    success = True
+    frames = {}
+    for backend in backends:
+        display = create_display(10, 6, backend)
+        display.clear(0x102030)
+        display.write_box(-2, 4, 5, 9, 0xFF0000)   # clipped on the left and bottom
+        display.write_box(8, -1, 4, 3, 0x00FF00)   # clipped on the right and top
+        display.write_box(20, 20, 3, 3, 0x0000FF)  # entirely off the panel
+        display.write(9, 5, 0xFFFFFF)
+
+        view = display.view()
+        before = display.snapshot()
+        display.write(0, 0, 0xABCDEF)
+        live_view = view[0] if backend == "array" else int(view[0, 0])
+        view_correct = live_view == 0xABCDEF and display.changed_pixels(before) == 1
+
+        reads = [display.read(0, 5), display.read(2, 4), display.read(3, 4), display.read(9, 0),
+                 display.read(9, 5), display.read(-1, 0), display.read(10, 0)]
+        reads_correct = reads == [0xFF0000, 0xFF0000, 0x102030, 0x00FF00, 0xFFFFFF, 0, 0]
+
+        red_pixels = sum(row.count(0xFF0000) for row in display.rows())
+        box_correct = red_pixels == 3 * 2
+        frames[backend] = display.to_bytes()
+
+        passed = view_correct and reads_correct and box_correct
+        write_to_file(f"{backend:<8} reads {[format_colour(c) for c in reads]}")
+        write_to_file(f"{'':<8} clipped box pixels {red_pixels}, view is live and snapshot frozen: {view_correct}")
+        success = success and passed
+
+    if len(frames) > 1:
+        identical = frames["array"] == frames["numpy"]
+        write_to_file(f"Backends produce identical frames: {identical}")
+        success = success and identical
+
+    if success:
+        write_to_file("\nFramebuffer backends working correctly")
+    else:
+        write_to_file("\nFramebuffer backends are incorrect")
+
+    print_completion_status("Framebuffer Backends", success)
+    close_test_output_file()
+    return success
+
+
+def test_headless_capture():
+    """Test 7: Headless Capture
+    Purpose: Verify delays become frame boundaries and both engines record the same frames
+    """
+    create_test_output_file("vm", "Headless Capture")
+
+    print_test_header("Headless Capture",
+                     "Tests frame hashing at each delay, the final frame at halt and PNG/NPY encoding")
+
+    source_code = """
+    let i:int = 0;
+    while (i < 5) {
+        __clear #000000;
+        __write i, i, #ff0000;
+        __delay 16;
+        i = i + 1;
+    }
+    """
+    instructions, error = compile_program(source_code)
+    if error:
+        write_to_file(f"Compilation failed: {error}")
+        print_completion_status("Headless Capture", False)
+        close_test_output_file()
+        return False
+    success = True
+
+    recordings = {engine: run_headless(instructions, frames=10, width=8, height=8, engine=engine)
+                  for engine in PArIRMachine.ENGINES}
+    threaded, reference = recordings["threaded"], recordings["reference"]
+    for engine, recording in recordings.items():
+        write_to_file(f"{engine:<10} {len(recording.frames)} frames, halted {recording.halted}, "
+                      f"steps per frame {[frame.steps for frame in recording.frames]}")
+
+    delays_correct = [frame.delay for frame in threaded.frames] == [16] * 5 + [None]
+    engines_agree = ([(f.steps, f.digest) for f in threaded.frames] ==
+                     [(f.steps, f.digest) for f in reference.frames])
+    # The last two frames show the same picture; every other delay moves the pixel
+    distinct_correct = len(set(threaded.digests())) == 5
+    write_to_file(f"Delays {[frame.delay for frame in threaded.frames]}")
+    write_to_file(f"Engines record identical frames: {engines_agree}")
+    success = success and delays_correct and engines_agree and distinct_correct
+
+    limited = run_headless(instructions, frames=2, width=8, height=8)
+    limit_correct = len(limited.frames) == 2 and not limited.halted and limited.digests() == threaded.digests()[:2]
+    write_to_file(f"Stopped after 2 frames without halting: {limit_correct}")
+    success = success and limit_correct
+
+    display = create_display(3, 2, "array")
+    display.write(1, 0, 0x112233)
+    png, npy = encode_png(display), encode_npy(display)
+    encoding_correct = png.startswith(b"\x89PNG\r\n\x1a\n") and npy.startswith(b"\x93NUMPY")
+    if np is not None:
+        import io
+        encoding_correct = encoding_correct and int(np.load(io.BytesIO(npy))[0, 1]) == 0x112233
+    write_to_file(f"PNG {len(png)} bytes, NPY {len(npy)} bytes, headers valid: {encoding_correct}")
+    success = success and encoding_correct
+
+    if success:
+        write_to_file("\nHeadless capture working correctly")
+    else:
+        write_to_file("\nHeadless capture is incorrect")
+
+    print_completion_status("Headless Capture", success)
+    close_test_output_file()
+    return success
+
+
+def test_virtual_clock():
+    """Test 8: Virtual Clock
+    Purpose: Verify instant, accelerated and realtime clocks keep the same virtual time
+    """
+    create_test_output_file("vm", "Virtual Clock")
+
+    print_test_header("Virtual Clock",
+                     "Tests that delays advance virtual time in every mode and only paced clocks sleep")
+
+    instructions, error = compile_program(SIMULATOR_PROGRAMS["Basic Color Cycling Animation"])
+    if error:
+        write_to_file(f"Compilation failed: {error}")
+        print_completion_status("Virtual Clock", False)
+        close_test_output_file()
+        return False
+    success = True
+
+    start = time.perf_counter()
+    recording = run_headless(instructions, frames=64, seed=2000)
+    elapsed = time.perf_counter() - start
+    timestamps = [frame.timestamp for frame in recording.frames]
+    instant_correct = (timestamps == [16 * (index + 1) for index in range(64)] and
+                       recording.virtual_time == 64 * 16)
+    write_to_file(f"instant      64 frames, virtual time {recording.virtual_time} ms, "
+                  f"ran in {elapsed * 1000:.1f} ms")
+    write_to_file(f"             timestamps {timestamps[:4]} ... {timestamps[-1]}")
+    success = success and instant_correct
+
+    for mode, speed, expected_sleep in [("accelerated", 8, 0.016 / 8), ("realtime", 8, 0.016)]:
+        slept = []
+        clock = create_clock(mode, speed)
+        clock.sleep = slept.append
+        machine = run_program(instructions, seed=2000, clock=clock)
+        paced_correct = (clock.mode == mode and machine.clock.now == 64 * 16 and len(slept) == 64 and
+                         all(abs(seconds - expected_sleep) < 1e-9 for seconds in slept))
+        write_to_file(f"{mode:<12} virtual time {machine.clock.now} ms, {len(slept)} sleeps of "
+                      f"{slept[0] * 1000:.1f} ms")
+        success = success and paced_correct
+
+    clock = Clock()
+    clock.delay(-5)
+    clock.delay(0)
+    invalid_rejected = True
+    for mode, speed in [("warp", 1), ("accelerated", 0)]:
+        try:
+            create_clock(mode, speed)
+            invalid_rejected = False
+        except ValueError:
+            pass
+    edge_correct = clock.now == 0 and invalid_rejected
+    write_to_file(f"Non-positive delays ignored and invalid clocks rejected: {edge_correct}")
+    success = success and edge_correct
+
+    if success:
+        write_to_file("\nVirtual clock working correctly")
+    else:
+        write_to_file("\nVirtual clock is incorrect")
+
+    print_completion_status("Virtual Clock", success)
+    close_test_output_file()
+    return success
+
+
+def test_profiler():
+    """Test 9: Profiler
+    Purpose: Verify instruction counts, source line attribution and per-function inclusive/exclusive totals
+    """
+    create_test_output_file("vm", "Profiler")
+
+    print_test_header("Profiler",
+                     "Tests hot lines, function totals and folded stacks for nested calls")
+
+    source_code = """fun sq(x:int) -> int {
+    return x * x;
+}
+fun sumsq(n:int) -> int {
+    let t:int = 0;
+    for (let i:int = 0; i < n; i = i + 1) {
+        t = t + sq(i);
+    }
+    return t;
+}
+__print sumsq(20);
+"""
+    result = compile_source(source_code)
+    if not result.success:
+        write_to_file(f"Compilation failed: {result.errors}")
+        print_completion_status("Profiler", False)
+        close_test_output_file()
+        return False
+
+    profile = profile_program(result.instructions, result.source_map)
+    write_to_file(profile.format_report(source_code))
+    write_to_file("\nFOLDED STACKS:")
+    for line in profile.folded():
+        write_to_file(line)
+
+    machine = run_program(result.instructions)
+    totals_correct = (profile.halted and profile.steps == machine.steps == sum(profile.counts) and
+                      sum(profile.stacks.values()) == profile.steps)
+
+    functions = profile.function_counts()
+    inclusive_main, exclusive_main = functions["main"]
+    inclusive_sumsq, exclusive_sumsq = functions["sumsq"]
+    inclusive_sq, exclusive_sq = functions["sq"]
+    functions_correct = (inclusive_main == profile.steps and inclusive_sq == exclusive_sq and
+                         inclusive_sumsq == exclusive_sumsq + inclusive_sq and
+                         exclusive_main + exclusive_sumsq + exclusive_sq == profile.steps)
+    stacks_correct = set(profile.stacks) == {("main",), ("main", "sumsq"), ("main", "sumsq", "sq")}
+
+    # The loop header and body of sumsq dominate; sq's body runs once per iteration
+    hottest = [key for key, _ in profile.hot_lines(2)]
+    lines_correct = set(hottest) == {("sumsq", 6), ("sumsq", 7)}
+    sq_body = profile.line_counts()[("sq", 2)]
+    body_correct = sq_body == 20 * 4  # push x, push x, mul, ret
+
+    write_to_file(f"\nCounts match the VM step total: {totals_correct}")
+    write_to_file(f"Inclusive/exclusive totals consistent: {functions_correct}, stacks {stacks_correct}")
+    write_to_file(f"Hottest lines {hottest}, sq line 2 count {sq_body}")
+
+    success = totals_correct and functions_correct and stacks_correct and lines_correct and body_correct
+
+    if success:
+        write_to_file("\nProfiler working correctly")
+    else:
+        write_to_file("\nProfiler is incorrect")
+
+    print_completion_status("Profiler", success)
+    close_test_output_file()
+    return success
+
+
+def run_vm_tests():
+    """Run all PArIR VM tests"""
+    reset_test_counter()
+
+    print("PARIR VIRTUAL MACHINE TESTS")
+    print("="*80)
+
+    results = []
+
+    results.append(("Program Execution", test_program_execution()))
+    results.append(("Function Calls and Frames", test_function_calls_and_frames()))
+    results.append(("Display Operations", test_display_operations()))
+    results.append(("Runtime Errors", test_runtime_errors()))
+    results.append(("Engine Equivalence", test_engine_equivalence()))
+    results.append(("Framebuffer Backends", test_framebuffer_backends()))
+    results.append(("Headless Capture", test_headless_capture()))
+    results.append(("Virtual Clock", test_virtual_clock()))
+    results.append(("Profiler", test_profiler()))
+
+    # Summary
+    print("\nVM TESTS SUMMARY")
+    print("="*80)
+
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASSED" if result else "FAILED"
+        print(f"{test_name:<50} {status}")
+
+    print("-"*80)
+    print(f"Passed: {passed}/{total}")
+    print("Check test_outputs/vm/ for detailed results")
+
+    return passed == total
+
+
+if __name__ == "__main__":
+    success = run_vm_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,44 @@
+"""
+PArIR Virtual Machine Module
+Executes generated PArIR locally against an in-memory PAD2000c display
+
+Usage: python -m vm program.parl|.parir|.pirb
+"""
+
+from .clock import Clock, create_clock
+from .display import Display, NumPyDisplay, create_display, parse_colour, format_colour
+from .machine import PArIRMachine, VMError, load_program, run_program
+from .engine import DecodedProgram, decode
+from .headless import (Frame, Recording, run_headless, frame_digest, encode_png, encode_npy,
+                       save_golden, load_golden, compare_golden)
+from .profiler import Profile, profile_program
+from .runner import load_file, main
+
+__all__ = [
+    'Clock',
+    'create_clock',
+    'Display',
+    'NumPyDisplay',
+    'create_display',
+    'parse_colour',
+    'format_colour',
+    'PArIRMachine',
+    'VMError',
+    'load_program',
+    'run_program',
+    'DecodedProgram',
+    'decode',
+    'Frame',
+    'Recording',
+    'run_headless',
+    'frame_digest',
+    'encode_png',
+    'encode_npy',
+    'save_golden',
+    'load_golden',
+    'compare_golden',
+    'Profile',
+    'profile_program',
+    'load_file',
+    'main'
+]
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+VM Clock
+Decides what a 'delay' instruction costs in wall-clock time. Every clock keeps
+a virtual timestamp (milliseconds of delay executed so far); only the pacing
+differs:
+- "realtime":    sleep for each delay, as the PAD2000c does
+- "accelerated": sleep for each delay divided by a speed factor
+- "instant":     never sleep (the default; batch runs, CI and headless capture)
+"""
+
+import time
+from typing import Callable, Optional
+
+CLOCK_MODES = ("realtime", "accelerated", "instant")
+
+
+class Clock:
+    """
+    Virtual time in milliseconds, advanced by delay(). speed is the factor by
+    which sleeping is shortened, or None to never sleep.
+    """
+
+    def __init__(self, speed: Optional[float] = None, sleep: Callable[[float], None] = time.sleep):
+        if speed is not None and not speed > 0:
+            raise ValueError(f"Clock speed must be positive, got {speed}")
+        self.speed = speed
+        self.sleep = sleep
+        self.now = 0
+
+    @property
+    def mode(self) -> str:
+        if self.speed is None:
+            return "instant"
+        return "realtime" if self.speed == 1 else "accelerated"
+
+    def reset(self):
+        self.now = 0
+
+    def delay(self, milliseconds):
+        """Advance virtual time (negative delays count as zero) and sleep if paced"""
+        if milliseconds <= 0:
+            return
+        self.now += milliseconds
+        if self.speed is not None:
+            self.sleep(milliseconds / 1000 / self.speed)
+
+
+def create_clock(mode: str = "instant", speed: float = 1.0) -> Clock:
+    """Clock for the requested mode (speed only applies to "accelerated")"""
+    if mode not in CLOCK_MODES:
+        raise ValueError(f"Unknown clock mode '{mode}' (expected one of {', '.join(CLOCK_MODES)})")
+    if mode == "instant":
+        return Clock()
+    return Clock(1 if mode == "realtime" else speed)
@@ -0,0 +1,170 @@
+"""
+PAD2000c Display Model
+In-memory framebuffer driven by the PArIR display instructions
+(write, writebox, clear, read, width, height)
+
+Two interchangeable backends:
+- NumPyDisplay: a (height, width) uint32 array; clear is one fill and writebox
+  one clipped slice assignment (used when NumPy is installed)
+- Display: the same operations on a flat array('I'), standard library only
+Pixels are 0xRRGGBB integers. Drawing outside the panel is clipped; reading
+outside it returns black.
+"""
+
+import sys
+from array import array
+from typing import List, Union
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency: fall back to the array('I') display
+    np = None
+
+DEFAULT_WIDTH = 64
+DEFAULT_HEIGHT = 48
+
+BACKENDS = ("auto", "numpy", "array")
+
+
+def parse_colour(value: Union[int, float, str]) -> int:
+    """Colour operand as a 0xRRGGBB integer ('#rrggbb' literals or cast integers)"""
+    if isinstance(value, str):
+        if value.startswith("#"):
+            return int(value[1:], 16)
+        return int(value)
+    return int(value) & 0xFFFFFF
+
+
+def format_colour(colour: int) -> str:
+    """0xRRGGBB integer as a '#rrggbb' literal"""
+    return f"#{colour & 0xFFFFFF:06x}"
+
+
+def _clip_box(display, x: int, y: int, width: int, height: int):
+    """Box (x0, y0, x1, y1) clipped to the panel, or None if nothing is visible"""
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, display.width), min(y + height, display.height)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+
+class Display:
+    """
+    Row-major framebuffer in a flat array('I'), pixels[y * width + x].
+    view() is a zero-copy read-only memoryview; snapshot() copies.
+    """
+
+    def __init__(self, width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT):
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Display size must be positive, got {width}x{height}")
+        self.width = width
+        self.height = height
+        self.pixels = array("I", bytes(4 * width * height))
+
+    def clear(self, colour: int):
+        self.pixels[:] = array("I", [colour]) * (self.width * self.height)
+
+    def write(self, x: int, y: int, colour: int):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.pixels[y * self.width + x] = colour
+
+    def write_box(self, x: int, y: int, width: int, height: int, colour: int):
+        """Fill the box with top-left corner (x, y), clipped to the panel"""
+        box = _clip_box(self, x, y, width, height)
+        if box is None:
+            return
+        x0, y0, x1, y1 = box
+        row = array("I", [colour]) * (x1 - x0)
+        for start in range(y0 * self.width + x0, y1 * self.width, self.width):
+            self.pixels[start:start + len(row)] = row
+
+    def read(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.pixels[y * self.width + x]
+        return 0
+
+    def rows(self) -> List[List[int]]:
+        """Copy of the framebuffer as a list of rows"""
+        return [self.pixels[y * self.width:(y + 1) * self.width].tolist() for y in range(self.height)]
+
+    def view(self):
+        """Zero-copy read-only view of the live framebuffer (changes as the program draws)"""
+        return memoryview(self.pixels).toreadonly()
+
+    def snapshot(self):
+        """Copy of the framebuffer, unaffected by later drawing"""
+        return array("I", self.pixels)
+
+    def changed_pixels(self, snapshot) -> int:
+        """Number of pixels that differ between snapshot and the current frame"""
+        return sum(1 for old, new in zip(snapshot, self.pixels) if old != new)
+
+    def to_bytes(self) -> bytes:
+        """Raw little-endian uint32 pixels, row-major"""
+        if sys.byteorder == "little":
+            return self.pixels.tobytes()
+        pixels = array("I", self.pixels)
+        pixels.byteswap()
+        return pixels.tobytes()
+
+
+class NumPyDisplay(Display):
+    """
+    Framebuffer as a (height, width) NumPy uint32 array. clear and writebox are
+    single vectorized assignments; view() is a zero-copy read-only array view.
+    """
+
+    def __init__(self, width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT):
+        if np is None:
+            raise ImportError("NumPyDisplay requires NumPy (pip install numpy)")
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Display size must be positive, got {width}x{height}")
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width), dtype=np.uint32)
+
+    def clear(self, colour: int):
+        self.pixels.fill(colour)
+
+    def write(self, x: int, y: int, colour: int):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.pixels[y, x] = colour
+
+    def write_box(self, x: int, y: int, width: int, height: int, colour: int):
+        box = _clip_box(self, x, y, width, height)
+        if box is not None:
+            x0, y0, x1, y1 = box
+            self.pixels[y0:y1, x0:x1] = colour
+
+    def read(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.pixels[y, x])
+        return 0
+
+    def rows(self) -> List[List[int]]:
+        return self.pixels.tolist()
+
+    def view(self):
+        view = self.pixels.view()
+        view.flags.writeable = False
+        return view
+
+    def snapshot(self):
+        return self.pixels.copy()
+
+    def changed_pixels(self, snapshot) -> int:
+        return int(np.count_nonzero(self.pixels != np.asarray(snapshot).reshape(self.pixels.shape)))
+
+    def to_bytes(self) -> bytes:
+        return self.pixels.astype("<u4", copy=False).tobytes()
+
+
+def create_display(width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT,
+                   backend: str = "auto") -> Display:
+    """Display for the requested backend ("auto" picks NumPy when it is installed)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown display backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    if backend == "numpy" or (backend == "auto" and np is not None):
+        return NumPyDisplay(width, height)
+    return Display(width, height)
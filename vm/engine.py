@@ -0,0 +1,562 @@
+"""
+Threaded PArIR Execution Engine
+The loader decodes a program once into opcode/operand arrays, turning '.label'
+and '#PC+n' operands into absolute addresses and colour literals into integers.
+Each address then gets a pre-built handler closure with its operands bound;
+execution is a tight loop of 'pc = handlers[pc]()'.
+
+Common instruction pairs are fused into one handler (superinstructions):
+  push <address>; jmp      -> direct jump
+  push <address>; cjmp     -> conditional branch
+  push .label; call        -> direct call
+  push i; push l; st       -> store to a fixed slot
+The following addresses keep their own handlers, so jumping into the middle of
+a fused sequence still behaves correctly. Fused handlers count every
+instruction they cover, so step counts match the reference interpreter.
+"""
+
+from typing import Dict, List, Tuple
+
+from code_generator.instructions import Instruction, Opcode
+from .display import parse_colour
+from .machine import VMError, _divide, _modulo, label_addresses, load_program
+
+
+class DecodedProgram:
+    """Loader output: parallel opcode/operand/level arrays with every address resolved"""
+    __slots__ = ("instructions", "opcodes", "operands", "levels", "labels")
+
+    def __init__(self, instructions: List[Instruction]):
+        self.instructions = instructions
+        self.labels = label_addresses(instructions)
+        self.opcodes: List[Opcode] = []
+        self.operands: List = []
+        self.levels: List = []
+
+        for address, instruction in enumerate(instructions):
+            opcode, operand = instruction.opcode, instruction.operand
+            if opcode is Opcode.PUSH_PC:
+                opcode, operand = Opcode.PUSH, address + operand
+            elif opcode is Opcode.PUSH_LABEL:
+                if operand not in self.labels:
+                    raise VMError(f"undefined function '.{operand}'", address, instruction)
+                opcode, operand = Opcode.PUSH, self.labels[operand]
+            elif opcode is Opcode.PUSH and isinstance(operand, str):
+                operand = parse_colour(operand)
+            self.opcodes.append(opcode)
+            self.operands.append(operand)
+            self.levels.append(instruction.level)
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def is_address(self, value) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < len(self.opcodes)
+
+
+def decode(program) -> DecodedProgram:
+    """Decode generator output (text lines or Instruction objects) for the threaded engine"""
+    return DecodedProgram(load_program(program))
+
+
+# Most instructions a single handler can cover
+MAX_FUSED_LENGTH = 3
+
+
+class Halt(Exception):
+    """Raised by the halt handler (and past the last address) to leave the dispatch loop"""
+
+
+class Pause(Exception):
+    """
+    Raised by the delay handler when an on_delay hook is set, so that the hook
+    runs from run_threaded with machine.steps up to date; carries the delay and
+    the resume address
+    """
+    def __init__(self, milliseconds, address: int):
+        super().__init__(milliseconds, address)
+        self.milliseconds = milliseconds
+        self.address = address
+
+
+def build_handlers(decoded: DecodedProgram, machine) -> Tuple[list, Dict[int, int]]:
+    """
+    One handler per address (plus an end-of-program sentinel), bound to the
+    machine's stack, frames and devices. Each handler returns the next address.
+    Also returns, for each fused handler, the address of the last instruction it
+    covers (where a fault inside it is reported).
+    """
+    stack, frames, call_stack = machine.stack, machine.frames, machine.call_stack
+    output, delays, display = machine.output, machine.delays, machine.display
+    write, write_box, clear, read = display.write, display.write_box, display.clear, display.read
+    randrange = machine.random.randrange
+    push, pop = stack.append, stack.pop
+    fused = machine._fused_steps
+    size = len(decoded)
+
+    def frame(level):
+        if not 0 <= level < len(frames):
+            raise IndexError(f"frame level {level} out of range ({len(frames)} open)")
+        return frames[-1 - level]
+
+    # Bounds-checked slot access (the reference engine's _load/_store): handlers
+    # index frames directly and fall back to these for anything out of range, so
+    # a negative index never wraps around to the end of a frame
+    def load(index, level):
+        slots = frame(level)
+        if not 0 <= index < len(slots):
+            raise IndexError(f"slot [{index}:{level}] out of range (frame size {len(slots)})")
+        return slots[index]
+
+    def store(index, level, value):
+        slots = frame(level)
+        if not 0 <= index < len(slots):
+            raise IndexError(f"slot [{index}:{level}] out of range (frame size {len(slots)})")
+        slots[index] = value
+
+    def target(address):
+        if not decoded.is_address(address):
+            raise IndexError(f"jump target {address} outside the program")
+        return address
+
+    def binary(operation, nxt):
+        def handler():
+            a = pop()
+            stack[-1] = operation(a, stack[-1])
+            return nxt
+        return handler
+
+    def compare(operation, nxt):
+        def handler():
+            a = pop()
+            stack[-1] = 1 if operation(a, stack[-1]) else 0
+            return nxt
+        return handler
+
+    # ----- handler factories: (operand, level, next address) -> handler -----
+
+    def h_push(value, level, nxt):
+        def handler():
+            push(value)
+            return nxt
+        return handler
+
+    def h_push_var(index, level, nxt):
+        if index < 0 or level < 0:
+            def handler():
+                push(load(index, level))
+                return nxt
+        elif level == 0:
+            def handler():
+                try:
+                    push(frames[-1][index])
+                except IndexError:
+                    push(load(index, level))
+                return nxt
+        else:
+            def handler():
+                try:
+                    push(frame(level)[index])
+                except IndexError:
+                    push(load(index, level))
+                return nxt
+        return handler
+
+    def h_push_indexed(index, level, nxt):
+        def handler():
+            slot = index + pop()
+            slots = frame(level)
+            push(slots[slot] if 0 <= slot < len(slots) else load(slot, level))
+            return nxt
+        return handler
+
+    def h_push_array(index, level, nxt):
+        def handler():
+            count = pop()
+            slots = frame(level)
+            if 0 <= index and index + count <= len(slots):
+                for offset in range(count - 1, -1, -1):
+                    push(slots[index + offset])
+            else:
+                for offset in range(count - 1, -1, -1):
+                    push(load(index + offset, level))
+            return nxt
+        return handler
+
+    def h_nop(operand, level, nxt):
+        def handler():
+            return nxt
+        return handler
+
+    def h_st(operand, level, nxt):
+        def handler():
+            level_, index, value = pop(), pop(), pop()
+            slots = frame(level_)
+            if 0 <= index < len(slots):
+                slots[index] = value
+            else:
+                store(index, level_, value)
+            return nxt
+        return handler
+
+    def h_sta(operand, level, nxt):
+        def handler():
+            level_, index, count = pop(), pop(), pop()
+            slots = frame(level_)
+            if 0 <= index and index + count <= len(slots):
+                for offset in range(count):
+                    slots[index + offset] = pop()
+            else:
+                for offset in range(count):
+                    store(index + offset, level_, pop())
+            return nxt
+        return handler
+
+    def h_dup(operand, level, nxt):
+        def handler():
+            push(stack[-1])
+            return nxt
+        return handler
+
+    def h_drop(operand, level, nxt):
+        def handler():
+            pop()
+            return nxt
+        return handler
+
+    def h_swap(operand, level, nxt):
+        def handler():
+            stack[-1], stack[-2] = stack[-2], stack[-1]
+            return nxt
+        return handler
+
+    def h_inc(operand, level, nxt):
+        def handler():
+            stack[-1] += 1
+            return nxt
+        return handler
+
+    def h_dec(operand, level, nxt):
+        def handler():
+            stack[-1] -= 1
+            return nxt
+        return handler
+
+    def h_not(operand, level, nxt):
+        def handler():
+            stack[-1] = 0 if stack[-1] else 1
+            return nxt
+        return handler
+
+    def h_irnd(operand, level, nxt):
+        def handler():
+            limit = stack[-1]
+            if limit <= 0:
+                raise ValueError(f"irnd bound must be positive, got {limit}")
+            stack[-1] = randrange(limit)
+            return nxt
+        return handler
+
+    def h_jmp(operand, level, nxt):
+        def handler():
+            return target(pop())
+        return handler
+
+    def h_cjmp(operand, level, nxt):
+        def handler():
+            address = pop()
+            return target(address) if pop() else nxt
+        return handler
+
+    def h_call(operand, level, nxt):
+        def handler():
+            address, count = pop(), pop()
+            arguments = [pop() for _ in range(count)]
+            call_stack.append((nxt, len(frames)))
+            frames.append(arguments)
+            return target(address)
+        return handler
+
+    def h_ret(operand, level, nxt):
+        def handler():
+            if not call_stack:
+                raise IndexError("ret outside of a function call")
+            value = pop()
+            return_address, depth = call_stack.pop()
+            del frames[depth:]
+            push(value)
+            return return_address
+        return handler
+
+    def h_halt(operand, level, nxt):
+        def handler():
+            raise Halt()
+        return handler
+
+    def h_alloc(operand, level, nxt):
+        def handler():
+            frame(0).extend([0] * pop())
+            return nxt
+        return handler
+
+    def h_oframe(operand, level, nxt):
+        def handler():
+            frames.append([0] * pop())
+            return nxt
+        return handler
+
+    def h_cframe(operand, level, nxt):
+        def handler():
+            if not frames:
+                raise IndexError("cframe with no open frame")
+            frames.pop()
+            return nxt
+        return handler
+
+    def h_print(operand, level, nxt):
+        def handler():
+            output.append(pop())
+            return nxt
+        return handler
+
+    def h_printa(operand, level, nxt):
+        def handler():
+            output.append([pop() for _ in range(pop())])
+            return nxt
+        return handler
+
+    def h_delay(operand, level, nxt):
+        def handler():
+            milliseconds = pop()
+            delays.append(milliseconds)
+            machine.clock.delay(milliseconds)
+            if machine.on_delay is not None:
+                raise Pause(milliseconds, nxt)
+            return nxt
+        return handler
+
+    def h_write(operand, level, nxt):
+        def handler():
+            x, y, colour = pop(), pop(), pop()
+            write(x, y, parse_colour(colour))
+            return nxt
+        return handler
+
+    def h_writebox(operand, level, nxt):
+        def handler():
+            # Generator order: colour, width, height, y, x (x on top)
+            x, y, height, width, colour = pop(), pop(), pop(), pop(), pop()
+            write_box(x, y, width, height, parse_colour(colour))
+            return nxt
+        return handler
+
+    def h_clear(operand, level, nxt):
+        def handler():
+            clear(parse_colour(pop()))
+            return nxt
+        return handler
+
+    def h_read(operand, level, nxt):
+        def handler():
+            x = pop()
+            stack[-1] = read(x, stack[-1])
+            return nxt
+        return handler
+
+    def h_width(operand, level, nxt):
+        def handler():
+            push(display.width)
+            return nxt
+        return handler
+
+    def h_height(operand, level, nxt):
+        def handler():
+            push(display.height)
+            return nxt
+        return handler
+
+    def operator(operation, make=binary):
+        return lambda operand, level, nxt: make(operation, nxt)
+
+    table = {
+        Opcode.PUSH: h_push,
+        Opcode.PUSH_VAR: h_push_var,
+        Opcode.PUSH_INDEXED: h_push_indexed,
+        Opcode.PUSH_ARRAY: h_push_array,
+        Opcode.LABEL: h_nop,
+        Opcode.NOP: h_nop,
+        Opcode.ST: h_st,
+        Opcode.STA: h_sta,
+        Opcode.DUP: h_dup,
+        Opcode.DROP: h_drop,
+        Opcode.SWAP: h_swap,
+        Opcode.ADD: operator(lambda a, b: a + b),
+        Opcode.SUB: operator(lambda a, b: a - b),
+        Opcode.MUL: operator(lambda a, b: a * b),
+        Opcode.DIV: operator(_divide),
+        Opcode.MOD: operator(_modulo),
+        Opcode.MAX: operator(max),
+        Opcode.MIN: operator(min),
+        Opcode.LT: operator(lambda a, b: a < b, compare),
+        Opcode.LE: operator(lambda a, b: a <= b, compare),
+        Opcode.GT: operator(lambda a, b: a > b, compare),
+        Opcode.GE: operator(lambda a, b: a >= b, compare),
+        Opcode.EQ: operator(lambda a, b: a == b, compare),
+        Opcode.AND: operator(lambda a, b: a and b, compare),
+        Opcode.OR: operator(lambda a, b: a or b, compare),
+        Opcode.INC: h_inc,
+        Opcode.DEC: h_dec,
+        Opcode.NOT: h_not,
+        Opcode.IRND: h_irnd,
+        Opcode.JMP: h_jmp,
+        Opcode.CJMP: h_cjmp,
+        Opcode.CALL: h_call,
+        Opcode.RET: h_ret,
+        Opcode.HALT: h_halt,
+        Opcode.ALLOC: h_alloc,
+        Opcode.OFRAME: h_oframe,
+        Opcode.CFRAME: h_cframe,
+        Opcode.PRINT: h_print,
+        Opcode.PRINTA: h_printa,
+        Opcode.DELAY: h_delay,
+        Opcode.WRITE: h_write,
+        Opcode.WRITEBOX: h_writebox,
+        Opcode.CLEAR: h_clear,
+        Opcode.READ: h_read,
+        Opcode.WIDTH: h_width,
+        Opcode.HEIGHT: h_height,
+    }
+
+    # ----- superinstructions -----
+
+    def fused_jump(address):
+        def handler():
+            fused[0] += 1
+            return address
+        return handler
+
+    def fused_branch(address, nxt):
+        def handler():
+            fused[0] += 1
+            return address if pop() else nxt
+        return handler
+
+    def fused_call(address, nxt):
+        def handler():
+            fused[0] += 1
+            arguments = [pop() for _ in range(pop())]
+            call_stack.append((nxt, len(frames)))
+            frames.append(arguments)
+            return address
+        return handler
+
+    def fused_store(index, level, nxt):
+        if index < 0 or level < 0:
+            def handler():
+                fused[0] += 2
+                store(index, level, pop())
+                return nxt
+        elif level == 0:
+            def handler():
+                fused[0] += 2
+                value = pop()
+                try:
+                    frames[-1][index] = value
+                except IndexError:
+                    store(index, level, value)
+                return nxt
+        else:
+            def handler():
+                fused[0] += 2
+                value = pop()
+                try:
+                    frame(level)[index] = value
+                except IndexError:
+                    store(index, level, value)
+                return nxt
+        return handler
+
+    opcodes, operands, levels = decoded.opcodes, decoded.operands, decoded.levels
+
+    def fuse(address):
+        """Superinstruction starting at address, or None"""
+        if opcodes[address] is not Opcode.PUSH or address + 1 >= size:
+            return None
+        value, following = operands[address], opcodes[address + 1]
+        if decoded.is_address(value):
+            if following is Opcode.JMP:
+                return fused_jump(value)
+            if following is Opcode.CJMP:
+                return fused_branch(value, address + 2)
+            if following is Opcode.CALL:
+                return fused_call(value, address + 2)
+        if (following is Opcode.PUSH and address + 2 < size and opcodes[address + 2] is Opcode.ST and
+                isinstance(value, int) and isinstance(operands[address + 1], int) and
+                value >= 0 and operands[address + 1] >= 0):
+            return fused_store(value, operands[address + 1], address + 3)
+        return None
+
+    handlers = []
+    fused_ends = {}
+    for address in range(size):
+        handler = fuse(address)
+        if handler is not None:
+            fused_ends[address] = address + (2 if opcodes[address + 1] is Opcode.PUSH else 1)
+        else:
+            opcode = opcodes[address]
+            if opcode not in table:
+                raise VMError("unsupported instruction", address, decoded.instructions[address])
+            handler = table[opcode](operands[address], levels[address], address + 1)
+        handlers.append(handler)
+
+    def end_of_program():
+        fused[0] -= 1  # running off the end is not an instruction
+        raise Halt()
+    handlers.append(end_of_program)
+    return handlers, fused_ends
+
+
+def run_threaded(machine, decoded: DecodedProgram):
+    """
+    Run machine from its current pc until halt using the threaded handlers.
+    Dispatch happens in chunks that cannot overrun max_steps even if every handler
+    is a fused one; the last few steps before the limit go through the reference
+    step() so the limit is enforced exactly.
+    """
+    if machine._handlers is None:
+        machine._handlers = build_handlers(decoded, machine)
+    handlers, fused_ends = machine._handlers
+    fused = machine._fused_steps
+    pc = machine.pc
+    while True:
+        dispatched = 0
+        try:
+            while True:
+                chunk = (machine.max_steps - machine.steps) // MAX_FUSED_LENGTH
+                if chunk < 1:
+                    break
+                fused[0] = 0
+                dispatched = 0
+                for dispatched in range(chunk):
+                    pc = handlers[pc]()
+                machine.steps += chunk + fused[0]
+            break
+        except Halt:
+            machine.steps += dispatched + 1 + fused[0]
+            machine.pc = pc
+            machine.halted = True
+            return
+        except Pause as pause:
+            machine.steps += dispatched + 1 + fused[0]
+            machine.pc = pc = pause.address
+            if machine.on_delay(pause.milliseconds):
+                machine.paused = True
+                return
+        except (IndexError, ZeroDivisionError, TypeError, ValueError) as e:
+            machine.steps += dispatched + 1 + fused[0]
+            machine.pc = pc = fused_ends.get(pc, pc)
+            raise VMError(str(e), pc, decoded.instructions[pc]) from None
+
+    machine.pc = pc
+    while not machine.halted and not machine.paused:
+        machine.step()
@@ -0,0 +1,162 @@
+"""
+Headless Frame Capture
+Runs compiled PArIR without sleeping: every 'delay' is treated as a frame
+boundary where the framebuffer is hashed (and optionally dumped as PNG or NPY)
+and stamped with the clock's virtual time.
+Recordings can be saved as golden files and compared against later runs.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Union
+
+from code_generator.instructions import Instruction
+from .clock import Clock
+from .display import DEFAULT_HEIGHT, DEFAULT_WIDTH, Display, create_display
+from .machine import DEFAULT_MAX_STEPS, PArIRMachine
+
+DEFAULT_FRAMES = 32
+DUMP_FORMATS = ("png", "npy")
+
+
+def frame_digest(display: Display) -> str:
+    """Short content hash of the current framebuffer"""
+    return hashlib.sha256(display.to_bytes()).hexdigest()[:16]
+
+
+def encode_png(display: Display) -> bytes:
+    """Framebuffer as an 8-bit RGB PNG"""
+    raw = display.to_bytes()  # little-endian 0x00RRGGBB words: B, G, R, 0
+    rgb = bytearray(3 * display.width * display.height)
+    rgb[0::3], rgb[1::3], rgb[2::3] = raw[2::4], raw[1::4], raw[0::4]
+
+    stride = 3 * display.width
+    scanlines = b"".join(b"\0" + rgb[row:row + stride] for row in range(0, len(rgb), stride))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", display.width, display.height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(scanlines, 9)) + chunk(b"IEND", b""))
+
+
+def encode_npy(display: Display) -> bytes:
+    """Framebuffer as a (height, width) uint32 .npy array (loadable with numpy.load)"""
+    header = f"{{'descr': '<u4', 'fortran_order': False, 'shape': ({display.height}, {display.width}), }}"
+    padding = 64 - (10 + len(header) + 1) % 64
+    header = header + " " * padding + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1") + display.to_bytes()
+
+
+@dataclass
+class Frame:
+    """
+    One presented frame: the delay that ended it (None for the final frame at
+    halt) and the virtual time in milliseconds once that delay has elapsed
+    """
+    index: int
+    steps: int
+    timestamp: int
+    delay: Optional[int]
+    digest: str
+
+
+@dataclass
+class Recording:
+    """Frames captured by run_headless"""
+    width: int
+    height: int
+    seed: int
+    frames: List[Frame] = field(default_factory=list)
+    output: List = field(default_factory=list)
+    steps: int = 0
+    virtual_time: int = 0
+    halted: bool = False
+
+    def digests(self) -> List[str]:
+        return [frame.digest for frame in self.frames]
+
+    def to_golden(self) -> dict:
+        """Golden file content: what must not change between compiler versions"""
+        return {"width": self.width, "height": self.height, "seed": self.seed,
+                "frames": [{"delay": frame.delay, "digest": frame.digest} for frame in self.frames]}
+
+
+def run_headless(program: Iterable[Union[str, Instruction]], frames: int = DEFAULT_FRAMES,
+                 width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT, seed: int = 0,
+                 max_steps: int = DEFAULT_MAX_STEPS, engine: str = "threaded", backend: str = "auto",
+                 dump_dir: Optional[str] = None, dump_format: str = "png",
+                 clock: Optional[Clock] = None) -> Recording:
+    """
+    Run program until it halts or has presented `frames` frames. A frame is
+    presented at every delay; if the program halts first, its final framebuffer
+    is recorded as one more frame. With dump_dir, each frame is also written
+    there as frame_NNNN.png / .npy. The default clock is instant; pass a
+    realtime or accelerated vm.clock.Clock to pace the capture.
+    """
+    if dump_format not in DUMP_FORMATS:
+        raise ValueError(f"Unknown dump format '{dump_format}' (expected one of {', '.join(DUMP_FORMATS)})")
+    display = create_display(width, height, backend)
+    machine = PArIRMachine(program, display, seed, max_steps, engine, clock)
+    recording = Recording(width, height, seed)
+    encode = encode_png if dump_format == "png" else encode_npy
+    if dump_dir:
+        os.makedirs(dump_dir, exist_ok=True)
+
+    def present(delay):
+        frame = Frame(len(recording.frames), machine.steps, machine.clock.now, delay, frame_digest(display))
+        recording.frames.append(frame)
+        if dump_dir:
+            with open(os.path.join(dump_dir, f"frame_{frame.index:04d}.{dump_format}"), "wb") as f:
+                f.write(encode(display))
+        return len(recording.frames) >= frames
+
+    machine.on_delay = present
+    machine.run()
+    if machine.halted and len(recording.frames) < frames:
+        present(None)
+
+    recording.output = machine.output
+    recording.steps = machine.steps
+    recording.virtual_time = machine.clock.now
+    recording.halted = machine.halted
+    return recording
+
+
+def save_golden(recording: Recording, path: str):
+    """Write recording's frame digests as a golden file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recording.to_golden(), f, indent=2)
+        f.write("\n")
+
+
+def load_golden(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_golden(recording: Recording, golden: dict) -> List[str]:
+    """Differences between a recording and a golden file (empty when they match)"""
+    differences = []
+    for key in ("width", "height", "seed"):
+        if golden.get(key) != getattr(recording, key):
+            differences.append(f"{key}: expected {golden.get(key)}, got {getattr(recording, key)}")
+
+    expected = golden.get("frames", [])
+    actual = recording.to_golden()["frames"]
+    if len(expected) != len(actual):
+        differences.append(f"frame count: expected {len(expected)}, got {len(actual)}")
+    for index, (want, got) in enumerate(zip(expected, actual)):
+        if want != got:
+            differences.append(f"frame {index}: expected {want['digest']} (delay {want['delay']}), "
+                               f"got {got['digest']} (delay {got['delay']})")
+    return differences
+
@@ -0,0 +1,347 @@
+"""
+PArIR Virtual Machine
+Pure-Python interpreter for the PArIR produced by PArIRGenerator, so compiled
+programs can be run and checked without the PAD2000c device.
+
+Execution model (as laid out by the code generator):
+- Every line, including '.label' lines, occupies one address; labels execute as no-ops
+- 'push #PC+n' pushes the address of the push itself plus n; 'jmp'/'cjmp' jump to absolute addresses
+- Memory is a stack of frames; [index:level] addresses slot index of the frame 'level' frames down
+- 'call' opens a frame holding the arguments (first popped argument in slot 0);
+  'ret' closes every frame opened since the call and pushes the return value
+"""
+
+import random
+from typing import Callable, Iterable, List, Optional, Union
+
+from code_generator.instructions import Instruction, Opcode, parse_program
+from .clock import Clock
+from .display import Display, create_display, parse_colour
+
+DEFAULT_MAX_STEPS = 10_000_000
+
+
+class VMError(Exception):
+    """Runtime error while executing PArIR"""
+    def __init__(self, message: str, pc: int = -1, instruction: Instruction = None):
+        self.message = message
+        self.pc = pc
+        self.instruction = instruction
+        super().__init__(self.format_error())
+
+    def format_error(self):
+        if self.instruction is not None:
+            return f"VM Error at address {self.pc} ({self.instruction.render()}): {self.message}"
+        return f"VM Error: {self.message}"
+
+
+def load_program(program: Iterable[Union[str, Instruction]]) -> List[Instruction]:
+    """Instruction list from generator output (PArIR text lines or Instruction objects)"""
+    program = list(program)
+    if all(isinstance(instruction, Instruction) for instruction in program):
+        return program
+    return parse_program(instruction.render() if isinstance(instruction, Instruction) else instruction
+                         for instruction in program)
+
+
+def label_addresses(program: List[Instruction]) -> dict:
+    """Map each '.name' label to its address"""
+    return {instruction.operand: address for address, instruction in enumerate(program)
+            if instruction.opcode is Opcode.LABEL}
+
+
+def _divide(a, b):
+    if b == 0:
+        raise ZeroDivisionError("division by zero")
+    if isinstance(a, int) and isinstance(b, int):
+        quotient = abs(a) // abs(b)
+        return quotient if (a < 0) == (b < 0) else -quotient
+    return a / b
+
+
+def _modulo(a, b):
+    if b == 0:
+        raise ZeroDivisionError("modulo by zero")
+    return a - b * _divide(a, b) if isinstance(a, int) and isinstance(b, int) else a % b
+
+
+class PArIRMachine:
+    """
+    PArIR interpreter. Printed values, delays and the framebuffer are kept in
+    memory for inspection. Delays advance the machine's clock (vm.clock),
+    which by default never sleeps; the virtual time is clock.now.
+
+    on_delay, if set, is called with each delay's milliseconds after it is
+    recorded; returning True pauses run() after the delay (a frame boundary),
+    and calling run() again resumes.
+
+    Engines (both share this machine's state and give identical results):
+    - "threaded":  program decoded once into pre-bound handlers (vm.engine); the default
+    - "reference": one instruction per step, dispatched on its opcode (also used by step())
+    """
+
+    ENGINES = ("threaded", "reference")
+
+    def __init__(self, program: Iterable[Union[str, Instruction]], display: Display = None,
+                 seed: Optional[int] = None, max_steps: int = DEFAULT_MAX_STEPS,
+                 engine: str = "threaded", clock: Clock = None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown VM engine '{engine}' (expected one of {', '.join(self.ENGINES)})")
+        self.program = load_program(program)
+        self.labels = label_addresses(self.program)
+        self.display = display if display is not None else create_display()
+        self.random = random.Random(seed)
+        self.max_steps = max_steps
+        self.engine = engine
+        self.clock = clock if clock is not None else Clock()
+        self.on_delay: Optional[Callable[[object], bool]] = None
+        self._decoded = None
+        self._fused_steps = [0]
+        self.reset()
+
+    def reset(self):
+        """Return to the initial state (the display is not cleared)"""
+        self.clock.reset()
+        self.pc = 0
+        self.stack: List = []
+        self.frames: List[List] = []
+        self.call_stack: List[tuple] = []  # (return address, frame depth before the call)
+        self.output: List = []
+        self.delays: List = []
+        self.steps = 0
+        self.halted = False
+        self.paused = False
+        self._handlers = None  # threaded handlers are bound to the lists above
+
+    # ===== OPERAND STACK AND MEMORY =====
+
+    def _pop(self):
+        if not self.stack:
+            raise IndexError("operand stack underflow")
+        return self.stack.pop()
+
+    def _frame(self, level: int) -> List:
+        if not 0 <= level < len(self.frames):
+            raise IndexError(f"frame level {level} out of range ({len(self.frames)} open)")
+        return self.frames[-1 - level]
+
+    def _load(self, index: int, level: int):
+        frame = self._frame(level)
+        if not 0 <= index < len(frame):
+            raise IndexError(f"slot [{index}:{level}] out of range (frame size {len(frame)})")
+        return frame[index]
+
+    def _store(self, index: int, level: int, value):
+        frame = self._frame(level)
+        if not 0 <= index < len(frame):
+            raise IndexError(f"slot [{index}:{level}] out of range (frame size {len(frame)})")
+        frame[index] = value
+
+    def _target(self, address) -> int:
+        if not isinstance(address, int) or not 0 <= address < len(self.program):
+            raise IndexError(f"jump target {address} outside the program")
+        return address
+
+    # ===== EXECUTION =====
+
+    def run(self) -> "PArIRMachine":
+        """Execute until halt (or until the program runs off its end) or until on_delay pauses"""
+        self.paused = False
+        if self.halted:
+            return self
+        if self.engine == "threaded":
+            from .engine import decode, run_threaded
+            if self._decoded is None:
+                self._decoded = decode(self.program)
+            run_threaded(self, self._decoded)
+            return self
+        while not self.halted and not self.paused:
+            self.step()
+        return self
+
+    def step(self):
+        """Execute one instruction"""
+        if self.pc >= len(self.program):
+            self.halted = True
+            return
+        if self.steps >= self.max_steps:
+            raise VMError(f"step limit of {self.max_steps} exceeded", self.pc, self.program[self.pc])
+        instruction = self.program[self.pc]
+        self.steps += 1
+        try:
+            self._execute(instruction)
+        except VMError:
+            raise
+        except (IndexError, ZeroDivisionError, TypeError, ValueError) as e:
+            raise VMError(str(e), self.pc, instruction) from None
+
+    def _execute(self, instruction: Instruction):
+        opcode = instruction.opcode
+        pop = self._pop
+        push = self.stack.append
+        next_pc = self.pc + 1
+
+        # Pushes and memory
+        if opcode is Opcode.PUSH:
+            value = instruction.operand
+            push(parse_colour(value) if isinstance(value, str) else value)
+        elif opcode is Opcode.PUSH_PC:
+            push(self.pc + instruction.operand)
+        elif opcode is Opcode.PUSH_LABEL:
+            if instruction.operand not in self.labels:
+                raise VMError(f"undefined function '.{instruction.operand}'", self.pc, instruction)
+            push(self.labels[instruction.operand])
+        elif opcode is Opcode.PUSH_VAR:
+            push(self._load(instruction.operand, instruction.level))
+        elif opcode is Opcode.PUSH_INDEXED:
+            push(self._load(instruction.operand + pop(), instruction.level))
+        elif opcode is Opcode.PUSH_ARRAY:
+            count = pop()
+            for offset in range(count - 1, -1, -1):
+                push(self._load(instruction.operand + offset, instruction.level))
+        elif opcode is Opcode.LABEL or opcode is Opcode.NOP:
+            pass
+        elif opcode is Opcode.ST:
+            level, index, value = pop(), pop(), pop()
+            self._store(index, level, value)
+        elif opcode is Opcode.STA:
+            level, index, count = pop(), pop(), pop()
+            for offset in range(count):
+                self._store(index + offset, level, pop())
+        elif opcode is Opcode.DUP:
+            value = pop()
+            push(value)
+            push(value)
+        elif opcode is Opcode.DROP:
+            pop()
+        elif opcode is Opcode.SWAP:
+            a, b = pop(), pop()
+            push(a)
+            push(b)
+
+        # Arithmetic and logic (left operand on top of the right one)
+        elif opcode is Opcode.ADD:
+            a, b = pop(), pop()
+            push(a + b)
+        elif opcode is Opcode.SUB:
+            a, b = pop(), pop()
+            push(a - b)
+        elif opcode is Opcode.MUL:
+            a, b = pop(), pop()
+            push(a * b)
+        elif opcode is Opcode.DIV:
+            a, b = pop(), pop()
+            push(_divide(a, b))
+        elif opcode is Opcode.MOD:
+            a, b = pop(), pop()
+            push(_modulo(a, b))
+        elif opcode is Opcode.INC:
+            push(pop() + 1)
+        elif opcode is Opcode.DEC:
+            push(pop() - 1)
+        elif opcode is Opcode.MAX:
+            a, b = pop(), pop()
+            push(max(a, b))
+        elif opcode is Opcode.MIN:
+            a, b = pop(), pop()
+            push(min(a, b))
+        elif opcode is Opcode.LT:
+            a, b = pop(), pop()
+            push(1 if a < b else 0)
+        elif opcode is Opcode.LE:
+            a, b = pop(), pop()
+            push(1 if a <= b else 0)
+        elif opcode is Opcode.GT:
+            a, b = pop(), pop()
+            push(1 if a > b else 0)
+        elif opcode is Opcode.GE:
+            a, b = pop(), pop()
+            push(1 if a >= b else 0)
+        elif opcode is Opcode.EQ:
+            a, b = pop(), pop()
+            push(1 if a == b else 0)
+        elif opcode is Opcode.AND:
+            a, b = pop(), pop()
+            push(1 if a and b else 0)
+        elif opcode is Opcode.OR:
+            a, b = pop(), pop()
+            push(1 if a or b else 0)
+        elif opcode is Opcode.NOT:
+            push(0 if pop() else 1)
+        elif opcode is Opcode.IRND:
+            limit = pop()
+            if limit <= 0:
+                raise ValueError(f"irnd bound must be positive, got {limit}")
+            push(self.random.randrange(limit))
+
+        # Control flow and frames
+        elif opcode is Opcode.JMP:
+            next_pc = self._target(pop())
+        elif opcode is Opcode.CJMP:
+            address, condition = pop(), pop()
+            if condition:
+                next_pc = self._target(address)
+        elif opcode is Opcode.CALL:
+            address, count = pop(), pop()
+            arguments = [pop() for _ in range(count)]
+            self.call_stack.append((next_pc, len(self.frames)))
+            self.frames.append(arguments)
+            next_pc = self._target(address)
+        elif opcode is Opcode.RET:
+            if not self.call_stack:
+                raise VMError("ret outside of a function call", self.pc, instruction)
+            value = pop()
+            next_pc, depth = self.call_stack.pop()
+            del self.frames[depth:]
+            push(value)
+        elif opcode is Opcode.ALLOC:
+            self._frame(0).extend([0] * pop())
+        elif opcode is Opcode.OFRAME:
+            self.frames.append([0] * pop())
+        elif opcode is Opcode.CFRAME:
+            if not self.frames:
+                raise IndexError("cframe with no open frame")
+            self.frames.pop()
+        elif opcode is Opcode.HALT:
+            self.halted = True
+            next_pc = self.pc
+
+        # Built-ins
+        elif opcode is Opcode.PRINT:
+            self.output.append(pop())
+        elif opcode is Opcode.PRINTA:
+            count = pop()
+            self.output.append([pop() for _ in range(count)])
+        elif opcode is Opcode.DELAY:
+            milliseconds = pop()
+            self.delays.append(milliseconds)
+            self.clock.delay(milliseconds)
+            if self.on_delay is not None and self.on_delay(milliseconds):
+                self.paused = True
+        elif opcode is Opcode.WRITE:
+            x, y, colour = pop(), pop(), pop()
+            self.display.write(x, y, parse_colour(colour))
+        elif opcode is Opcode.WRITEBOX:
+            # Generator order: colour, width, height, y, x (x on top)
+            x, y, height, width, colour = pop(), pop(), pop(), pop(), pop()
+            self.display.write_box(x, y, width, height, parse_colour(colour))
+        elif opcode is Opcode.CLEAR:
+            self.display.clear(parse_colour(pop()))
+        elif opcode is Opcode.READ:
+            x, y = pop(), pop()
+            push(self.display.read(x, y))
+        elif opcode is Opcode.WIDTH:
+            push(self.display.width)
+        elif opcode is Opcode.HEIGHT:
+            push(self.display.height)
+        else:
+            raise VMError("unsupported instruction", self.pc, instruction)
+
+        self.pc = next_pc
+
+
+def run_program(program: Iterable[Union[str, Instruction]], display: Display = None,
+                seed: Optional[int] = None, max_steps: int = DEFAULT_MAX_STEPS,
+                engine: str = "threaded", clock: Clock = None) -> PArIRMachine:
+    """Execute a generated program to completion and return the finished machine"""
+    return PArIRMachine(program, display, seed, max_steps, engine, clock).run()
@@ -0,0 +1,134 @@
+"""
+PArIR Profiler
+Counting profiler for the VM: every executed instruction is attributed to its
+address and to the call stack it ran under (function names come from the
+'.name' labels that 'call' lands on). With the generator's source map
+(CompileResult.source_map) the counts are also mapped back to PArL lines.
+
+Reports hot instructions, hot source lines and per-function inclusive /
+exclusive instruction counts; folded() gives flamegraph-compatible stacks
+("main;draw;plot 1234" per line, as consumed by flamegraph.pl or speedscope).
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from code_generator.instructions import Instruction, Opcode
+from .clock import Clock
+from .display import Display
+from .machine import DEFAULT_MAX_STEPS, PArIRMachine
+
+ROOT_FUNCTION = "main"
+
+
+@dataclass
+class Profile:
+    """Instruction counts of one profiled run"""
+    program: List[Instruction]
+    counts: List[int]                              # executions per instruction address
+    stacks: Dict[Tuple[str, ...], int]             # instructions executed under each call stack
+    source_map: Sequence = field(default_factory=list)
+    steps: int = 0
+    halted: bool = False
+
+    def _location(self, address: int):
+        return self.source_map[address] if address < len(self.source_map) else None
+
+    def hot_instructions(self, limit: int = 10) -> List[Tuple[int, int]]:
+        """(address, count) of the most executed instructions"""
+        ranked = sorted(((count, -address) for address, count in enumerate(self.counts) if count),
+                        reverse=True)
+        return [(-negated, count) for count, negated in ranked[:limit]]
+
+    def line_counts(self) -> Counter:
+        """Instructions executed per (function, line); line None for code with no source position"""
+        lines = Counter()
+        for address, count in enumerate(self.counts):
+            if count:
+                location = self._location(address)
+                key = (location.function, location.line) if location is not None else (None, None)
+                lines[key] += count
+        return lines
+
+    def hot_lines(self, limit: int = 10) -> List[Tuple[Tuple[Optional[str], Optional[int]], int]]:
+        """((function, line), count) of the most expensive source lines"""
+        return self.line_counts().most_common(limit)
+
+    def function_counts(self) -> Dict[str, Tuple[int, int]]:
+        """function -> (inclusive, exclusive) instruction counts"""
+        inclusive, exclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            exclusive[stack[-1]] += count
+            for name in set(stack):  # recursion counts once per stack
+                inclusive[name] += count
+        return {name: (inclusive[name], exclusive[name]) for name in inclusive}
+
+    def folded(self) -> List[str]:
+        """Folded call stacks, one 'frame;frame;frame count' line per stack"""
+        return [f"{';'.join(stack)} {count}" for stack, count in sorted(self.stacks.items()) if count]
+
+    def format_report(self, source: Optional[str] = None, limit: int = 10) -> str:
+        """Text report; with the PArL source the hot lines show their code"""
+        source_lines = source.splitlines() if source is not None else []
+        total = max(self.steps, 1)
+        lines = [f"{self.steps} instructions executed" + ("" if self.halted else " (stopped before halt)"), ""]
+
+        lines.append(f"{'Function':<24}{'Inclusive':>12}{'%':>7}{'Exclusive':>12}{'%':>7}")
+        ranked = sorted(self.function_counts().items(), key=lambda item: (-item[1][0], item[0]))
+        for name, (inclusive, exclusive) in ranked:
+            lines.append(f"{name:<24}{inclusive:>12}{inclusive / total * 100:>6.1f}%"
+                         f"{exclusive:>12}{exclusive / total * 100:>6.1f}%")
+
+        if self.source_map:
+            lines.extend(["", f"{'Line':>6}  {'Function':<16}{'Count':>12}{'%':>7}  Source"])
+            for (function, line), count in self.hot_lines(limit):
+                text = ""
+                if line is not None and 0 < line <= len(source_lines):
+                    text = source_lines[line - 1].strip()
+                lines.append(f"{line if line is not None else '-':>6}  {function or '-':<16}{count:>12}"
+                             f"{count / total * 100:>6.1f}%  {text}")
+
+        lines.extend(["", f"{'Address':>8}  {'Instruction':<20}{'Count':>12}{'%':>7}  Line"])
+        for address, count in self.hot_instructions(limit):
+            location = self._location(address)
+            where = f"{location.line}:{location.col}" if location is not None else ""
+            lines.append(f"{address:>8}  {self.program[address].render():<20}{count:>12}"
+                         f"{count / total * 100:>6.1f}%  {where}")
+        return "\n".join(lines)
+
+
+def profile_program(program: Iterable[Union[str, Instruction]], source_map: Sequence = (),
+                    display: Display = None, seed: Optional[int] = None,
+                    max_steps: int = DEFAULT_MAX_STEPS, clock: Clock = None) -> Profile:
+    """
+    Run program on the reference engine, counting every instruction. Runs that
+    reach max_steps (endless animations) stop there and report what ran.
+    """
+    machine = PArIRMachine(program, display, seed, max_steps, "reference", clock)
+    program = machine.program
+    names = {address: instruction.operand for address, instruction in enumerate(program)
+             if instruction.opcode is Opcode.LABEL}
+    counts = [0] * len(program)
+    stacks: Dict[Tuple[str, ...], int] = {}
+    stack = (ROOT_FUNCTION,)
+    stack_start = 0
+    step = machine.step
+    size = len(program)
+
+    while not machine.halted and machine.pc < size and machine.steps < max_steps:
+        pc = machine.pc
+        opcode = program[pc].opcode
+        counts[pc] += 1
+        step()
+        if opcode is Opcode.CALL or opcode is Opcode.RET:
+            stacks[stack] = stacks.get(stack, 0) + machine.steps - stack_start
+            stack_start = machine.steps
+            if opcode is Opcode.CALL:
+                stack = stack + (names.get(machine.pc, f"@{machine.pc}"),)
+            elif len(stack) > 1:
+                stack = stack[:-1]
+    stacks[stack] = stacks.get(stack, 0) + machine.steps - stack_start
+
+    return Profile(program, counts, {key: count for key, count in stacks.items() if count},
+                   list(source_map), machine.steps, machine.halted or machine.pc >= size)
@@ -0,0 +1,156 @@
+"""
+PArIR Program Runner
+Loads .parl (compiled on the fly), .parir or .pirb files and executes them on the VM
+
+Usage: python -m vm [--width W] [--height H] [--seed S] [--engine E] program.parl|.parir|.pirb
+       python -m vm --clock realtime|instant|accelerated [--speed X] program   (delay pacing)
+       python -m vm --profile [--folded FILE] program                           (instruction profile)
+       python -m vm --frames N [--dump-dir DIR] [--dump-format png|npy] program   (headless capture)
+"""
+
+import argparse
+import sys
+import time
+from typing import List, Tuple
+
+from code_generator.code_generator import PArIRGenerator
+from code_generator.instructions import Instruction, decode_program, parse_program
+from .clock import CLOCK_MODES, Clock, create_clock
+from .display import BACKENDS, DEFAULT_HEIGHT, DEFAULT_WIDTH, create_display
+from .headless import DUMP_FORMATS, run_headless
+from .machine import DEFAULT_MAX_STEPS, PArIRMachine, VMError
+from .profiler import profile_program
+
+
+def load_file(path: str, options=None) -> List[Instruction]:
+    """Instructions from a PArL source, PArIR text or binary PArIR file"""
+    return load_file_with_source_map(path, options)[0]
+
+
+def load_file_with_source_map(path: str, options=None) -> Tuple[List[Instruction], list]:
+    """
+    Instructions plus the generator's source map (empty unless path is PArL
+    source); options is the parlc CompileOptions used for PArL sources
+    """
+    if path.endswith(".pirb"):
+        with open(path, "rb") as f:
+            return decode_program(f.read()), []
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith(".parl"):
+        from parlc.driver import compile_source
+        result = compile_source(text, options, path)
+        if not result.success:
+            raise ValueError(f"{path}: compilation failed ({result.failed_stage}): " + "; ".join(result.errors))
+        return parse_program(result.instructions), result.source_map
+    return parse_program(text.splitlines()), []
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="vm", description="Run PArIR programs on the local PArIR VM")
+    parser.add_argument("file", help=".parl, .parir or .pirb program")
+    parser.add_argument("-O", "--opt-level", type=int, choices=PArIRGenerator.OPT_LEVELS, default=0,
+                        help="optimization level used when compiling .parl files")
+    parser.add_argument("--elide-empty-frames", action="store_true",
+                        help="compile .parl files without frames for declaration-free blocks")
+    parser.add_argument("--hoist-loop-frames", action="store_true",
+                        help="compile .parl files with loop-body frames opened once per loop")
+    parser.add_argument("--fold-constants", action="store_true",
+                        help="compile .parl files with constant folding over the AST")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="display width in pixels")
+    parser.add_argument("--height", type=int, default=DEFAULT_HEIGHT, help="display height in pixels")
+    parser.add_argument("--display", choices=BACKENDS, default="auto",
+                        help="framebuffer backend (auto uses NumPy when installed)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for irnd (__randi)")
+    parser.add_argument("--engine", choices=PArIRMachine.ENGINES, default="threaded",
+                        help="threaded (pre-decoded handlers) or reference (one opcode dispatch per step)")
+    parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS,
+                        help="stop with an error after this many instructions")
+    parser.add_argument("--clock", choices=CLOCK_MODES, default="instant",
+                        help="how delays are paced: sleep as on the device, sleep 1/SPEED of it, or not at all")
+    parser.add_argument("--speed", type=float, default=10.0, help="speed factor for --clock accelerated")
+    parser.add_argument("--profile", action="store_true",
+                        help="count every instruction and report hot functions, source lines and instructions")
+    parser.add_argument("--folded", default=None,
+                        help="with --profile: write flamegraph folded stacks to this file")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="headless: run for N frames (each delay ends a frame, nothing sleeps) "
+                             "and print a hash per frame")
+    parser.add_argument("--dump-dir", default=None, help="headless: write every frame to this directory")
+    parser.add_argument("--dump-format", choices=DUMP_FORMATS, default="png", help="headless: frame file format")
+    return parser
+
+
+def compile_options(args):
+    """CompileOptions for .parl inputs from the command line"""
+    from parlc.driver import CompileOptions
+    return CompileOptions(opt_level=args.opt_level, elide_empty_frames=args.elide_empty_frames,
+                          hoist_loop_frames=args.hoist_loop_frames, fold_constants=args.fold_constants)
+
+
+def run_frames(program: List[Instruction], clock: Clock, args) -> int:
+    """Headless mode: capture frames and print one line per frame"""
+    start = time.perf_counter()
+    try:
+        recording = run_headless(program, args.frames, args.width, args.height, args.seed or 0,
+                                 args.max_steps, args.engine, args.display, args.dump_dir, args.dump_format,
+                                 clock)
+    except VMError as e:
+        print(f"vm: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    for frame in recording.frames:
+        delay = "halt" if frame.delay is None else f"delay {frame.delay}"
+        print(f"frame {frame.index:>4}  {frame.steps:>10} instructions  t={frame.timestamp:>8} ms  "
+              f"{delay:<12} {frame.digest}")
+    print(f"-- {len(recording.frames)} frame(s), {recording.steps} instructions in {elapsed:.3f} s, "
+          f"{recording.virtual_time} ms virtual time", file=sys.stderr)
+    return 0
+
+
+def run_profile(program: List[Instruction], source_map: list, display, clock: Clock, args) -> int:
+    """Profiling mode: run on the reference engine counting instructions, then report"""
+    try:
+        profile = profile_program(program, source_map, display, args.seed, args.max_steps, clock)
+    except VMError as e:
+        print(f"vm: {e}", file=sys.stderr)
+        return 1
+    source = None
+    if args.file.endswith(".parl"):
+        with open(args.file, "r", encoding="utf-8") as f:
+            source = f.read()
+    print(profile.format_report(source))
+    if args.folded:
+        with open(args.folded, "w", encoding="utf-8") as f:
+            f.write("\n".join(profile.folded()) + "\n")
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    try:
+        program, source_map = load_file_with_source_map(args.file, compile_options(args))
+        display = create_display(args.width, args.height, args.display)
+        clock = create_clock(args.clock, args.speed)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"vm: {e}", file=sys.stderr)
+        return 2
+    if args.frames is not None:
+        return run_frames(program, clock, args)
+    if args.profile:
+        return run_profile(program, source_map, display, clock, args)
+
+    machine = PArIRMachine(program, display, args.seed, args.max_steps, args.engine, clock)
+    start = time.perf_counter()
+    try:
+        machine.run()
+    except VMError as e:
+        print(f"vm: {e}", file=sys.stderr)
+        return 1
+    finally:
+        elapsed = time.perf_counter() - start
+        for value in machine.output:
+            print(value)
+        print(f"-- {machine.steps} instructions in {elapsed:.3f} s, {len(machine.delays)} delay(s), "
+              f"{machine.clock.now} ms virtual time", file=sys.stderr)
+    return 0